@@ -0,0 +1,25 @@
+"""
+库存预警管理后台
+"""
+from django.contrib import admin
+from .models import StockAlert, AlertDigest
+
+
+@admin.register(StockAlert)
+class StockAlertAdmin(admin.ModelAdmin):
+    """库存预警管理"""
+    list_display = ['id', 'item', 'previous_status', 'status', 'stock', 'min_stock', 'created_at', 'dispatched_at']
+    list_filter = ['status', 'previous_status', 'created_at']
+    search_fields = ['item__name', 'item__code']
+    ordering = ['-created_at']
+    raw_id_fields = ['item']
+    readonly_fields = ['created_at']
+
+
+@admin.register(AlertDigest)
+class AlertDigestAdmin(admin.ModelAdmin):
+    """预警汇总管理"""
+    list_display = ['id', 'title', 'alert_count', 'created_at']
+    search_fields = ['title', 'body']
+    ordering = ['-created_at']
+    readonly_fields = ['created_at']
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class AlertsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.alerts'
+    verbose_name = '库存预警'
+
+    def ready(self):
+        from . import signals  # noqa: F401
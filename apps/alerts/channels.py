@@ -0,0 +1,95 @@
+"""
+库存预警投递渠道
+
+渠道通过 settings.STOCK_ALERTS['CHANNELS'] 配置，可以是内置名称（feed/email/webhook），
+也可以是自定义渠道类的导入路径。自定义渠道只需实现 send(digest) 方法。
+"""
+import json
+import logging
+import urllib.request
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class BaseChannel:
+    """投递渠道基类"""
+    name = ''
+
+    def __init__(self, config=None):
+        self.config = config if config is not None else getattr(settings, 'STOCK_ALERTS', {})
+
+    def send(self, digest):
+        raise NotImplementedError
+
+
+class FeedChannel(BaseChannel):
+    """站内消息：写入预警汇总表，由 /api/alerts/feed/ 读取"""
+    name = 'feed'
+
+    def send(self, digest):
+        from .models import AlertDigest
+        AlertDigest.objects.create(
+            title=digest['title'],
+            body=digest['body'],
+            payload=digest['sections'],
+            alert_count=digest['count'],
+        )
+
+
+class EmailChannel(BaseChannel):
+    """邮件通知，开发环境可使用本地 SMTP 替身（EMAIL_HOST/EMAIL_PORT）"""
+    name = 'email'
+
+    def send(self, digest):
+        recipients = [address for address in self.config.get('EMAIL_RECIPIENTS', []) if address]
+        if not recipients:
+            logger.warning('未配置预警邮件收件人，跳过邮件通知')
+            return
+        send_mail(
+            subject=digest['title'],
+            message=digest['body'],
+            from_email=None,
+            recipient_list=recipients,
+        )
+
+
+class WebhookChannel(BaseChannel):
+    """Webhook 通知：POST JSON 到配置的地址"""
+    name = 'webhook'
+
+    def send(self, digest):
+        url = self.config.get('WEBHOOK_URL')
+        if not url:
+            logger.warning('未配置预警 Webhook 地址，跳过 Webhook 通知')
+            return
+        body = json.dumps(digest, ensure_ascii=False).encode('utf-8')
+        request = urllib.request.Request(
+            url,
+            data=body,
+            headers={'Content-Type': 'application/json; charset=utf-8'},
+            method='POST',
+        )
+        with urllib.request.urlopen(request, timeout=self.config.get('WEBHOOK_TIMEOUT', 5)) as response:
+            response.read()
+
+
+BUILTIN_CHANNELS = {
+    channel.name: channel for channel in (FeedChannel, EmailChannel, WebhookChannel)
+}
+
+
+def get_channels():
+    """按配置实例化投递渠道"""
+    config = getattr(settings, 'STOCK_ALERTS', {})
+    channels = []
+    for name in config.get('CHANNELS', ['feed']):
+        name = name.strip()
+        if not name:
+            continue
+        channel_class = BUILTIN_CHANNELS.get(name) or import_string(name)
+        channels.append(channel_class(config))
+    return channels
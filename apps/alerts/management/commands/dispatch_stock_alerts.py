@@ -0,0 +1,38 @@
+"""
+投递库存预警
+
+    python manage.py dispatch_stock_alerts            # 投递当前所有待发送事件后退出（适合 cron）
+    python manage.py dispatch_stock_alerts --loop     # 常驻运行，按间隔轮询
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.alerts.services import dispatch_pending_alerts
+
+
+class Command(BaseCommand):
+    help = '批量去重投递待发送的库存预警'
+
+    def add_arguments(self, parser):
+        config = getattr(settings, 'STOCK_ALERTS', {})
+        parser.add_argument('--loop', action='store_true', help='常驻运行')
+        parser.add_argument('--interval', type=float, default=config.get('INTERVAL', 60),
+                            help='常驻运行时的轮询间隔（秒）')
+        parser.add_argument('--batch-size', type=int, default=config.get('BATCH_SIZE', 500),
+                            help='每批处理的事件数')
+
+    def handle(self, *args, **options):
+        while True:
+            total = 0
+            while True:
+                count = dispatch_pending_alerts(batch_size=options['batch_size'])
+                total += count
+                if count < options['batch_size']:
+                    break
+            if total:
+                self.stdout.write(self.style.SUCCESS(f'已投递 {total} 条预警事件'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('inventory', '0003_item_status_trigger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200, verbose_name='标题')),
+                ('body', models.TextField(verbose_name='内容')),
+                ('payload', models.JSONField(default=dict, verbose_name='明细')),
+                ('alert_count', models.IntegerField(default=0, verbose_name='物品数量')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '预警汇总',
+                'verbose_name_plural': '预警汇总',
+                'db_table': 'alert_digests',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='alert_diges_created_ebc0e9_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('previous_status', models.CharField(choices=[('normal', '正常'), ('low_stock', '低库存'), ('out_of_stock', '缺货')], max_length=20, verbose_name='原状态')),
+                ('status', models.CharField(choices=[('normal', '正常'), ('low_stock', '低库存'), ('out_of_stock', '缺货')], max_length=20, verbose_name='新状态')),
+                ('stock', models.IntegerField(verbose_name='库存数量')),
+                ('min_stock', models.IntegerField(verbose_name='最低库存')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='发生时间')),
+                ('dispatched_at', models.DateTimeField(blank=True, null=True, verbose_name='投递时间')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='inventory.item', verbose_name='物品')),
+            ],
+            options={
+                'verbose_name': '库存预警',
+                'verbose_name_plural': '库存预警',
+                'db_table': 'stock_alerts',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['item', 'created_at'], name='stock_alert_item_id_69933d_idx'), models.Index(condition=models.Q(('dispatched_at__isnull', True)), fields=['id'], name='stock_alerts_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockalert',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='领取时间'),
+        ),
+    ]
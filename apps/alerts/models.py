@@ -0,0 +1,69 @@
+"""
+库存预警模型
+"""
+from django.db import models
+
+
+class StockAlert(models.Model):
+    """库存状态变化事件（发件箱）
+
+    在库存变更的同一事务内写入，由 dispatch_stock_alerts 命令批量去重后投递。
+    """
+    STATUS_CHOICES = [
+        ('normal', '正常'),
+        ('low_stock', '低库存'),
+        ('out_of_stock', '缺货'),
+    ]
+    
+    item = models.ForeignKey(
+        'inventory.Item',
+        on_delete=models.CASCADE,
+        related_name='stock_alerts',
+        verbose_name='物品'
+    )
+    previous_status = models.CharField('原状态', max_length=20, choices=STATUS_CHOICES)
+    status = models.CharField('新状态', max_length=20, choices=STATUS_CHOICES)
+    stock = models.IntegerField('库存数量')
+    min_stock = models.IntegerField('最低库存')
+    created_at = models.DateTimeField('发生时间', auto_now_add=True)
+    claimed_at = models.DateTimeField('领取时间', null=True, blank=True)  # 投递进程领取后、发送完成前
+    dispatched_at = models.DateTimeField('投递时间', null=True, blank=True)
+    
+    class Meta:
+        db_table = 'stock_alerts'
+        verbose_name = '库存预警'
+        verbose_name_plural = '库存预警'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['item', 'created_at']),
+            # 部分索引：只包含待投递事件，投递任务轮询代价与历史数据量无关
+            models.Index(
+                fields=['id'],
+                name='stock_alerts_pending_idx',
+                condition=models.Q(dispatched_at__isnull=True),
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.item_id}: {self.previous_status} → {self.status}"
+
+
+class AlertDigest(models.Model):
+    """预警汇总（站内消息）"""
+    title = models.CharField('标题', max_length=200)
+    body = models.TextField('内容')
+    payload = models.JSONField('明细', default=dict)
+    alert_count = models.IntegerField('物品数量', default=0)
+    created_at = models.DateTimeField('创建时间', auto_now_add=True)
+    
+    class Meta:
+        db_table = 'alert_digests'
+        verbose_name = '预警汇总'
+        verbose_name_plural = '预警汇总'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+    
+    def __str__(self):
+        return self.title
@@ -0,0 +1,28 @@
+"""
+库存预警序列化器
+"""
+from rest_framework import serializers
+from .models import StockAlert, AlertDigest
+
+
+class StockAlertSerializer(serializers.ModelSerializer):
+    """预警事件序列化器"""
+    item_name = serializers.CharField(source='item.name', read_only=True)
+    item_code = serializers.CharField(source='item.code', read_only=True)
+    previous_status_display = serializers.CharField(source='get_previous_status_display', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = StockAlert
+        fields = [
+            'id', 'item', 'item_name', 'item_code', 'previous_status', 'previous_status_display',
+            'status', 'status_display', 'stock', 'min_stock', 'created_at', 'dispatched_at'
+        ]
+
+
+class AlertDigestSerializer(serializers.ModelSerializer):
+    """预警汇总序列化器"""
+    
+    class Meta:
+        model = AlertDigest
+        fields = ['id', 'title', 'body', 'payload', 'alert_count', 'created_at']
@@ -0,0 +1,150 @@
+"""
+库存预警服务：状态变化检测与批量投递
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .channels import get_channels
+from .models import StockAlert
+
+logger = logging.getLogger(__name__)
+
+TRACKED_STATUSES = {'normal', 'low_stock', 'out_of_stock'}
+
+STATUS_LABELS = dict(StockAlert.STATUS_CHOICES)
+
+
+def record_status_change(item, previous_status):
+    """库存变更后调用：状态发生变化时写入发件箱
+
+    必须在库存变更的同一事务内调用，事务回滚时预警事件一并回滚。
+    previous_status 为 None 表示未知（例如状态列被延迟加载），此时不做判断。
+    """
+    status = item.status
+    if previous_status is None or previous_status == status:
+        return None
+    if previous_status not in TRACKED_STATUSES or status not in TRACKED_STATUSES:
+        return None
+    return StockAlert.objects.create(
+        item=item,
+        previous_status=previous_status,
+        status=status,
+        stock=item.stock,
+        min_stock=item.min_stock,
+    )
+
+
+def build_digest(alerts):
+    """按物品去重合并预警事件
+
+    同一物品在一批事件中多次变化时只保留最终状态；最终状态与最初状态相同
+    （如 正常 → 低库存 → 正常）的物品不再通知。返回 None 表示没有需要通知的内容。
+    """
+    by_item = {}
+    for alert in sorted(alerts, key=lambda a: a.id):
+        entry = by_item.get(alert.item_id)
+        if entry is None:
+            by_item[alert.item_id] = entry = {'first': alert, 'last': alert}
+        entry['last'] = alert
+
+    sections = {'out_of_stock': [], 'low_stock': [], 'normal': []}
+    for entry in by_item.values():
+        first, last = entry['first'], entry['last']
+        if first.previous_status == last.status:
+            continue
+        sections[last.status].append({
+            'item_id': last.item_id,
+            'item_name': last.item.name,
+            'item_code': last.item.code,
+            'previous_status': first.previous_status,
+            'status': last.status,
+            'stock': last.stock,
+            'min_stock': last.min_stock,
+            'changed_at': last.created_at.isoformat(),
+        })
+
+    count = sum(len(entries) for entries in sections.values())
+    if not count:
+        return None
+
+    title = (
+        f"库存预警：{len(sections['out_of_stock'])}个物品缺货，"
+        f"{len(sections['low_stock'])}个物品低库存，{len(sections['normal'])}个物品已恢复"
+    )
+    lines = []
+    for status in ('out_of_stock', 'low_stock', 'normal'):
+        for entry in sections[status]:
+            lines.append(
+                f"[{STATUS_LABELS[status]}] {entry['item_name']} ({entry['item_code']}) "
+                f"库存 {entry['stock']} / 最低 {entry['min_stock']}"
+            )
+    return {
+        'title': title,
+        'body': '\n'.join(lines),
+        'count': count,
+        'sections': sections,
+    }
+
+
+def _claim_pending(batch_size, claim_timeout):
+    """短事务内领取一批待投递事件：写入领取时间，提交后释放行锁"""
+    now = timezone.now()
+    with transaction.atomic():
+        queryset = StockAlert.objects.filter(
+            Q(claimed_at__isnull=True) | Q(claimed_at__lt=now - timedelta(seconds=claim_timeout)),
+            dispatched_at__isnull=True,
+        ).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        alerts = list(queryset[:batch_size])
+        if alerts:
+            StockAlert.objects.filter(id__in=[alert.id for alert in alerts]).update(claimed_at=now)
+    for alert in alerts:
+        alert.claimed_at = now
+    return alerts, now
+
+
+def dispatch_pending_alerts(batch_size=None, channels=None):
+    """投递一批待发送的预警事件，返回处理的事件数
+
+    分三步执行，渠道发送（邮件、Webhook 可能耗时数秒）期间不持有任何事务和行锁：
+
+    1. 短事务领取事件（写入 claimed_at），PostgreSQL 下使用 SKIP LOCKED，可并行运行多个投递进程
+    2. 事务外构建汇总并逐个渠道发送
+    3. 短事务标记为已投递；任一渠道失败时释放领取，下次运行重新投递（至少一次语义）
+
+    进程在发送途中崩溃时，事件在 STOCK_ALERTS['CLAIM_TIMEOUT'] 秒后可被重新领取。
+    """
+    config = getattr(settings, 'STOCK_ALERTS', {})
+    batch_size = batch_size or config.get('BATCH_SIZE', 500)
+    channels = channels if channels is not None else get_channels()
+
+    alerts, claimed_at = _claim_pending(batch_size, config.get('CLAIM_TIMEOUT', 600))
+    if not alerts:
+        return 0
+    claimed = StockAlert.objects.filter(id__in=[alert.id for alert in alerts], claimed_at=claimed_at)
+
+    try:
+        from apps.inventory.models import Item
+        items = Item.objects.only('id', 'name', 'code').in_bulk({alert.item_id for alert in alerts})
+        for alert in alerts:
+            alert.item = items[alert.item_id]
+
+        digest = build_digest(alerts)
+        if digest is not None:
+            for channel in channels:
+                channel.send(digest)
+            logger.info('库存预警已投递: %s 条事件, %s 个物品', len(alerts), digest['count'])
+    except Exception:
+        claimed.update(claimed_at=None)
+        raise
+
+    # 只标记仍由本进程领取的事件（超时后被其他进程重新领取的不重复标记）
+    with transaction.atomic():
+        claimed.update(dispatched_at=timezone.now())
+    return len(alerts)
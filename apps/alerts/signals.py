@@ -0,0 +1,22 @@
+"""
+库存预警信号
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.inventory.models import Item
+from common.cache_versions import track_model_versions
+from .models import AlertDigest
+from .services import record_status_change
+
+track_model_versions(AlertDigest)
+
+
+@receiver(post_save, sender=Item, dispatch_uid='alerts_item_status_change')
+def detect_item_status_change(sender, instance, created, raw=False, **kwargs):
+    """物品保存后检测库存状态变化，变化时写入预警发件箱（与库存变更同一事务）"""
+    if raw:
+        return
+    previous_status = 'normal' if created else getattr(instance, '_loaded_status', None)
+    record_status_change(instance, previous_status)
+    instance._loaded_status = instance.status
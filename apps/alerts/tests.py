@@ -0,0 +1,139 @@
+"""
+库存预警测试
+"""
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from common.testing import ApiBudgetTestCase
+
+from .channels import FeedChannel
+from .models import AlertDigest, StockAlert
+from .services import build_digest, dispatch_pending_alerts
+
+
+class AlertQueryBudgetTests(ApiBudgetTestCase):
+    """预警接口在多行数据下不超出查询预算"""
+
+    def test_endpoints_declare_budget(self):
+        self.assertEndpointsBudgeted('api/alerts/')
+
+    def test_endpoints(self):
+        # 把一半物品的库存降到最低库存以下，产生预警事件
+        for item in self.items[::2]:
+            self.assertOk(self.client.patch(
+                f'/api/inventory/items/{item.pk}/', {'min_stock': item.stock + 10}, format='json'
+            ))
+        alert = StockAlert.objects.first()
+        self.assertIsNotNone(alert)
+        digest = AlertDigest.objects.create(title='库存预警', body='低库存', alert_count=1)
+
+        self.assertOk(self.client.get('/api/alerts/'))
+        self.assertOk(self.client.get(f'/api/alerts/{alert.pk}/'))
+        self.assertOk(self.client.get('/api/alerts/feed/'))
+        self.assertOk(self.client.get(f'/api/alerts/feed/{digest.pk}/'))
+
+
+class FailingChannel:
+    def send(self, digest):
+        raise ConnectionError('渠道不可用')
+
+
+class RecordingChannel:
+    """记录发送内容以及发送时所处的事务层数"""
+
+    def __init__(self):
+        self.sent = []
+        self.atomic_depths = []
+
+    def send(self, digest):
+        self.sent.append(digest)
+        self.atomic_depths.append(len(connection.atomic_blocks))
+
+
+class AlertBehaviourTests(ApiBudgetTestCase):
+    """状态变化检测、汇总去重与投递"""
+
+    def outbound(self, item, quantity):
+        self.assertOk(self.client.post('/api/operations/outbound/', {
+            'item': item.pk, 'quantity': quantity, 'recipient': '测试',
+        }, format='json'))
+
+    def test_threshold_crossing_creates_one_alert(self):
+        item = self.items[0]  # 库存 57，最低库存 5
+        before = StockAlert.objects.filter(item=item).count()
+
+        self.outbound(item, 53)  # 57 → 4，跌破最低库存
+        self.outbound(item, 1)   # 4 → 3，仍为低库存，不再产生事件
+        alerts = list(StockAlert.objects.filter(item=item).order_by('id')[before:])
+        self.assertEqual(len(alerts), 1)
+        self.assertEqual((alerts[0].previous_status, alerts[0].status), ('normal', 'low_stock'))
+        self.assertEqual(alerts[0].stock, 4)
+
+        self.outbound(item, 3)   # 3 → 0，缺货
+        self.assertEqual(StockAlert.objects.filter(item=item).count(), before + 2)
+
+    def make_alert(self, pk, item, previous_status, status, stock):
+        alert = StockAlert(id=pk, item_id=item.pk, previous_status=previous_status, status=status,
+                           stock=stock, min_stock=item.min_stock, created_at=timezone.now())
+        alert.item = item
+        return alert
+
+    def test_build_digest_groups_by_item(self):
+        a, b, c = self.items[0], self.items[2], self.items[4]
+        digest = build_digest([
+            # a：正常 → 低库存 → 缺货，只保留最终状态和最初的原状态
+            self.make_alert(3, a, 'low_stock', 'out_of_stock', 0),
+            self.make_alert(1, a, 'normal', 'low_stock', 4),
+            # b：正常 → 低库存 → 正常，状态复原，不通知
+            self.make_alert(2, b, 'normal', 'low_stock', 3),
+            self.make_alert(4, b, 'low_stock', 'normal', 30),
+            # c：低库存 → 正常
+            self.make_alert(5, c, 'low_stock', 'normal', 80),
+        ])
+        self.assertEqual(digest['count'], 2)
+        self.assertEqual([entry['item_id'] for entry in digest['sections']['out_of_stock']], [a.pk])
+        self.assertEqual(digest['sections']['out_of_stock'][0]['previous_status'], 'normal')
+        self.assertEqual(digest['sections']['out_of_stock'][0]['stock'], 0)
+        self.assertEqual(digest['sections']['low_stock'], [])
+        self.assertEqual([entry['item_id'] for entry in digest['sections']['normal']], [c.pk])
+        self.assertIn('1个物品缺货', digest['title'])
+
+        self.assertIsNone(build_digest([
+            self.make_alert(1, b, 'normal', 'low_stock', 3),
+            self.make_alert(2, b, 'low_stock', 'normal', 30),
+        ]))
+
+    def test_failing_channel_leaves_alerts_pending(self):
+        self.outbound(self.items[0], 53)
+        pending = StockAlert.objects.filter(dispatched_at__isnull=True)
+        count = pending.count()
+        self.assertGreater(count, 0)
+
+        with self.assertRaises(ConnectionError):
+            dispatch_pending_alerts(channels=[FeedChannel(), FailingChannel()])
+        self.assertEqual(pending.count(), count)
+        self.assertFalse(StockAlert.objects.filter(claimed_at__isnull=False).exists())
+
+        # 释放领取后下次运行重新投递
+        channel = RecordingChannel()
+        self.assertEqual(dispatch_pending_alerts(channels=[channel]), count)
+        self.assertEqual(pending.count(), 0)
+        self.assertEqual(len(channel.sent), 1)
+
+    def test_send_runs_outside_transaction(self):
+        self.outbound(self.items[0], 53)
+        channel = RecordingChannel()
+        depth = len(connection.atomic_blocks)
+        dispatch_pending_alerts(channels=[channel])
+        self.assertEqual(channel.atomic_depths, [depth])
+
+    def test_stale_claim_is_reclaimed(self):
+        self.outbound(self.items[0], 53)
+        StockAlert.objects.update(claimed_at=timezone.now())
+        self.assertEqual(dispatch_pending_alerts(channels=[RecordingChannel()]), 0)
+
+        StockAlert.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertGreater(dispatch_pending_alerts(channels=[RecordingChannel()]), 0)
+        self.assertFalse(StockAlert.objects.filter(dispatched_at__isnull=True).exists())
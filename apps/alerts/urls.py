@@ -0,0 +1,16 @@
+"""
+库存预警URL配置
+"""
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import StockAlertViewSet, AlertDigestViewSet
+
+app_name = 'alerts'
+
+router = DefaultRouter()
+router.register(r'feed', AlertDigestViewSet, basename='alert-digest')
+router.register(r'', StockAlertViewSet, basename='stock-alert')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
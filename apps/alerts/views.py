@@ -0,0 +1,46 @@
+"""
+库存预警视图
+"""
+from rest_framework import viewsets
+from rest_framework.permissions import IsAuthenticated
+from django_filters.rest_framework import DjangoFilterBackend
+
+from .models import StockAlert, AlertDigest
+from .serializers import StockAlertSerializer, AlertDigestSerializer
+from common.conditional import ConditionalGetMixin
+from common.responses import APIResponse
+from common.pagination import StandardPagination
+
+
+class StockAlertViewSet(viewsets.ReadOnlyModelViewSet):
+    """预警事件视图集（只读）"""
+    queryset = StockAlert.objects.select_related('item')
+    serializer_class = StockAlertSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = StandardPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['item', 'status']
+    query_budgets = {'list': 5, 'retrieve': 4}
+    
+    def retrieve(self, request, *args, **kwargs):
+        """获取预警事件详情"""
+        serializer = self.get_serializer(self.get_object())
+        return APIResponse.success(data=serializer.data)
+
+
+class AlertDigestViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """站内预警消息
+
+    客户端携带 If-None-Match 轮询，没有新消息时直接返回 304，不查询数据库。
+    """
+    queryset = AlertDigest.objects.all()
+    serializer_class = AlertDigestSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = StandardPagination
+    conditional_models = ('alerts.alertdigest',)
+    query_budgets = {'list': 4, 'retrieve': 4}
+    
+    def retrieve(self, request, *args, **kwargs):
+        """获取预警消息详情"""
+        serializer = self.get_serializer(self.get_object())
+        return APIResponse.success(data=serializer.data)
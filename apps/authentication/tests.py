@@ -0,0 +1,38 @@
+"""
+用户认证测试
+"""
+from rest_framework.test import APIClient
+
+from common.testing import ApiBudgetTestCase
+
+
+class AuthenticationQueryBudgetTests(ApiBudgetTestCase):
+    """认证接口不超出查询预算"""
+
+    def test_endpoints_declare_budget(self):
+        self.assertEndpointsBudgeted('api/auth/')
+
+    def test_login_refresh_and_register(self):
+        anonymous = APIClient()
+        response = self.assertOk(anonymous.post(
+            '/api/auth/login/', {'username': 'admin', 'password': 'admin123'}, format='json'
+        ))
+        refresh_token = response.json()['data']['refresh_token']
+        self.assertOk(anonymous.post('/api/auth/refresh/', {'refresh': refresh_token}, format='json'))
+        self.assertOk(anonymous.post('/api/auth/register/', {
+            'username': 'newuser', 'email': 'new@example.com',
+            'password': 'Newpass123!', 'password_confirm': 'Newpass123!',
+        }, format='json'), 201)
+
+    def test_profile_and_password(self):
+        self.assertOk(self.client.get('/api/auth/profile/'))
+        self.assertOk(self.client.put('/api/auth/profile/update/', {'first_name': '管理员'}, format='json'))
+        self.assertOk(self.client.post('/api/auth/change-password/', {
+            'old_password': 'admin123', 'new_password': 'Changed123!', 'new_password_confirm': 'Changed123!',
+        }, format='json'))
+        self.assertOk(self.client.post('/api/auth/logout/', {}, format='json'))
+
+    def test_blacklist(self):
+        self.assertOk(self.client.post('/api/auth/blacklist/add/', {'target': '10.0.0.1'}, format='json'))
+        self.assertOk(self.client.get('/api/auth/blacklist/'))
+        self.assertOk(self.client.post('/api/auth/blacklist/clear/', {}, format='json'))
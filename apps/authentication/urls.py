@@ -3,6 +3,7 @@
 """
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
+from common.query_budget import query_budget
 from . import views
 
 app_name = 'authentication'
@@ -11,7 +12,7 @@ urlpatterns = [
     path('login/', views.login, name='login'),
     path('register/', views.register, name='register'),
     path('logout/', views.logout, name='logout'),
-    path('refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('refresh/', query_budget(3)(TokenRefreshView.as_view()), name='token_refresh'),
     path('profile/', views.profile, name='profile'),
     path('profile/update/', views.update_profile, name='update_profile'),
     path('change-password/', views.change_password, name='change_password'),
@@ -6,6 +6,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.core.cache import cache
+from common.query_budget import query_budget
 from common.responses import APIResponse
 from .serializers import (
     LoginSerializer, RegisterSerializer,
@@ -14,6 +15,7 @@ from .serializers import (
 )
 
 
+@query_budget(4)
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def login(request):
@@ -40,6 +42,7 @@ def login(request):
     )
 
 
+@query_budget(5)
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def register(request):
@@ -67,6 +70,7 @@ def register(request):
     )
 
 
+@query_budget(3)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout(request):
@@ -82,6 +86,7 @@ def logout(request):
         return APIResponse.error(message=f'登出失败: {str(e)}')
 
 
+@query_budget(3)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def profile(request):
@@ -90,6 +95,7 @@ def profile(request):
     return APIResponse.success(data=serializer.data, message='获取用户信息成功')
 
 
+@query_budget(4)
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
 def update_profile(request):
@@ -107,6 +113,7 @@ def update_profile(request):
     )
 
 
+@query_budget(5)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def change_password(request):
@@ -129,6 +136,7 @@ def change_password(request):
 
 # ==================== 黑名单管理 ====================
 
+@query_budget(3)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def blacklist_list(request):
@@ -156,6 +164,7 @@ def blacklist_list(request):
         return APIResponse.error(message=f'获取黑名单失败: {str(e)}')
 
 
+@query_budget(3)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def blacklist_add(request):
@@ -180,6 +189,7 @@ def blacklist_add(request):
         return APIResponse.error(message=f'添加失败: {str(e)}')
 
 
+@query_budget(3)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def blacklist_remove(request):
@@ -203,6 +213,7 @@ def blacklist_remove(request):
         return APIResponse.error(message=f'移除失败: {str(e)}')
 
 
+@query_budget(3)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def blacklist_clear(request):
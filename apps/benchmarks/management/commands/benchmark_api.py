@@ -0,0 +1,111 @@
+"""
+接口基准测试
+
+    python manage.py benchmark_api                                  # 运行并与基线对比
+    python manage.py benchmark_api --save-baseline                  # 把本次结果保存为基线
+    python manage.py benchmark_api --only items_list,inbound --iterations 50
+    python manage.py benchmark_api --cold --fail-on-regression      # 每次请求前清空缓存；有回归时返回非零
+
+基线默认保存在 benchmarks/baseline.json，请在相同的数据（seed_perf_data 同一种子）和机器上对比。
+"""
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from apps.benchmarks.runner import CASES, BenchmarkRunner, compare
+
+
+class Command(BaseCommand):
+    help = '测量主要接口的延迟分位数、查询数和内存峰值，并与基线对比'
+
+    def add_arguments(self, parser):
+        default_baseline = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+        parser.add_argument('--iterations', type=int, default=20, help='每个用例的测量次数')
+        parser.add_argument('--warmup', type=int, default=3, help='每个用例的预热次数')
+        parser.add_argument('--only', help='只运行指定用例（逗号分隔）')
+        parser.add_argument('--cold', action='store_true', help='每次请求前清空缓存')
+        parser.add_argument('--user', help='以该用户身份请求（默认第一个超级管理员）')
+        parser.add_argument('--baseline', default=str(default_baseline), help='基线文件路径')
+        parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基线')
+        parser.add_argument('--output', help='本次结果另存为 JSON')
+        parser.add_argument('--threshold', type=float, default=0.2, help='延迟/内存回归阈值（比例）')
+        parser.add_argument('--fail-on-regression', action='store_true', help='有回归时命令失败')
+
+    def handle(self, *args, **options):
+        cases = CASES
+        if options['only']:
+            names = {name.strip() for name in options['only'].split(',') if name.strip()}
+            unknown = names - {case.name for case in CASES}
+            if unknown:
+                raise CommandError(f"未知的用例：{', '.join(sorted(unknown))}")
+            cases = [case for case in CASES if case.name in names]
+
+        user = self._get_user(options['user'])
+        runner = BenchmarkRunner(user, options['iterations'], options['warmup'], options['cold'])
+
+        def progress(name, result):
+            self.stdout.write(
+                f"  {name:<26} p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  "
+                f"查询 {result['queries']:>3}  内存 {result['peak_kb']:>9.1f}KB  状态 {result['status']}"
+            )
+
+        # 允许 testserver 主机、邮件使用内存后端（入库/出库可能触发预警邮件）
+        setup_test_environment()
+        try:
+            results = runner.run(cases, progress)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        finally:
+            teardown_test_environment()
+
+        if options['output']:
+            self._write(options['output'], results)
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            self._write(baseline_path, results)
+            self.stdout.write(self.style.SUCCESS(f'基线已保存到 {baseline_path}'))
+            return
+        if not baseline_path.exists():
+            self.stdout.write(f'基线文件 {baseline_path} 不存在，使用 --save-baseline 保存本次结果')
+            return
+
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+        rows, regressions = compare(results, baseline, options['threshold'])
+        self.stdout.write(f'\n与基线对比（{baseline.get("meta", {}).get("created_at", "")}）：')
+        for row in rows:
+            if row['new']:
+                self.stdout.write(f"  {row['case']:<26} 新用例")
+                continue
+            parts = []
+            for metric, entry in row['metrics'].items():
+                text = f"{metric} {entry['baseline']}→{entry['current']} ({entry['change']:+.0%})"
+                parts.append(self.style.ERROR(text) if entry['regressed'] else text)
+            self.stdout.write(f"  {row['case']:<26} " + '  '.join(parts))
+
+        if regressions:
+            message = f'发现 {len(regressions)} 项回归：\n  ' + '\n  '.join(regressions)
+            if options['fail_on_regression']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('没有发现回归'))
+
+    def _get_user(self, username):
+        User = get_user_model()
+        if username:
+            user = User.objects.filter(username=username).first()
+        else:
+            user = User.objects.filter(is_superuser=True).order_by('id').first()
+        if user is None:
+            raise CommandError('找不到用于请求的用户，请使用 --user 指定或先创建超级管理员')
+        return user
+
+    def _write(self, path, results):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
@@ -0,0 +1,52 @@
+"""
+Gunicorn 启动时间和工作进程内存基准（仅 Linux）
+
+    python manage.py benchmark_startup                      # 预加载与不预加载对比，2 个 gthread 工作进程
+    python manage.py benchmark_startup --workers 4 --only-preload
+    python manage.py benchmark_startup --output startup.json
+
+使用项目根目录的 gunicorn.conf.py 在随机端口启动服务，测完即停止。
+"""
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.benchmarks.startup import measure_import_time, measure_startup
+
+
+class Command(BaseCommand):
+    help = '测量 gunicorn 启动时间、首个请求耗时和每个工作进程的内存'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='工作进程数')
+        parser.add_argument('--worker-class', default='gthread', help='工作进程类型（gthread 或 sync）')
+        parser.add_argument('--only-preload', action='store_true', help='只测量预加载模式')
+        parser.add_argument('--output', help='结果另存为 JSON')
+
+    def handle(self, *args, **options):
+        if not sys.platform.startswith('linux'):
+            raise CommandError('内存测量依赖 /proc，仅支持 Linux')
+
+        import_time = measure_import_time()
+        self.stdout.write(f'应用导入时间：{import_time * 1000:.0f}ms')
+
+        results = []
+        for preload in ((True,) if options['only_preload'] else (True, False)):
+            try:
+                result = measure_startup(options['workers'], options['worker_class'], preload)
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            results.append(result)
+            average = result['worker_avg']
+            self.stdout.write(
+                f"  preload={str(preload):<5}  启动 {result['startup_s']:>6.2f}s  "
+                f"首个请求 {result['first_request_ms']:>7.1f}ms  "
+                f"工作进程 RSS {average['rss_kb'] / 1024:>6.1f}MB  PSS {average['pss_kb'] / 1024:>6.1f}MB  "
+                f"USS {average['uss_kb'] / 1024:>6.1f}MB  合计 PSS {result['total_pss_kb'] / 1024:>6.1f}MB"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump({'import_s': round(import_time, 3), 'runs': results}, handle, ensure_ascii=False, indent=2)
+            self.stdout.write(f"结果已保存到 {options['output']}")
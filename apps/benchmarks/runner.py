@@ -0,0 +1,209 @@
+"""
+接口基准测试
+
+在进程内通过 APIClient 调用真实的 URL、中间件、视图和序列化器，对每个接口记录：
+
+- 延迟分位数（p50/p90/p95/p99，毫秒）
+- 每次请求的 SQL 查询数
+- 单次请求的 Python 内存峰值（tracemalloc 单独测量一次，避免影响延迟）
+
+写操作（入库、出库）在事务中执行后回滚，不改变数据库。
+结果可保存为基线 JSON，之后的运行与基线对比，回归直接体现为数字。
+"""
+import json
+import platform
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+
+import django
+import numpy as np
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+PERCENTILES = (50, 90, 95, 99)
+
+# 延迟、内存低于这些绝对变化量时视为噪声，不判定回归
+LATENCY_FLOOR_MS = 1.0
+MEMORY_FLOOR_KB = 64
+
+
+@dataclass
+class Case:
+    """一个基准测试用例；path/data 中的 {占位符} 由 build_context 提供的数据填充"""
+    name: str
+    method: str
+    path: str
+    data: dict = field(default_factory=dict)
+
+    @property
+    def writes(self):
+        return self.method != 'GET'
+
+
+CASES = [
+    Case('items_list', 'GET', '/api/inventory/items/'),
+    Case('items_search', 'GET', '/api/inventory/items/?search={search}'),
+    Case('items_category_tree', 'GET', '/api/inventory/items/?category_tree={category}'),
+    Case('operations_list', 'GET', '/api/operations/'),
+    Case('operations_by_item', 'GET', '/api/operations/?item={item}'),
+    Case('inbound', 'POST', '/api/operations/inbound/', {
+        'item': '{item}', 'quantity': 1, 'warehouse': '{warehouse}', 'supplier': '{supplier}',
+    }),
+    Case('outbound', 'POST', '/api/operations/outbound/', {
+        'item': '{item}', 'quantity': 1, 'recipient': '基准测试',
+    }),
+    Case('dashboard_overview', 'GET', '/api/dashboard/overview/'),
+    Case('dashboard_charts', 'GET', '/api/dashboard/charts/'),
+    Case('dashboard_trend', 'GET', '/api/dashboard/trend/'),
+    Case('dashboard_distribution', 'GET', '/api/dashboard/distribution/'),
+    Case('dashboard_activities', 'GET', '/api/dashboard/activities/'),
+    Case('dashboard_low_stock', 'GET', '/api/dashboard/low-stock/'),
+    Case('dashboard_bundle', 'GET', '/api/dashboard/bundle/'),
+    Case('dashboard_system_info', 'GET', '/api/dashboard/system-info/'),
+]
+
+
+def build_context():
+    """选取用例需要的物品、仓库、供应商和类别"""
+    from apps.inventory.models import Category, Item
+    from apps.suppliers.models import Supplier
+
+    item = Item.objects.filter(stock__gte=10).order_by('id').first()
+    if item is None:
+        raise ValueError('没有库存不少于 10 的物品，请先运行 seed_perf_data 生成数据')
+    supplier_id = item.supplier_id or Supplier.objects.filter(status='active').values_list('id', flat=True).first()
+    category = Category.objects.filter(parent__isnull=True).order_by('id').first()
+    return {
+        'item': item.pk,
+        'search': item.code[:-2],
+        'warehouse': item.warehouse_id,
+        'supplier': supplier_id,
+        'category': category.pk if category else '',
+    }
+
+
+def _fill(value, context):
+    if isinstance(value, str):
+        filled = value.format(**context)
+        return int(filled) if value.startswith('{') and filled.isdigit() else filled
+    return value
+
+
+class BenchmarkRunner:
+    """执行基准测试用例并汇总指标"""
+
+    def __init__(self, user, iterations=20, warmup=3, cold=False):
+        self.client = APIClient(HTTP_ACCEPT_ENCODING='gzip')
+        self.client.force_authenticate(user)
+        self.iterations = iterations
+        self.warmup = warmup
+        self.cold = cold
+
+    def _request(self, case, context):
+        path = case.path.format(**context)
+        if not case.writes:
+            return self.client.get(path)
+        data = {key: _fill(value, context) for key, value in case.data.items()}
+        with transaction.atomic():
+            response = self.client.generic(case.method, path, json.dumps(data), content_type='application/json')
+            transaction.set_rollback(True)
+        return response
+
+    def run_case(self, case, context):
+        for _ in range(self.warmup):
+            self._request(case, context)
+
+        timings, queries, statuses = [], [], set()
+        for _ in range(self.iterations):
+            if self.cold:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = self._request(case, context)
+                elapsed = time.perf_counter() - started
+            timings.append(elapsed * 1000)
+            queries.append(len(captured.captured_queries))
+            statuses.add(response.status_code)
+
+        tracemalloc.start()
+        try:
+            if self.cold:
+                cache.clear()
+            response = self._request(case, context)
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        values = np.percentile(np.array(timings), PERCENTILES)
+        result = {f'p{p}_ms': round(float(v), 2) for p, v in zip(PERCENTILES, values)}
+        result.update({
+            'mean_ms': round(float(np.mean(timings)), 2),
+            'max_ms': round(float(np.max(timings)), 2),
+            'queries': max(queries),
+            'peak_kb': round(peak / 1024, 1),
+            'bytes': len(response.content),
+            'status': sorted(statuses),
+        })
+        return result
+
+    def run(self, cases, progress=None):
+        context = build_context()
+        results = {}
+        for case in cases:
+            results[case.name] = self.run_case(case, context)
+            if progress:
+                progress(case.name, results[case.name])
+        return {'meta': collect_meta(self), 'cases': results}
+
+
+def collect_meta(runner):
+    from apps.inventory.models import Item
+    from apps.operations.models import InventoryOperation
+
+    return {
+        'created_at': timezone.localtime().isoformat(),
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'items': Item.objects.count(),
+        'operations': InventoryOperation.objects.count(),
+        'iterations': runner.iterations,
+        'cold_cache': runner.cold,
+    }
+
+
+def compare(results, baseline, threshold=0.2):
+    """与基线对比，返回 (明细行, 回归列表)
+
+    延迟和内存超过基线 threshold 比例（且超过噪声下限）判定为回归，查询数只要增加即判定为回归。
+    """
+    rows, regressions = [], []
+    checks = (
+        ('p50_ms', LATENCY_FLOOR_MS),
+        ('p95_ms', LATENCY_FLOOR_MS),
+        ('queries', 0),
+        ('peak_kb', MEMORY_FLOOR_KB),
+    )
+    for name, current in results['cases'].items():
+        base = baseline.get('cases', {}).get(name)
+        if base is None:
+            rows.append({'case': name, 'metrics': {}, 'new': True})
+            continue
+        metrics = {}
+        for metric, floor in checks:
+            before, after = base.get(metric), current.get(metric)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before if before else (0.0 if after == before else float('inf'))
+            regressed = after > before if metric == 'queries' else (
+                change > threshold and after - before > floor
+            )
+            metrics[metric] = {'baseline': before, 'current': after, 'change': change, 'regressed': regressed}
+            if regressed:
+                regressions.append(f'{name}.{metric}: {before} → {after}')
+        rows.append({'case': name, 'metrics': metrics, 'new': False})
+    return rows, regressions
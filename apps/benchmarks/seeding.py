@@ -0,0 +1,410 @@
+"""
+性能测试数据生成
+
+按随机种子生成可复现的大规模数据：三级类别树、仓库、供应商、操作员、物品（含库存余额）
+以及带季节性的历史出入库记录。所有数据使用 bulk_create 批量写入，主键预先分配，
+类别物化路径、物品状态、余额和每条操作的前后库存都在写入前用 NumPy 算好：
+
+- 每个物品的操作次数服从长尾分布（少数物品非常活跃）
+- 操作日期按 年度季节性 × 周内差异 × 业务增长 加权抽样，时间落在工作时段
+- 按 (物品, 时间) 排序后累加库存变化，期初库存取足以保证全程不出现负库存的值
+
+生成的编码统一以 PERF 开头，便于识别和清理。
+"""
+import contextlib
+import math
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.inventory.models import Category, Item, ItemStock
+from apps.operations import activity_feed, partitions
+from apps.operations.models import Department, InventoryOperation
+from apps.reports import timeseries
+from apps.suppliers.models import Supplier
+from apps.warehouses.models import Warehouse
+from common.cache_versions import bump_version
+
+PREFIX = 'PERF'
+
+DEFAULTS = {
+    'categories': 400,
+    'warehouses': 20,
+    'suppliers': 500,
+    'users': 20,
+    'items': 1_000_000,
+    'operations': 20_000_000,
+    'months': 24,
+    'batch_size': 5000,
+    'item_chunk': 50_000,
+}
+
+# 操作类型占比：入库量按比例放大，使长期出入库大致平衡
+OPERATION_MIX = [('in', 0.34), ('out', 0.56), ('transfer', 0.06), ('adjust', 0.04)]
+INBOUND_FACTOR = 0.56 / 0.34
+
+DEPARTMENTS = ['生产部', '研发部', '行政部', '销售部', '维修部', '质检部', '物流部', '财务部']
+PURPOSES = ['生产领用', '设备维修', '日常办公', '样品测试', '客户退换', '项目领用']
+
+
+@contextlib.contextmanager
+def preserve_timestamps(*models):
+    """临时关闭 auto_now / auto_now_add，让 bulk_create 写入预先生成的历史时间"""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _next_id(model):
+    return (model.objects.aggregate(value=Max('id'))['value'] or 0) + 1
+
+
+class PerfDataSeeder:
+    """性能测试数据生成器"""
+
+    def __init__(self, seed=42, progress=None, **options):
+        self.options = {**DEFAULTS, **{key: value for key, value in options.items() if value is not None}}
+        self.rng = np.random.default_rng(seed)
+        self.progress = progress or (lambda message: None)
+        self.now = timezone.now()
+
+    def exists(self):
+        return Item.objects.filter(code__startswith=f'{PREFIX}-').exists()
+
+    def run(self):
+        options = self.options
+        with preserve_timestamps(get_user_model(), Category, Warehouse, Supplier, Item, ItemStock, InventoryOperation):
+            with transaction.atomic():
+                self.users = self._seed_users(options['users'])
+                self.categories = self._seed_categories(options['categories'])
+                self.warehouses = self._seed_warehouses(options['warehouses'])
+                self.suppliers = self._seed_suppliers(options['suppliers'])
+                self.departments = self._seed_departments()
+            self._prepare_calendar(options['months'])
+            totals = self._seed_items_and_operations(options['items'], options['operations'])
+
+        self._reset_sequences()
+        # bulk_create 不触发信号，最近活动、已缓存的时间桶和缓存版本号需手动更新
+        activity_feed.rebuild()
+        timeseries.invalidate_all()
+        bump_version(
+            'inventory.category', 'inventory.item', 'inventory.itemstock', 'warehouses.warehouse',
+            'suppliers.supplier', 'operations.department', 'operations.inventoryoperation',
+        )
+        return totals
+
+    # ---- 主数据 ----
+
+    def _seed_users(self, count):
+        User = get_user_model()
+        start = _next_id(User)
+        users = [
+            User(
+                id=start + i,
+                username=f'{PREFIX.lower()}_operator_{i:03d}',
+                password='!',  # 不可登录
+                role='operator',
+                department=DEPARTMENTS[i % len(DEPARTMENTS)],
+                date_joined=self.now,
+                created_at=self.now,
+                updated_at=self.now,
+            )
+            for i in range(count)
+        ]
+        User.objects.bulk_create(users, batch_size=self.options['batch_size'])
+        self.progress(f'操作员 {count}')
+        return np.arange(start, start + count, dtype=np.int64)
+
+    def _seed_categories(self, count):
+        """三级类别树，按父级在前的顺序分配主键并直接计算物化路径"""
+        roots = max(1, count // 21)
+        second = min(count - roots, roots * 4)
+        third = count - roots - second
+        parents = np.full(count, -1, dtype=np.int64)
+        if second:
+            parents[roots:roots + second] = self.rng.integers(0, roots, second)
+        if third:
+            low, high = (roots, roots + second) if second else (0, roots)
+            parents[roots + second:] = self.rng.integers(low, high, third)
+
+        start = _next_id(Category)
+        paths = []
+        categories = []
+        for index in range(count):
+            pk = start + index
+            parent = parents[index]
+            parent_path = paths[parent] if parent >= 0 else ''
+            path = Category.build_path(parent_path, pk)
+            paths.append(path)
+            categories.append(Category(
+                id=pk,
+                name=f'{PREFIX}类别{index:05d}',
+                code=f'{PREFIX}-C{index:05d}',
+                parent_id=start + parent if parent >= 0 else None,
+                path=path,
+                depth=len(path) // Category.PATH_STEP - 1,
+                created_at=self.now,
+                updated_at=self.now,
+            ))
+        Category.objects.bulk_create(categories, batch_size=self.options['batch_size'])
+
+        # 物品挂在叶子类别上
+        has_children = np.zeros(count, dtype=bool)
+        has_children[parents[parents >= 0]] = True
+        leaves = np.flatnonzero(~has_children) + start
+        self.progress(f'类别 {count}（叶子 {len(leaves)}）')
+        return leaves
+
+    def _seed_warehouses(self, count):
+        start = _next_id(Warehouse)
+        warehouses = [
+            Warehouse(
+                id=start + i,
+                name=f'{PREFIX}仓库{i:03d}',
+                code=f'{PREFIX}-W{i:03d}',
+                location=f'园区{i // 5 + 1}号库',
+                capacity=0,  # 不限容量，避免基准测试中的入库因容量失败
+                created_at=self.now,
+                updated_at=self.now,
+            )
+            for i in range(count)
+        ]
+        Warehouse.objects.bulk_create(warehouses, batch_size=self.options['batch_size'])
+        self.warehouse_names = {warehouse.id: warehouse.name for warehouse in warehouses}
+        self.progress(f'仓库 {count}')
+        return np.arange(start, start + count, dtype=np.int64)
+
+    def _seed_departments(self):
+        Department.objects.bulk_create([Department(name=name) for name in DEPARTMENTS], ignore_conflicts=True)
+        return dict(Department.objects.filter(name__in=DEPARTMENTS).values_list('name', 'id'))
+
+    def _seed_suppliers(self, count):
+        start = _next_id(Supplier)
+        suppliers = [
+            Supplier(
+                id=start + i,
+                name=f'{PREFIX}供应商{i:05d}',
+                code=f'{PREFIX}-S{i:05d}',
+                status='active',
+                created_at=self.now,
+                updated_at=self.now,
+            )
+            for i in range(count)
+        ]
+        Supplier.objects.bulk_create(suppliers, batch_size=self.options['batch_size'])
+        self.progress(f'供应商 {count}')
+        return np.arange(start, start + count, dtype=np.int64)
+
+    # ---- 时间分布 ----
+
+    def _prepare_calendar(self, months):
+        """统计窗口内每天的抽样权重和当天零点的时间戳"""
+        today = timezone.localdate()
+        self.first_month = partitions.add_months(partitions.month_start(today), -months)
+        first_day = self.first_month
+        days = (today - first_day).days
+        dates = [first_day + timedelta(days=offset) for offset in range(days)]
+        day_of_year = np.array([day.timetuple().tm_yday for day in dates], dtype=np.float64)
+        weekday = np.array([day.weekday() for day in dates])
+
+        seasonal = 1 + 0.35 * np.sin(2 * math.pi * (day_of_year - 80) / 365.25)
+        weekly = np.where(weekday >= 5, 0.35, 1.0)
+        growth = 1 + 0.3 * np.arange(days) / max(days, 1)
+        weights = seasonal * weekly * growth
+        self.day_weights = weights / weights.sum()
+        self.day_epochs = np.array(
+            [timezone.make_aware(datetime.combine(day, time.min)).timestamp() for day in dates],
+            dtype=np.int64,
+        )
+
+        if partitions.is_partitioned():
+            # 历史月份的分区需要先建好，否则数据会落入默认分区
+            month = self.first_month
+            with connection.cursor() as cursor:
+                while month <= partitions.month_start(today):
+                    partitions.create_partition(cursor, month, connection.ops.quote_name)
+                    month = partitions.add_months(month, 1)
+
+    # ---- 物品与操作记录 ----
+
+    def _seed_items_and_operations(self, item_count, operation_count):
+        rng = self.rng
+        item_start = _next_id(Item)
+        operation_id = _next_id(InventoryOperation)
+
+        # 长尾活跃度：对数正态权重决定每个物品分到的操作次数
+        activity = rng.lognormal(0, 1.2, item_count)
+        operation_counts = rng.multinomial(operation_count, activity / activity.sum()) if item_count else []
+        # 物品日均消耗量级
+        demand_scale = rng.gamma(1.5, 3.0, item_count)
+        # 类别热度不均匀：部分叶子类别包含更多物品
+        category_weights = rng.pareto(1.5, len(self.categories)) + 1
+        category_weights /= category_weights.sum()
+
+        chunk = self.options['item_chunk']
+        totals = {'items': 0, 'operations': 0, 'balances': 0}
+        for low in range(0, item_count, chunk):
+            high = min(low + chunk, item_count)
+            with transaction.atomic():
+                created = self._seed_chunk(
+                    item_start + low,
+                    np.asarray(operation_counts[low:high], dtype=np.int64),
+                    demand_scale[low:high],
+                    category_weights,
+                    operation_id,
+                )
+            operation_id += created['operations']
+            for key, value in created.items():
+                totals[key] += value
+            self.progress(f"物品 {totals['items']}/{item_count}，操作记录 {totals['operations']}")
+        return totals
+
+    def _seed_chunk(self, first_id, counts, demand_scale, category_weights, operation_start):
+        rng = self.rng
+        size = len(counts)
+        ids = np.arange(first_id, first_id + size, dtype=np.int64)
+        warehouse_index = rng.integers(0, len(self.warehouses), size)
+        warehouses = self.warehouses[warehouse_index]
+        suppliers = rng.choice(self.suppliers, size)
+        categories = rng.choice(self.categories, size, p=category_weights)
+
+        total = int(counts.sum())
+        owner = np.repeat(np.arange(size), counts)
+        day = rng.choice(len(self.day_weights), total, p=self.day_weights)
+        seconds = self.day_epochs[day] + rng.integers(8 * 3600, 18 * 3600, total)
+        kinds = rng.choice(len(OPERATION_MIX), total, p=[share for _kind, share in OPERATION_MIX])
+        quantity = 1 + rng.poisson(demand_scale[owner] * np.where(kinds == 0, INBOUND_FACTOR, 1.0))
+        adjustment = rng.integers(-3, 4, total)
+        delta = np.select([kinds == 0, kinds == 1, kinds == 3], [quantity, -quantity, adjustment], 0)
+
+        # 按 (物品, 时间) 排序后逐物品累加库存变化
+        order = np.lexsort((seconds, owner))
+        owner, seconds, kinds, quantity, delta = (
+            owner[order], seconds[order], kinds[order], quantity[order], delta[order]
+        )
+        running = np.cumsum(delta)
+        ends = np.cumsum(counts)
+        starts = ends - counts
+        offset = np.where(starts > 0, running[np.maximum(starts - 1, 0)], 0) if total else np.zeros(size)
+        running = running - np.repeat(offset, counts)
+
+        active = counts > 0
+        lowest = np.zeros(size, dtype=np.int64)
+        if total:
+            lowest[active] = np.minimum.reduceat(running, starts[active])
+        opening = rng.integers(0, 40, size) + np.maximum(0, -lowest)
+        after = opening[owner] + running
+        before = after - delta
+        final_stock = opening + (np.where(active, running[np.maximum(ends - 1, 0)], 0) if total else 0)
+        min_stock = rng.integers(0, 30, size)
+        prices = np.round(rng.lognormal(3, 1, size), 2)
+        item_created = self.first_month - timedelta(days=1)
+
+        items = []
+        for i in range(size):
+            stock = int(final_stock[i])
+            created_at = timezone.make_aware(
+                datetime.combine(item_created - timedelta(days=int(rng.integers(0, 90))), time(9))
+            )
+            items.append(Item(
+                id=int(ids[i]),
+                name=f'{PREFIX}物品{ids[i]:07d}',
+                code=f'{PREFIX}-I{ids[i]:07d}',
+                barcode=f'69{ids[i]:011d}',
+                category_id=int(categories[i]),
+                supplier_id=int(suppliers[i]),
+                warehouse_id=int(warehouses[i]),
+                price=Decimal(f'{prices[i]:.2f}'),
+                stock=stock,
+                min_stock=int(min_stock[i]),
+                status=Item.compute_status(stock, int(min_stock[i])),
+                warehouse_location=f'{chr(65 + i % 26)}{i % 20 + 1}-{i % 5 + 1}',
+                created_at=created_at,
+                updated_at=self.now,
+            ))
+        Item.objects.bulk_create(items, batch_size=self.options['batch_size'])
+
+        # 库存余额：约 20% 的物品有一部分库存存放在第二个仓库
+        count = len(self.warehouses)
+        split = (rng.random(size) < 0.2) & (final_stock > 1) & (count > 1)
+        moved = np.where(split, rng.integers(1, np.maximum(final_stock, 2)), 0)
+        second = self.warehouses[(warehouse_index + rng.integers(1, max(count, 2), size)) % count]
+        balances = []
+        for i, item in enumerate(items):
+            if item.stock - moved[i] > 0:
+                balances.append(ItemStock(
+                    item_id=item.id, warehouse_id=item.warehouse_id, bin=item.warehouse_location,
+                    quantity=int(item.stock - moved[i]), updated_at=self.now,
+                ))
+            if moved[i]:
+                balances.append(ItemStock(
+                    item_id=item.id, warehouse_id=int(second[i]), bin='', quantity=int(moved[i]), updated_at=self.now,
+                ))
+        ItemStock.objects.bulk_create(balances, batch_size=self.options['batch_size'])
+
+        # 操作记录分批构建实例，控制内存占用
+        batch_size = self.options['batch_size']
+        operators = rng.choice(self.users, total) if len(self.users) else np.zeros(total, dtype=np.int64)
+        transfer_targets = rng.choice(self.warehouses, total)
+        for low in range(0, total, batch_size):
+            high = min(low + batch_size, total)
+            batch = []
+            for j in range(low, high):
+                item = items[owner[j]]
+                kind = OPERATION_MIX[kinds[j]][0]
+                home = self.warehouse_names[item.warehouse_id]
+                fields = {'warehouse_id': item.warehouse_id}
+                if kind == 'in':
+                    fields.update(supplier_id=item.supplier_id, to_warehouse=home)
+                elif kind == 'out':
+                    department = DEPARTMENTS[j % len(DEPARTMENTS)]
+                    fields.update(
+                        recipient=f'员工{int(seconds[j]) % 500:03d}',
+                        department=department,
+                        recipient_department_id=self.departments[department],
+                        purpose=PURPOSES[j % len(PURPOSES)],
+                        from_warehouse=home,
+                    )
+                elif kind == 'transfer':
+                    fields.update(
+                        from_warehouse=home,
+                        to_warehouse=self.warehouse_names[int(transfer_targets[j])],
+                        target_warehouse_id=int(transfer_targets[j]),
+                    )
+                batch.append(InventoryOperation(
+                    id=operation_start + j,
+                    item_id=item.id,
+                    operation_type=kind,
+                    # 调整记录的数量为调整后的合计
+                    quantity=int(after[j]) if kind == 'adjust' else int(quantity[j]),
+                    before_stock=int(before[j]),
+                    after_stock=int(after[j]),
+                    operator_id=int(operators[j]) if len(self.users) else None,
+                    created_at=datetime.fromtimestamp(int(seconds[j]), tz=dt_timezone.utc),
+                    **fields,
+                ))
+            InventoryOperation.objects.bulk_create(batch, batch_size=batch_size)
+        return {'items': size, 'operations': total, 'balances': len(balances)}
+
+    def _reset_sequences(self):
+        """显式指定主键写入后，同步数据库序列（PostgreSQL）"""
+        models = [get_user_model(), Category, Warehouse, Supplier, Item, ItemStock, InventoryOperation]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
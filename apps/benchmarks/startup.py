@@ -0,0 +1,150 @@
+"""
+Gunicorn 启动基准
+
+在子进程中按项目根目录的 gunicorn.conf.py 启动服务，测量：
+
+- 应用导入时间：全新解释器中导入 config.wsgi（Django 初始化 + 中间件）的耗时
+- 启动时间：从启动 gunicorn 到第一个请求返回
+- 首个请求耗时：第一个请求本身的耗时（URL 配置、视图导入等冷启动开销）
+- 内存：主进程和每个工作进程的 RSS、PSS（共享页按进程数分摊）和独占内存（USS）
+
+预加载模式下工作进程与主进程写时复制共享已导入的模块，USS 和 PSS 明显低于 RSS。
+内存读取依赖 Linux 的 /proc/<pid>/smaps_rollup。
+"""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+
+PROBE_PATH = '/api/auth/profile/'  # 未登录返回 401，经过完整的中间件、URL 解析和 DRF 认证
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _get(url, timeout=5):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+
+
+def read_memory(pid):
+    """进程内存（KB）：rss、pss、uss"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as handle:
+        for line in handle:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':'):
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        'rss_kb': values.get('Rss', 0),
+        'pss_kb': values.get('Pss', 0),
+        'uss_kb': values.get('Private_Clean', 0) + values.get('Private_Dirty', 0),
+    }
+
+
+def child_pids(pid):
+    children = []
+    for entry in Path('/proc').iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / 'stat').read_text()
+        except OSError:
+            continue
+        # 第 4 个字段是父进程号（进程名在括号中，可能含空格）
+        if int(stat.rsplit(')', 1)[1].split()[1]) == pid:
+            children.append(int(entry.name))
+    return sorted(children)
+
+
+def measure_import_time():
+    """全新解释器中导入 WSGI 应用的耗时（秒）"""
+    code = (
+        'import time; started = time.perf_counter(); '
+        'from config.wsgi import application; '
+        'print(time.perf_counter() - started)'
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=settings.BASE_DIR, check=True,
+        capture_output=True, text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_startup(workers=2, worker_class='gthread', preload=True, settle=2.0, timeout=60):
+    """启动一次 gunicorn 并测量，返回结果字典"""
+    port = _free_port()
+    env = {
+        **os.environ,
+        'GUNICORN_PRELOAD': str(preload),
+        'GUNICORN_ACCESS_LOG': '',
+        'GUNICORN_LOG_LEVEL': 'warning',
+    }
+    command = [
+        sys.executable, '-m', 'gunicorn', 'config.wsgi:application',
+        '-c', str(Path(settings.BASE_DIR) / 'gunicorn.conf.py'),
+        '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--worker-class', worker_class,
+    ]
+    url = f'http://127.0.0.1:{port}{PROBE_PATH}'
+    started = time.monotonic()
+    process = subprocess.Popen(
+        command, cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError('gunicorn 启动失败：' + process.stderr.read().decode(errors='replace')[-2000:])
+            if time.monotonic() - started > timeout:
+                raise RuntimeError(f'gunicorn 在 {timeout} 秒内没有响应')
+            try:
+                request_started = time.monotonic()
+                status = _get(url)
+                break
+            except OSError:
+                time.sleep(0.05)
+        ready = time.monotonic()
+        first_request = ready - request_started
+
+        # 等待全部工作进程完成启动和预热后再读取内存
+        deadline = time.monotonic() + timeout
+        while len(child_pids(process.pid)) < workers and time.monotonic() < deadline:
+            time.sleep(0.1)
+        time.sleep(settle)
+        for _ in range(workers * 4):
+            _get(url)
+
+        master = read_memory(process.pid)
+        worker_memory = [read_memory(pid) for pid in child_pids(process.pid)]
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        process.stderr.close()
+
+    count = len(worker_memory) or 1
+    return {
+        'preload': preload,
+        'worker_class': worker_class,
+        'workers': len(worker_memory),
+        'startup_s': round(ready - started, 3),
+        'first_request_ms': round(first_request * 1000, 1),
+        'probe_status': status,
+        'master': master,
+        'worker_avg': {key: sum(item[key] for item in worker_memory) // count for key in master},
+        'total_pss_kb': master['pss_kb'] + sum(item['pss_kb'] for item in worker_memory),
+    }
@@ -5,3 +5,8 @@ class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.dashboard'
     verbose_name = '仪表盘'
+
+    def ready(self):
+        # 系统信息接口输出的数据库连接复用统计
+        from common import db_connections
+        db_connections.install()
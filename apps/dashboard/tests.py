@@ -1,6 +1,98 @@
 """
 仪表盘测试
 """
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-# 在这里编写你的测试用例
+from common.testing import ApiBudgetTestCase
+
+
+class DashboardQueryBudgetTests(ApiBudgetTestCase):
+    """仪表盘接口在多行数据下不超出查询预算（缓存清空后的首次请求）"""
+
+    def test_endpoints_declare_budget(self):
+        self.assertEndpointsBudgeted('api/dashboard/')
+
+    def test_endpoints(self):
+        for path in (
+            '/api/dashboard/overview/',
+            '/api/dashboard/charts/',
+            '/api/dashboard/trend/',
+            '/api/dashboard/distribution/',
+            '/api/dashboard/activities/',
+            '/api/dashboard/low-stock/',
+            '/api/dashboard/bundle/',
+            f'/api/dashboard/bundle/?charts.category_tree={self.root.pk}&distribution.category_tree={self.root.pk}',
+            '/api/dashboard/system-info/',
+        ):
+            cache.clear()  # 每个接口都从缓存未命中开始
+            with self.subTest(path=path):
+                self.assertOk(self.client.get(path))
+
+
+class DashboardBundleTests(ApiBudgetTestCase):
+    """组合接口与单个组件接口返回相同数据，并共用缓存"""
+
+    def test_matches_single_widget_endpoints(self):
+        response = self.client.get(
+            '/api/dashboard/bundle/?widgets=trend,activities,charts&trend.period=quarter&activities.limit=3'
+            '&charts.days=14'
+        )
+        self.assertOk(response)
+        bundle = response.json()['data']
+        self.assertEqual(list(bundle), ['trend', 'activities', 'charts'])
+        self.assertEqual(len(bundle['activities']), 3)
+        for name, path in (
+            ('trend', '/api/dashboard/trend/?period=quarter'),
+            ('activities', '/api/dashboard/activities/?limit=3'),
+            ('charts', '/api/dashboard/charts/?days=14'),
+        ):
+            with self.subTest(widget=name):
+                self.assertEqual(self.client.get(path).json()['data'], bundle[name])
+
+    def test_cached_widgets_are_not_recomputed(self):
+        self.assertOk(self.client.get('/api/dashboard/overview/'))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertOk(self.client.get('/api/dashboard/bundle/?widgets=overview'))
+        business = [query['sql'] for query in queries if 'django_cache' not in query['sql']]
+        self.assertEqual(business, [])
+
+    def test_not_modified(self):
+        response = self.client.get('/api/dashboard/bundle/')
+        self.assertOk(response)
+        self.assertEqual(
+            set(response.json()['data']),
+            {'overview', 'charts', 'activities', 'low_stock', 'trend', 'distribution'},
+        )
+        response = self.client.get('/api/dashboard/bundle/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_widget(self):
+        self.assertEqual(self.client.get('/api/dashboard/bundle/?widgets=overview,nope').status_code, 400)
+        self.assertEqual(self.client.get('/api/dashboard/bundle/?widgets=charts&charts.days=x').status_code, 400)
+        self.assertEqual(self.client.get('/api/dashboard/trend/?period=week').status_code, 400)
+
+
+class SystemInfoTests(ApiBudgetTestCase):
+    """系统信息中的数据库连接复用统计"""
+
+    def get_connections(self):
+        return self.assertOk(self.client.get('/api/dashboard/system-info/')).json()['data']['database_connections']
+
+    def test_database_connections(self):
+        first = self.get_connections()
+        second = self.get_connections()
+        self.assertGreaterEqual(second['requests'], first['requests'] + 1)
+        self.assertIsNone(second['server'])  # 服务端连接占用只在 PostgreSQL 下查询
+
+        stats = second['databases']['default']
+        self.assertEqual(stats['vendor'], 'sqlite')
+        self.assertTrue(stats['connected'])
+        self.assertNotIn('server_side_cursors', stats)
+        self.assertIsInstance(stats['connections_opened'], int)
+        self.assertEqual(
+            stats['reuse_rate'],
+            round(max(0.0, 1 - stats['connections_opened'] / second['requests']), 4),
+        )
+        self.assertLessEqual(stats['reuse_rate'], 1)
@@ -9,6 +9,7 @@ from .views import (
     DashboardLowStockView,
     DashboardTrendView,
     DashboardDistributionView,
+    DashboardBundleView,
     SystemInfoView
 )
 
@@ -21,5 +22,6 @@ urlpatterns = [
     path('distribution/', DashboardDistributionView.as_view(), name='distribution'),
     path('activities/', DashboardRecentActivitiesView.as_view(), name='activities'),
     path('low-stock/', DashboardLowStockView.as_view(), name='low-stock'),
+    path('bundle/', DashboardBundleView.as_view(), name='bundle'),
     path('system-info/', SystemInfoView.as_view(), name='system-info'),
 ]
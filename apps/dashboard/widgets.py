@@ -0,0 +1,483 @@
+"""
+仪表盘组件
+
+每个组件声明依赖的模型（用于缓存版本号和 ETag）、缓存时间、参数和计算函数。
+单个组件的接口（overview/、charts/ 等）和组合接口 bundle/ 共用同一份计算和缓存：
+缓存键由组件名、参数和依赖模型的版本摘要组成，任一依赖模型变化后自动失效。
+
+resolve_widgets 一次 get_many 取出全部已缓存的组件，只计算未命中的部分并按缓存时间 set_many 写回；
+非 SQLite 数据库下多个未命中组件在线程池中并发计算（每个线程使用自己的数据库连接，结束时关闭）。
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Substr
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+
+from apps.inventory.models import Category, Item
+from apps.operations import activity_feed
+from apps.operations.models import InventoryOperation
+from apps.reports import timeseries
+from apps.suppliers.models import Supplier
+from apps.warehouses.models import Warehouse
+from common.cache_versions import versioned_key
+
+
+def get_config():
+    return {'MAX_WORKERS': 4, **getattr(settings, 'DASHBOARD_BUNDLE', {})}
+
+
+@dataclass(frozen=True)
+class Widget:
+    name: str
+    build: Callable  # build(request, **params) -> 可缓存的数据
+    models: tuple
+    timeout: int
+    params: dict = field(default_factory=dict)  # 参数名 -> (类型, 默认值)
+    etag_extra: Callable = None  # 随时间变化的统计窗口，参与 ETag 计算
+    cached: bool = True  # False：数据本身已在缓存中维护（如最近活动），不再缓存计算结果
+
+    def parse_params(self, values, prefix=''):
+        """从查询参数中读取本组件的参数（组合接口中带 '<组件名>.' 前缀）"""
+        params = {}
+        for name, (cast, default) in self.params.items():
+            raw = values.get(prefix + name)
+            if raw in (None, ''):
+                params[name] = default
+                continue
+            try:
+                params[name] = cast(raw)
+            except (TypeError, ValueError):
+                raise ValidationError({prefix + name: f'无效的参数值：{raw}'})
+        return params
+
+    def cache_key(self, params, versions):
+        base = 'dashboard_' + '_'.join([self.name] + [str(params[name]) for name in sorted(params)])
+        return versioned_key(base, {label: versions[label] for label in self.models})
+
+    def get_etag_extra(self):
+        return self.etag_extra() if self.etag_extra else ''
+
+
+WIDGETS = {}
+
+
+def register(name, models, timeout, params=None, etag_extra=None, cached=True):
+    """注册仪表盘组件"""
+    def decorator(func):
+        WIDGETS[name] = Widget(name, func, tuple(models), timeout, params or {}, etag_extra, cached)
+        return func
+    return decorator
+
+
+def _build_in_thread(widget, request, params):
+    try:
+        return widget.build(request, **params)
+    finally:
+        # 线程结束后不会再复用，关闭本线程打开的连接
+        connections.close_all()
+
+
+def _compute(request, jobs):
+    """计算未命中的组件，jobs 为 [(widget, params)]"""
+    workers = min(get_config()['MAX_WORKERS'], len(jobs))
+    # SQLite 同一时刻只能有一个连接执行查询，并发没有收益
+    if workers <= 1 or connection.vendor == 'sqlite':
+        return [widget.build(request, **params) for widget, params in jobs]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dashboard-widget') as executor:
+        # 复制上下文，线程中沿用本请求的读写分离状态
+        futures = [
+            executor.submit(contextvars.copy_context().run, _build_in_thread, widget, request, params)
+            for widget, params in jobs
+        ]
+        return [future.result() for future in futures]
+
+
+def resolve_widgets(request, requested, versions):
+    """返回 {组件名: 数据}
+
+    requested 为 [(widget, params)]，versions 需包含全部组件依赖模型的版本号。
+    """
+    keys = {widget.cache_key(params, versions): (widget, params) for widget, params in requested}
+    cached = [key for key, (widget, _params) in keys.items() if widget.cached]
+    found = cache.get_many(cached) if cached else {}
+    missing = [key for key in keys if key not in found]
+    if missing:
+        results = _compute(request, [keys[key] for key in missing])
+        by_timeout = {}
+        for key, data in zip(missing, results):
+            found[key] = data
+            if keys[key][0].cached:
+                by_timeout.setdefault(keys[key][0].timeout, {})[key] = data
+        for timeout, values in by_timeout.items():
+            cache.set_many(values, timeout)
+    return {widget.name: found[key] for key, (widget, _params) in keys.items()}
+
+
+def get_category(pk):
+    """?category_tree=<类别ID> 指定的类别；未指定时返回 None"""
+    if pk is None:
+        return None
+    try:
+        return Category.objects.only('id', 'name', 'path', 'depth').get(pk=pk)
+    except Category.DoesNotExist:
+        raise NotFound('类别不存在')
+
+
+def get_category_distribution(root=None, limit=None):
+    """类别分布（物品数、库存量）
+
+    指定 root 时只统计该子树，并按 root 的直接子类别汇总（更深层级的物品计入所属的直接子类别），
+    按物化路径前缀分组，一次聚合查询完成。
+    """
+    if root is None:
+        stats = Item.objects.values('category__name').annotate(
+            count=Count('id'),
+            total_stock=Sum('stock')
+        ).order_by('-count')
+        return list(stats[:limit] if limit else stats)
+
+    branch_length = Category.PATH_STEP * (root.depth + 2)
+    stats = list(
+        Item.objects.in_category_tree(root)
+        .annotate(branch=Substr('category__path', 1, branch_length))
+        .values('branch')
+        .annotate(count=Count('id'), total_stock=Sum('stock'))
+        .order_by('-count')
+    )
+    if limit:
+        stats = stats[:limit]
+    names = dict(
+        Category.objects.filter(path__in=[stat['branch'] for stat in stats]).values_list('path', 'name')
+    )
+    return [
+        {'category__name': names.get(stat['branch'], ''), 'count': stat['count'], 'total_stock': stat['total_stock']}
+        for stat in stats
+    ]
+
+
+def _hourly():
+    # 今日/本周/本月统计窗口随时间滚动，ETag 按小时更新
+    return datetime.now().strftime('%Y%m%d%H')
+
+
+def _daily():
+    return datetime.now().date().isoformat()
+
+
+@register(
+    'overview',
+    models=('inventory.item', 'inventory.category', 'suppliers.supplier', 'operations.inventoryoperation'),
+    timeout=30, etag_extra=_hourly,
+)
+def build_overview(request):
+    """仪表盘概览"""
+    # 合并物品统计查询 - 一次查询获取多个统计值
+    item_stats = Item.objects.aggregate(
+        total_items=Count('id'),
+        total_stock=Sum('stock'),
+        total_value=Sum(F('price') * F('stock')),
+        low_stock_count=Count('id', filter=Q(status__in=Item.LOW_STOCK_STATUSES))
+    )
+
+    total_items = item_stats['total_items'] or 0
+    total_stock = item_stats['total_stock'] or 0
+    # 确保 total_value 是数值类型
+    raw_total_value = item_stats['total_value']
+    total_value = float(raw_total_value) if raw_total_value else 0
+    low_stock_items = item_stats['low_stock_count'] or 0
+
+    # 合并其他基础统计
+    total_categories = Category.objects.filter(is_active=True).count()
+    total_suppliers = Supplier.objects.filter(status='active').count()
+
+    # 时间范围
+    today = datetime.now().date()
+    week_start = datetime.now() - timedelta(days=7)
+    month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    last_month_start = (month_start - timedelta(days=1)).replace(day=1)
+    last_month_end = month_start
+
+    # 合并操作统计查询 - 一次查询获取所有时间段的统计
+    # 报表数据包含所有记录（包括已删除的），防止通过删除记录做假账
+    ops_stats = InventoryOperation.objects.filter(
+        created_at__gte=last_month_start,
+        # 不过滤 is_deleted，报表包含所有历史记录
+    ).aggregate(
+        # 今日
+        today_in=Sum('quantity', filter=Q(created_at__date=today, operation_type='in')),
+        today_out=Sum('quantity', filter=Q(created_at__date=today, operation_type='out')),
+        today_count=Count('id', filter=Q(created_at__date=today)),
+        today_in_count=Count('id', filter=Q(created_at__date=today, operation_type='in')),
+        today_out_count=Count('id', filter=Q(created_at__date=today, operation_type='out')),
+        # 本周
+        week_in=Sum('quantity', filter=Q(created_at__gte=week_start, operation_type='in')),
+        week_out=Sum('quantity', filter=Q(created_at__gte=week_start, operation_type='out')),
+        week_count=Count('id', filter=Q(created_at__gte=week_start)),
+        week_in_count=Count('id', filter=Q(created_at__gte=week_start, operation_type='in')),
+        week_out_count=Count('id', filter=Q(created_at__gte=week_start, operation_type='out')),
+        # 本月
+        month_in=Sum('quantity', filter=Q(created_at__gte=month_start, operation_type='in')),
+        month_out=Sum('quantity', filter=Q(created_at__gte=month_start, operation_type='out')),
+        month_count=Count('id', filter=Q(created_at__gte=month_start)),
+        month_in_count=Count('id', filter=Q(created_at__gte=month_start, operation_type='in')),
+        month_out_count=Count('id', filter=Q(created_at__gte=month_start, operation_type='out')),
+        # 上月入库
+        last_month_in=Sum('quantity', filter=Q(
+            created_at__gte=last_month_start,
+            created_at__lt=last_month_end,
+            operation_type='in'
+        )),
+        # 上月出库
+        last_month_out=Sum('quantity', filter=Q(
+            created_at__gte=last_month_start,
+            created_at__lt=last_month_end,
+            operation_type='out'
+        ))
+    )
+
+    today_inbound = ops_stats['today_in'] or 0
+    today_outbound = ops_stats['today_out'] or 0
+    week_inbound = ops_stats['week_in'] or 0
+    week_outbound = ops_stats['week_out'] or 0
+    month_inbound = ops_stats['month_in'] or 0
+    month_outbound = ops_stats['month_out'] or 0
+    last_month_inbound = ops_stats['last_month_in'] or 0
+    last_month_outbound = ops_stats['last_month_out'] or 0
+
+    # 计算环比变化（限制在合理范围内 -99% 到 +999%）
+    # 环比公式：(本月 - 上月) / 上月 * 100%
+    def calc_change(current, previous):
+        if previous > 0:
+            change = ((current - previous) / previous) * 100
+            return max(-99.0, min(999.0, round(change, 1)))
+        elif current > 0:
+            return 100.0  # 上月为0，本月有数据，显示+100%
+        else:
+            return 0.0  # 都为0，显示0%
+
+    # 入库环比变化
+    inbound_change = calc_change(month_inbound, last_month_inbound)
+
+    # 出库环比变化
+    outbound_change = calc_change(month_outbound, last_month_outbound)
+
+    # 库存变化：本月净入库量占总库存的比例
+    if total_stock > 0:
+        net_change = month_inbound - month_outbound
+        stock_change = round((net_change / total_stock) * 100, 1)
+        stock_change = max(-99.0, min(99.0, stock_change))
+    else:
+        stock_change = 0.0
+
+    # 周转率计算（本月出库量/总库存）
+    avg_stock = max(total_stock, 1)
+    turnover_rate = min(round((month_outbound / avg_stock) * 100, 1), 100)
+
+    # 周转率环比
+    if last_month_outbound > 0:
+        last_turnover = round((last_month_outbound / avg_stock) * 100, 1)
+        turnover_change = calc_change(turnover_rate, last_turnover)
+    else:
+        turnover_change = 100.0 if turnover_rate > 0 else 0.0
+
+    return {
+        'overview': {
+            'total_items': total_items,
+            'total_stock': total_stock,
+            'total_value': float(total_value),
+            'low_stock_items': low_stock_items,
+            'total_categories': total_categories,
+            'total_suppliers': total_suppliers,
+            'turnover_rate': turnover_rate,
+        },
+        'changes': {
+            'items_change': inbound_change,      # 入库环比
+            'low_stock_change': outbound_change, # 出库环比
+            'value_change': stock_change,        # 库存变化
+            'turnover_change': turnover_change,  # 周转率环比
+        },
+        'today': {
+            'inbound': today_inbound,
+            'outbound': today_outbound,
+            'operations': ops_stats['today_count'] or 0,
+            'inbound_count': ops_stats['today_in_count'] or 0,
+            'outbound_count': ops_stats['today_out_count'] or 0,
+        },
+        'week': {
+            'inbound': week_inbound,
+            'outbound': week_outbound,
+            'operations': ops_stats['week_count'] or 0,
+            'inbound_count': ops_stats['week_in_count'] or 0,
+            'outbound_count': ops_stats['week_out_count'] or 0,
+        },
+        'month': {
+            'inbound': month_inbound,
+            'outbound': month_outbound,
+            'operations': ops_stats['month_count'] or 0,
+            'inbound_count': ops_stats['month_in_count'] or 0,
+            'outbound_count': ops_stats['month_out_count'] or 0,
+        }
+    }
+
+
+@register(
+    'charts',
+    models=(
+        'operations.inventoryoperation', 'inventory.item', 'inventory.category',
+        'warehouses.warehouse', 'suppliers.supplier',
+    ),
+    timeout=60, params={'days': (int, 7), 'category_tree': (int, None)}, etag_extra=_daily,
+)
+def build_charts(request, days, category_tree):
+    """仪表盘图表数据"""
+    category_root = get_category(category_tree)
+
+    # 出入库趋势：最近 days 天每天的操作次数（与卡片数据保持一致，统计次数而不是数量）
+    # 报表数据包含所有记录（包括已删除的），防止做假账
+    today = timezone.localdate()
+    series = timeseries.aggregate(
+        'day', today - timedelta(days=days - 1), today,
+        dimension='type', filters={'operation_type__in': ['in', 'out']}, keys=['in', 'out'],
+    )
+    trend_data = [
+        {'date': label, 'inbound': inbound, 'outbound': outbound}
+        for label, inbound, outbound in zip(series.labels, series.series('in'), series.series('out'))
+    ]
+
+    # 类别分布（?category_tree= 时按该类别的直接子类别汇总）
+    category_distribution = get_category_distribution(category_root, limit=10)
+
+    # 仓库使用情况 - 使用annotate预计算避免N+1
+    warehouses = Warehouse.objects.filter(is_active=True).annotate(
+        _current_usage=Coalesce(Sum('balances__quantity'), Value(0))
+    )
+    warehouse_usage = []
+    for warehouse in warehouses:
+        usage = warehouse._current_usage
+        usage_rate = round(usage / warehouse.capacity * 100, 2) if warehouse.capacity > 0 else 0
+        warehouse_usage.append({
+            'name': warehouse.name,
+            'code': warehouse.code,
+            'capacity': warehouse.capacity,
+            'current_usage': usage,
+            'usage_rate': usage_rate,
+        })
+
+    # 供应商供货排行
+    supplier_ranking = list(
+        Item.objects.values('supplier__name')
+        .annotate(item_count=Count('id'))
+        .order_by('-item_count')[:10]
+    )
+
+    return {
+        'trend': trend_data,
+        'category_distribution': category_distribution,
+        'warehouse_usage': warehouse_usage,
+        'supplier_ranking': supplier_ranking,
+    }
+
+
+@register(
+    'activities',
+    models=('operations.inventoryoperation', 'inventory.item'),
+    timeout=None, params={'limit': (int, 10)}, cached=False,
+)
+def build_activities(request, limit):
+    """最近活动：读取写入时维护的活动 Feed（一次缓存读取，见 apps.operations.activity_feed）"""
+    return [
+        {**entry, 'item_image': request.build_absolute_uri(entry['item_image']) if entry['item_image'] else None}
+        for entry in activity_feed.recent(limit)
+    ]
+
+
+@register(
+    'low_stock',
+    models=('inventory.item', 'inventory.category', 'warehouses.warehouse'),
+    timeout=30,
+)
+def build_low_stock(request):
+    """低库存物品"""
+    # 命中部分索引 items_low_stock_idx（只含低库存行，已按 stock 排序）
+    items = Item.objects.low_stock().select_related('category', 'warehouse').only(
+        'id', 'name', 'code', 'image', 'stock', 'min_stock', 'status', 'updated_at',
+        'category__name', 'warehouse__name'
+    ).order_by('stock')[:20]
+
+    low_stock_items = []
+    for item in items:
+        # 获取物品图片URL
+        item_image = None
+        if item.image:
+            item_image = request.build_absolute_uri(item.image.url)
+
+        low_stock_items.append({
+            'id': item.id,
+            'name': item.name,
+            'code': item.code,
+            'image': item_image,
+            'category': item.category.name if item.category else '-',
+            'warehouse': item.warehouse.name if item.warehouse else '-',
+            'stock': item.stock,
+            'min_stock': item.min_stock,
+            'status': item.status,
+            'status_display': item.get_status_display(),
+            'updated_at': item.updated_at.isoformat() if item.updated_at else None,
+        })
+
+    return low_stock_items
+
+
+# 趋势周期 -> (时间桶粒度, 最近几个桶)
+TREND_PERIODS = {'month': ('month', 6), 'quarter': ('quarter', 4), 'year': ('year', 3)}
+
+
+@register(
+    'trend',
+    models=('operations.inventoryoperation',),
+    timeout=60, params={'period': (str, 'month')}, etag_extra=_daily,
+)
+def build_trend(request, period):
+    """库存趋势数据
+
+    注意：报表趋势数据包含所有记录（包括已删除的），防止通过删除记录做假账
+    """
+    if period not in TREND_PERIODS:
+        raise ValidationError({'period': f"无效的周期，可选值：{', '.join(TREND_PERIODS)}"})
+    granularity, count = TREND_PERIODS[period]
+    start, end = timeseries.last_buckets(granularity, count)
+    # 统计操作次数（count）而不是数量（sum），与卡片数据保持一致
+    series = timeseries.aggregate(
+        granularity, start, end,
+        dimension='type', filters={'operation_type__in': ['in', 'out']}, keys=['in', 'out'],
+    )
+    return {
+        'labels': series.labels,
+        'inbound': series.series('in'),
+        'outbound': series.series('out'),
+    }
+
+
+@register(
+    'distribution',
+    models=('inventory.item', 'inventory.category'),
+    timeout=60, params={'category_tree': (int, None)},
+)
+def build_distribution(request, category_tree):
+    """库存类别分布"""
+    # 使用单次聚合查询代替循环查询（?category_tree= 时按该类别的直接子类别汇总）
+    category_stats = get_category_distribution(get_category(category_tree))
+
+    return {
+        'labels': [stat['category__name'] or '未分类' for stat in category_stats],
+        'values': [stat['count'] for stat in category_stats],
+    }
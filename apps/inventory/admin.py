@@ -2,7 +2,7 @@
 库存管理管理后台
 """
 from django.contrib import admin
-from .models import Category, Item
+from .models import Category, Item, ItemStock
 
 
 @admin.register(Category)
@@ -42,3 +42,31 @@ class ItemAdmin(admin.ModelAdmin):
     def total_value(self, obj):
         return f"¥{obj.total_value:,.2f}"
     total_value.short_description = '库存总价值'
+    
+    def save_model(self, request, obj, form, change):
+        """修改库存数量按盘点调整处理，同步更新各位置余额"""
+        from .stock import adjust
+        
+        if change and 'stock' in form.changed_data:
+            stock = obj.stock
+            obj.stock = Item.objects.values_list('stock', flat=True).get(pk=obj.pk)
+            super().save_model(request, obj, form, change)
+            adjust(obj, stock)
+        else:
+            super().save_model(request, obj, form, change)
+
+
+@admin.register(ItemStock)
+class ItemStockAdmin(admin.ModelAdmin):
+    """库存余额（只读，库存变动请通过出入库操作完成）"""
+    list_display = ['item', 'warehouse', 'bin', 'quantity', 'updated_at']
+    list_filter = ['warehouse']
+    search_fields = ['item__name', 'item__code', 'bin']
+    list_select_related = ['item', 'warehouse']
+    raw_id_fields = ['item', 'warehouse']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
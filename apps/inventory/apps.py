@@ -5,3 +5,6 @@ class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.inventory'
     verbose_name = '库存管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
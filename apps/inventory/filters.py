@@ -0,0 +1,21 @@
+"""
+库存管理过滤器
+"""
+import django_filters
+
+from .models import Item
+
+
+class ItemFilter(django_filters.FilterSet):
+    """物品过滤器
+
+    category_tree：按类别子树过滤（包含所有下级类别），基于物化路径的一次索引前缀匹配。
+    """
+    category_tree = django_filters.NumberFilter(method='filter_category_tree', label='类别（含子类别）')
+    
+    class Meta:
+        model = Item
+        fields = ['category', 'supplier', 'warehouse', 'status', 'code', 'barcode']
+    
+    def filter_category_tree(self, queryset, name, value):
+        return queryset.in_category_tree(int(value))
@@ -0,0 +1,91 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:43
+
+from django.db import migrations, models
+
+# 注意：SQLite 重建 items 表（部分 AlterField/RemoveField）时触发器会随旧表一起删除，
+# 之后修改 items 表结构的迁移需要调用 install_status_trigger 重新安装。
+
+STATUS_EXPRESSION = (
+    "CASE WHEN {row}stock <= 0 THEN 'out_of_stock' "
+    "WHEN {row}stock <= {row}min_stock THEN 'low_stock' "
+    "ELSE 'normal' END"
+)
+
+SQLITE_FORWARD = [
+    f"""
+    CREATE TRIGGER items_status_after_insert AFTER INSERT ON items
+    WHEN NEW.status IS NOT ({STATUS_EXPRESSION.format(row='NEW.')})
+    BEGIN
+        UPDATE items SET status = {STATUS_EXPRESSION.format(row='NEW.')} WHERE id = NEW.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER items_status_after_update AFTER UPDATE OF stock, min_stock, status ON items
+    WHEN NEW.status IS NOT ({STATUS_EXPRESSION.format(row='NEW.')})
+    BEGIN
+        UPDATE items SET status = {STATUS_EXPRESSION.format(row='NEW.')} WHERE id = NEW.id;
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS items_status_after_insert",
+    "DROP TRIGGER IF EXISTS items_status_after_update",
+]
+
+POSTGRESQL_FORWARD = [
+    f"""
+    CREATE OR REPLACE FUNCTION items_compute_status() RETURNS trigger AS $$
+    BEGIN
+        NEW.status := {STATUS_EXPRESSION.format(row='NEW.')};
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER items_status_trigger
+    BEFORE INSERT OR UPDATE OF stock, min_stock, status ON items
+    FOR EACH ROW EXECUTE PROCEDURE items_compute_status()
+    """,
+]
+POSTGRESQL_BACKWARD = [
+    "DROP TRIGGER IF EXISTS items_status_trigger ON items",
+    "DROP FUNCTION IF EXISTS items_compute_status()",
+]
+
+BACKFILL = f"UPDATE items SET status = {STATUS_EXPRESSION.format(row='')}"
+
+
+def install_status_trigger(apps, schema_editor):
+    """由数据库维护 items.status，QuerySet.update()/F() 批量更新也不会导致状态过期"""
+    vendor = schema_editor.connection.vendor
+    statements = {
+        'sqlite': SQLITE_FORWARD,
+        'postgresql': POSTGRESQL_FORWARD,
+    }.get(vendor)
+    if statements is None:
+        # 其他数据库仍由 Item.save() 计算状态
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+    schema_editor.execute(BACKFILL)
+
+
+def remove_status_trigger(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in {'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD}.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_item_items_name_dd4454_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_status_trigger, remove_status_trigger),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('status__in', ['low_stock', 'out_of_stock'])), fields=['stock'], name='items_low_stock_idx'),
+        ),
+    ]
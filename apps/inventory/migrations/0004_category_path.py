@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:51
+
+from django.db import migrations, models
+
+PATH_SEGMENT_WIDTH = 8
+
+
+def build_category_paths(apps, schema_editor):
+    """为已有类别计算物化路径（按层级自上而下）"""
+    Category = apps.get_model('inventory', 'Category')
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    paths = {}
+
+    def resolve(pk, seen=()):
+        if pk not in paths:
+            parent_id = parents[pk]
+            if parent_id is None or parent_id in seen or parent_id not in parents:
+                # 孤立或循环引用的类别作为根节点
+                prefix = ''
+            else:
+                prefix = resolve(parent_id, seen + (pk,))
+            paths[pk] = f'{prefix}{pk:0{PATH_SEGMENT_WIDTH}d}/'
+        return paths[pk]
+
+    categories = list(Category.objects.only('id'))
+    for category in categories:
+        category.path = resolve(category.id)
+        category.depth = len(category.path) // (PATH_SEGMENT_WIDTH + 1) - 1
+    Category.objects.bulk_update(categories, ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_item_status_trigger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='层级'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255, verbose_name='路径'),
+        ),
+        migrations.RunPython(build_category_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_balances(apps, schema_editor):
+    """把已有物品的库存作为其默认仓库（仓位）的余额"""
+    Item = apps.get_model('inventory', 'Item')
+    ItemStock = apps.get_model('inventory', 'ItemStock')
+    batch = []
+    rows = Item.objects.exclude(stock=0).values_list('id', 'warehouse_id', 'warehouse_location', 'stock')
+    for item_id, warehouse_id, bin, quantity in rows.iterator(chunk_size=2000):
+        batch.append(ItemStock(item_id=item_id, warehouse_id=warehouse_id, bin=bin, quantity=quantity))
+        if len(batch) >= 2000:
+            ItemStock.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ItemStock.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouses', '0003_warehouse_warehouses_is_acti_178fdd_idx_and_more'),
+        ('inventory', '0004_category_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bin', models.CharField(blank=True, default='', max_length=100, verbose_name='仓位')),
+                ('quantity', models.IntegerField(default=0, verbose_name='数量')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='inventory.item', verbose_name='物品')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='warehouses.warehouse', verbose_name='仓库')),
+            ],
+            options={
+                'verbose_name': '库存余额',
+                'verbose_name_plural': '库存余额',
+                'db_table': 'item_stocks',
+                'ordering': ['item', 'warehouse', 'bin'],
+                'indexes': [models.Index(fields=['warehouse', 'quantity'], name='item_stocks_wh_qty_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='itemstock',
+            constraint=models.UniqueConstraint(fields=('item', 'warehouse', 'bin'), name='item_stocks_location_uniq'),
+        ),
+        migrations.RunPython(create_balances, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,25 @@
 """
 库存管理模型
 """
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
 from django.conf import settings
 
+from common.cache_versions import bump_version_on_commit
+from common.transactions import immediate_atomic
+
 
 class Category(models.Model):
-    """物品类别"""
+    """物品类别
+
+    path 为物化路径：从根到自身每级一个定宽的 ID 段（如 00000001/00000005/），
+    保存、移动时自动维护。查询子树只需 path__startswith，一次索引范围扫描即可完成。
+    """
+    PATH_SEGMENT_WIDTH = 8
+    PATH_STEP = PATH_SEGMENT_WIDTH + 1
+    
     name = models.CharField('类别名称', max_length=100, unique=True)
     code = models.CharField('类别编码', max_length=50, unique=True)
     description = models.TextField('描述', blank=True)
@@ -18,6 +31,8 @@ class Category(models.Model):
         related_name='children',
         verbose_name='父类别'
     )
+    path = models.CharField('路径', max_length=255, blank=True, default='', editable=False, db_index=True)
+    depth = models.PositiveSmallIntegerField('层级', default=0, editable=False)
     is_active = models.BooleanField('是否启用', default=True)
     created_at = models.DateTimeField('创建时间', auto_now_add=True)
     updated_at = models.DateTimeField('更新时间', auto_now=True)
@@ -31,12 +46,82 @@ class Category(models.Model):
     def __str__(self):
         return self.name
     
+    @classmethod
+    def build_path(cls, parent_path, pk):
+        return f'{parent_path}{pk:0{cls.PATH_SEGMENT_WIDTH}d}/'
+    
+    def save(self, *args, **kwargs):
+        """保存时维护物化路径，移动类别时一条 UPDATE 同步整棵子树"""
+        with immediate_atomic():
+            paths = dict(
+                Category.objects.filter(pk__in=[pk for pk in (self.pk, self.parent_id) if pk])
+                .values_list('pk', 'path')
+            )
+            previous_path = paths.get(self.pk) if self.pk else None
+            parent_path = paths.get(self.parent_id, '') if self.parent_id else ''
+            if previous_path and parent_path.startswith(previous_path):
+                raise ValidationError({'parent': '不能将类别移动到自身或其子类别下'})
+            if previous_path:
+                # 实例可能在祖先移动之前加载，以数据库中的路径为准
+                self.path = previous_path
+                self.depth = len(previous_path) // self.PATH_STEP - 1
+            
+            super().save(*args, **kwargs)
+            
+            path = self.build_path(parent_path, self.pk)
+            depth = len(parent_path) // self.PATH_STEP
+            if previous_path != path:
+                if previous_path:
+                    Category.objects.filter(path__startswith=previous_path).update(
+                        path=Concat(Value(path), Substr('path', len(previous_path) + 1)),
+                        depth=F('depth') + (depth - (len(previous_path) // self.PATH_STEP - 1)),
+                    )
+                else:
+                    Category.objects.filter(pk=self.pk).update(path=path, depth=depth)
+            self.path, self.depth = path, depth
+    
+    def get_descendants(self, include_self=True):
+        """子树中的所有类别"""
+        queryset = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+    
     @property
     def item_count(self):
-        """物品数量"""
+        """物品数量（列表接口通过 items_total 注解批量计算，未注解时单独计数）"""
+        if hasattr(self, 'items_total'):
+            return self.items_total
         return self.items.count()
 
 
+class ItemQuerySet(models.QuerySet):
+    """物品查询集"""
+    
+    def in_category_tree(self, category):
+        """属于该类别及其所有子类别的物品（category 可以是实例或主键）"""
+        if isinstance(category, Category):
+            path = category.path
+        else:
+            path = Category.objects.filter(pk=category).values_list('path', flat=True).first()
+        if not path:
+            return self.none()
+        return self.filter(category__path__startswith=path)
+    
+    def low_stock(self):
+        """低库存/缺货物品（条件与部分索引 items_low_stock_idx 完全一致）"""
+        return self.filter(status__in=Item.LOW_STOCK_STATUSES)
+    
+    def update(self, **kwargs):
+        """批量更新（含 F() 库存变更、bulk_update）后同样递增缓存版本号
+
+        status 由数据库触发器根据 stock/min_stock 维护，批量更新不会导致状态过期。
+        """
+        rows = super().update(**kwargs)
+        bump_version_on_commit('inventory.item')
+        return rows
+
+
 class Item(models.Model):
     """库存物品"""
     STATUS_CHOICES = [
@@ -45,6 +130,7 @@ class Item(models.Model):
         ('out_of_stock', '缺货'),
         ('discontinued', '停产'),
     ]
+    LOW_STOCK_STATUSES = ['low_stock', 'out_of_stock']
     
     name = models.CharField('物品名称', max_length=200)
     code = models.CharField('物品编码', max_length=100, unique=True)
@@ -103,6 +189,8 @@ class Item(models.Model):
     created_at = models.DateTimeField('创建时间', auto_now_add=True)
     updated_at = models.DateTimeField('更新时间', auto_now=True)
     
+    objects = ItemQuerySet.as_manager()
+    
     class Meta:
         db_table = 'items'
         verbose_name = '物品'
@@ -116,22 +204,83 @@ class Item(models.Model):
             models.Index(fields=['category']),  # 外键查询优化
             models.Index(fields=['warehouse']),  # 外键查询优化
             models.Index(fields=['created_at']),  # 排序优化
+            # 部分索引：只包含低库存/缺货物品，按库存排序，低库存页面与目录规模无关
+            models.Index(
+                fields=['stock'],
+                name='items_low_stock_idx',
+                condition=models.Q(status__in=['low_stock', 'out_of_stock']),
+            ),
         ]
     
     def __str__(self):
         return f"{self.name} ({self.code})"
     
+    @staticmethod
+    def compute_status(stock, min_stock):
+        """根据库存计算状态
+
+        数据库触发器（见迁移 0003_item_status_trigger）使用相同规则维护 status 列，
+        这里仅用于让内存中的实例与数据库保持一致。
+        """
+        if stock <= 0:
+            return 'out_of_stock'
+        if stock <= min_stock:
+            return 'low_stock'
+        return 'normal'
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录加载时的状态，保存后用于检测状态变化（见 apps.alerts.signals）
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+    
     def save(self, *args, **kwargs):
         """保存时自动更新状态"""
-        if self.stock <= 0:
-            self.status = 'out_of_stock'
-        elif self.stock <= self.min_stock:
-            self.status = 'low_stock'
-        else:
-            self.status = 'normal'
+        self.status = self.compute_status(self.stock, self.min_stock)
         super().save(*args, **kwargs)
     
     @property
     def total_value(self):
         """库存总价值"""
         return self.stock * self.price
+
+
+class ItemStock(models.Model):
+    """库存余额（物品 × 仓库 × 仓位）
+
+    Item.stock 是各位置余额的合计。所有库存变动都通过 apps.inventory.stock 中的服务函数完成，
+    在同一事务内同时更新余额行和物品合计。
+    """
+    item = models.ForeignKey(
+        Item,
+        on_delete=models.CASCADE,
+        related_name='balances',
+        verbose_name='物品'
+    )
+    warehouse = models.ForeignKey(
+        'warehouses.Warehouse',
+        on_delete=models.CASCADE,
+        related_name='balances',
+        verbose_name='仓库'
+    )
+    bin = models.CharField('仓位', max_length=100, blank=True, default='')
+    quantity = models.IntegerField('数量', default=0)
+    updated_at = models.DateTimeField('更新时间', auto_now=True)
+    
+    class Meta:
+        db_table = 'item_stocks'
+        verbose_name = '库存余额'
+        verbose_name_plural = '库存余额'
+        ordering = ['item', 'warehouse', 'bin']
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'warehouse', 'bin'], name='item_stocks_location_uniq'),
+        ]
+        indexes = [
+            # 仓库使用量汇总可直接在索引上完成
+            models.Index(fields=['warehouse', 'quantity'], name='item_stocks_wh_qty_idx'),
+        ]
+    
+    def __str__(self):
+        location = f"{self.warehouse_id}/{self.bin}" if self.bin else f"{self.warehouse_id}"
+        return f"{self.item_id} @ {location}: {self.quantity}"
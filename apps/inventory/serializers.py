@@ -1,22 +1,36 @@
 """
 库存管理序列化器
 """
+import operator
 import uuid
 from datetime import datetime
 from rest_framework import serializers
-from .models import Category, Item
+from common.fast_serializers import Computed, MediaURL
+from common.serializers import SparseFieldsMixin
+from common.transactions import immediate_atomic
+from .models import Category, Item, ItemStock
 from apps.suppliers.serializers import SupplierListSerializer
 from apps.warehouses.serializers import WarehouseListSerializer
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """类别序列化器"""
     item_count = serializers.ReadOnlyField()
     
     class Meta:
         model = Category
-        fields = ['id', 'name', 'code', 'description', 'parent', 'is_active', 'item_count', 'created_at', 'updated_at']
-        read_only_fields = ['created_at', 'updated_at']
+        fields = [
+            'id', 'name', 'code', 'description', 'parent', 'path', 'depth',
+            'is_active', 'item_count', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['path', 'depth', 'created_at', 'updated_at']
+        sparse_sources = {'item_count': []}
+    
+    def validate_parent(self, value):
+        """不允许移动到自身或其子类别下"""
+        if value and self.instance and value.path.startswith(self.instance.path):
+            raise serializers.ValidationError("不能将类别移动到自身或其子类别下")
+        return value
 
 
 class ItemSerializer(serializers.ModelSerializer):
@@ -58,28 +72,22 @@ class ItemSerializer(serializers.ModelSerializer):
     
     def validate(self, attrs):
         """验证物品数据，包括仓库容量"""
-        from apps.warehouses.models import Warehouse
+        from .stock import capacity_error, home_balance
         
-        warehouse = attrs.get('warehouse')
-        stock = attrs.get('stock', 0)
+        warehouse = attrs.get('warehouse') or (self.instance.warehouse if self.instance else None)
+        stock = attrs.get('stock')
         
-        # 验证仓库容量
-        if warehouse and stock > 0 and warehouse.capacity > 0:
-            # 计算当前仓库使用量
-            current_usage = warehouse.current_usage
-            
-            # 如果是更新操作且物品在同一仓库，需要排除当前物品的库存
-            if self.instance and self.instance.warehouse_id == warehouse.id:
-                current_usage -= self.instance.stock
-            
-            # 计算添加后的使用量
-            new_usage = current_usage + stock
-            available = warehouse.capacity - current_usage
-            
-            if new_usage > warehouse.capacity:
-                raise serializers.ValidationError({
-                    'stock': f"仓库容量不足！仓库「{warehouse.name}」容量：{warehouse.capacity}，已使用：{current_usage}，可用：{max(0, available)}，需要：{stock}"
-                })
+        # 新增的库存计入默认仓库，只需检查增加的部分；更换默认仓库时原默认仓库的余额一并移入
+        increase = 0
+        if stock is not None:
+            increase = stock - (self.instance.stock if self.instance else 0)
+        moving = self.instance is not None and warehouse and warehouse.pk != self.instance.warehouse_id
+        if moving:
+            increase += home_balance(self.instance)
+        if warehouse and (stock is not None or moving):
+            error = capacity_error(warehouse, increase)
+            if error:
+                raise serializers.ValidationError({'warehouse' if moving else 'stock': error})
         
         return attrs
     
@@ -99,6 +107,23 @@ class ItemSerializer(serializers.ModelSerializer):
         
         return super().create(validated_data)
     
+    def update(self, instance, validated_data):
+        """库存数量的修改按盘点调整处理，同步更新各位置余额
+
+        更换默认仓库时，原默认仓库中的余额随物品移入新默认仓库（其他仓库的余额不变）。
+        """
+        from .stock import adjust, rehome
+        
+        stock = validated_data.pop('stock', None)
+        previous_warehouse_id = instance.warehouse_id
+        with immediate_atomic():
+            instance = super().update(instance, validated_data)
+            if instance.warehouse_id != previous_warehouse_id:
+                rehome(instance, previous_warehouse_id)
+            if stock is not None and stock != instance.stock:
+                adjust(instance, stock)
+        return instance
+    
     def generate_unique_code(self):
         """生成唯一物品编码: ITEM-YYYYMMDD-XXXX"""
         date_str = datetime.now().strftime('%Y%m%d')
@@ -107,7 +132,7 @@ class ItemSerializer(serializers.ModelSerializer):
         return f"ITEM-{date_str}-{unique_id}"
 
 
-class ItemListSerializer(serializers.ModelSerializer):
+class ItemListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """物品列表序列化器（简化版）"""
     category_name = serializers.CharField(source='category.name', read_only=True)
     supplier_name = serializers.CharField(source='supplier.name', read_only=True)
@@ -123,6 +148,15 @@ class ItemListSerializer(serializers.ModelSerializer):
             'warehouse', 'warehouse_name', 'price', 'stock', 'min_stock',
             'warehouse_location', 'image', 'status', 'status_display', 'total_value'
         ]
+        sparse_sources = {
+            'image': ['image'],
+            'total_value': ['stock', 'price'],
+        }
+        # 列表快速路径的取值方式（见 common.fast_serializers）
+        fast_fields = {
+            'image': MediaURL('image'),
+            'total_value': Computed(['stock', 'price'], operator.mul),
+        }
     
     def get_image(self, obj):
         """获取物品图片完整URL"""
@@ -134,6 +168,21 @@ class ItemListSerializer(serializers.ModelSerializer):
         return None
 
 
+class ItemStockSerializer(serializers.ModelSerializer):
+    """库存余额序列化器"""
+    item_name = serializers.CharField(source='item.name', read_only=True)
+    item_code = serializers.CharField(source='item.code', read_only=True)
+    item_status = serializers.CharField(source='item.status', read_only=True)
+    warehouse_name = serializers.CharField(source='warehouse.name', read_only=True)
+    
+    class Meta:
+        model = ItemStock
+        fields = [
+            'id', 'item', 'item_name', 'item_code', 'item_status',
+            'warehouse', 'warehouse_name', 'bin', 'quantity', 'updated_at'
+        ]
+
+
 class ItemDetailSerializer(serializers.ModelSerializer):
     """物品详情序列化器"""
     category = CategorySerializer(read_only=True)
@@ -142,6 +191,7 @@ class ItemDetailSerializer(serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     total_value = serializers.ReadOnlyField()
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
+    balances = serializers.SerializerMethodField()
     
     class Meta:
         model = Item
@@ -149,5 +199,13 @@ class ItemDetailSerializer(serializers.ModelSerializer):
             'id', 'name', 'code', 'barcode', 'category', 'supplier',
             'warehouse', 'price', 'stock', 'min_stock', 'warehouse_location',
             'description', 'image', 'status', 'status_display',
-            'total_value', 'created_by_name', 'created_at', 'updated_at'
+            'total_value', 'balances', 'created_by_name', 'created_at', 'updated_at'
         ]
+    
+    def get_balances(self, obj):
+        """各仓库/仓位的库存分布"""
+        return list(
+            obj.balances.filter(quantity__gt=0).order_by('warehouse_id', 'bin').values(
+                'warehouse', 'warehouse__name', 'bin', 'quantity'
+            )
+        )
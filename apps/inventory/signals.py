@@ -0,0 +1,22 @@
+"""
+库存管理信号
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from common.cache_versions import track_model_versions
+from common.refdata import track_reference_data
+from .models import Category, Item
+from .stock import initialize_balance
+
+# 数据变化时递增缓存版本号（ETag、仪表盘缓存依赖）
+track_model_versions(Category, Item)
+# 进程内引用数据缓存（下拉框、类别列表），见 common.refdata
+track_reference_data(Category)
+
+
+@receiver(post_save, sender=Item, dispatch_uid='inventory_initialize_balance')
+def create_initial_balance(sender, instance, created, raw=False, **kwargs):
+    """新建物品时把初始库存记入默认仓库的余额"""
+    if created and not raw:
+        initialize_balance(instance)
@@ -0,0 +1,183 @@
+"""
+库存变动服务
+
+所有库存数量的变化（入库、出库、调拨、调整）都通过这里完成：
+先锁定物品行，再用条件 F() 更新对应的余额行（ItemStock），最后更新物品合计（Item.stock）。
+余额扣减使用 quantity >= 数量 作为更新条件，任何数据库上都不会出现负库存。
+物品状态由数据库触发器维护，状态变化在同一事务内写入预警发件箱。
+"""
+from django.db.models import F, Sum
+
+from common.cache_versions import bump_version_on_commit
+from common.exceptions import BusinessException
+from common.transactions import immediate_atomic
+from .models import Item, ItemStock
+
+
+def warehouse_usage(warehouse_id):
+    """仓库当前使用量（余额表索引汇总）"""
+    total = ItemStock.objects.filter(warehouse_id=warehouse_id).aggregate(total=Sum('quantity'))['total']
+    return total or 0
+
+
+def capacity_error(warehouse, quantity):
+    """检查仓库剩余容量，容量不足时返回错误信息，否则返回 None"""
+    if warehouse.capacity <= 0 or quantity <= 0:
+        return None
+    usage = warehouse_usage(warehouse.pk)
+    if usage + quantity <= warehouse.capacity:
+        return None
+    return (
+        f"仓库容量不足！仓库「{warehouse.name}」容量：{warehouse.capacity}，"
+        f"已使用：{usage}，可用：{max(0, warehouse.capacity - usage)}，需要：{quantity}"
+    )
+
+
+def _lock_item(item):
+    return Item.objects.select_for_update().only(
+        'id', 'stock', 'min_stock', 'status', 'warehouse_id', 'warehouse_location'
+    ).get(pk=item.pk)
+
+
+def _default_bin(item, warehouse_id):
+    # 物品默认仓库沿用物品上登记的仓位
+    return item.warehouse_location if warehouse_id == item.warehouse_id else ''
+
+
+def _add(item, warehouse_id, bin, quantity):
+    balance, _created = ItemStock.objects.get_or_create(
+        item_id=item.pk, warehouse_id=warehouse_id, bin=bin
+    )
+    ItemStock.objects.filter(pk=balance.pk).update(quantity=F('quantity') + quantity)
+
+
+def _take(item, quantity, warehouse_id=None, bin=None):
+    """从余额中扣减；未指定仓库时先扣默认仓库，再按余额从多到少扣其他位置
+
+    返回扣减数量最多的仓库 ID（出库记录的发生仓库）。
+    """
+    balances = ItemStock.objects.select_for_update().filter(item_id=item.pk, quantity__gt=0)
+    if warehouse_id is not None:
+        balances = balances.filter(warehouse_id=warehouse_id)
+        if bin is not None:
+            balances = balances.filter(bin=bin)
+    balances = sorted(
+        balances.only('id', 'warehouse_id', 'quantity'),
+        key=lambda b: (b.warehouse_id != item.warehouse_id, -b.quantity),
+    )
+
+    available = sum(balance.quantity for balance in balances)
+    if available < quantity:
+        raise BusinessException(f"库存不足，可用库存：{available}")
+
+    remaining = quantity
+    taken_by_warehouse = {}
+    for balance in balances:
+        if not remaining:
+            break
+        taken = min(balance.quantity, remaining)
+        updated = ItemStock.objects.filter(pk=balance.pk, quantity__gte=taken).update(
+            quantity=F('quantity') - taken
+        )
+        if not updated:
+            # 并发扣减导致余额不足，整个事务回滚
+            raise BusinessException("库存已被其他操作占用，请重试")
+        remaining -= taken
+        taken_by_warehouse[balance.warehouse_id] = taken_by_warehouse.get(balance.warehouse_id, 0) + taken
+    return max(taken_by_warehouse, key=taken_by_warehouse.get, default=warehouse_id)
+
+
+def _finish(item, locked, delta):
+    """更新物品合计、同步调用方实例并记录状态变化，返回 (变动前合计, 变动后合计)"""
+    from apps.alerts.services import record_status_change
+
+    before = locked.stock
+    if delta:
+        Item.objects.filter(pk=item.pk).update(stock=F('stock') + delta)
+        locked.refresh_from_db(fields=['stock', 'status'])
+        record_status_change(locked, locked._loaded_status)
+    else:
+        # 调拨不改变合计，但各仓库余额变化同样需要使依赖物品数据的缓存失效
+        bump_version_on_commit('inventory.item')
+    item.stock, item.status = locked.stock, locked.status
+    item._loaded_status = locked.status
+    return before, locked.stock
+
+
+@immediate_atomic
+def receive(item, warehouse, quantity, bin=None):
+    """入库到指定仓库（仓位）"""
+    locked = _lock_item(item)
+    if bin is None:
+        bin = _default_bin(locked, warehouse.pk)
+    _add(locked, warehouse.pk, bin, quantity)
+    return _finish(item, locked, quantity)
+
+
+@immediate_atomic
+def issue(item, quantity, warehouse=None, bin=None):
+    """出库；未指定仓库时从默认仓库优先扣减
+
+    返回 (变动前合计, 变动后合计, 发货仓库 ID)，发货仓库为扣减数量最多的仓库。
+    """
+    locked = _lock_item(item)
+    source_id = _take(locked, quantity, warehouse.pk if warehouse else None, bin)
+    return (*_finish(item, locked, -quantity), source_id)
+
+
+@immediate_atomic
+def transfer(item, quantity, from_warehouse, to_warehouse, from_bin=None, to_bin=None):
+    """在两个位置之间调拨指定数量，物品合计不变"""
+    locked = _lock_item(item)
+    _take(locked, quantity, from_warehouse.pk, from_bin)
+    if to_bin is None:
+        to_bin = _default_bin(locked, to_warehouse.pk)
+    _add(locked, to_warehouse.pk, to_bin, quantity)
+    return _finish(item, locked, 0)
+
+
+@immediate_atomic
+def rehome(item, previous_warehouse_id):
+    """物品默认仓库变更后，把原默认仓库中的余额（各仓位合并）移入新默认仓库的登记仓位，物品合计不变"""
+    locked = _lock_item(item)
+    if previous_warehouse_id == locked.warehouse_id:
+        return _finish(item, locked, 0)
+    balances = ItemStock.objects.select_for_update().filter(
+        item_id=item.pk, warehouse_id=previous_warehouse_id
+    )
+    quantity = sum(balances.values_list('quantity', flat=True))
+    balances.delete()
+    if quantity:
+        _add(locked, locked.warehouse_id, locked.warehouse_location, quantity)
+    return _finish(item, locked, 0)
+
+
+def home_balance(item):
+    """物品在默认仓库中的余额合计（变更默认仓库时需要移动的数量）"""
+    total = ItemStock.objects.filter(item_id=item.pk, warehouse_id=item.warehouse_id).aggregate(
+        total=Sum('quantity')
+    )['total']
+    return total or 0
+
+
+@immediate_atomic
+def adjust(item, quantity):
+    """盘点调整：将物品合计设置为 quantity，差额计入（或扣自）默认仓库"""
+    locked = _lock_item(item)
+    delta = quantity - locked.stock
+    if delta > 0:
+        _add(locked, locked.warehouse_id, locked.warehouse_location, delta)
+    elif delta < 0:
+        _take(locked, -delta)
+    return _finish(item, locked, delta)
+
+
+def initialize_balance(item):
+    """新建物品的初始库存记入默认仓库"""
+    if item.stock:
+        ItemStock.objects.get_or_create(
+            item_id=item.pk,
+            warehouse_id=item.warehouse_id,
+            bin=item.warehouse_location,
+            defaults={'quantity': item.stock},
+        )
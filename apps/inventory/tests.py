@@ -1,6 +1,216 @@
 """
 库存管理测试
 """
-from django.test import TestCase
+from django.core.exceptions import ValidationError
+from django.db.models import F, Sum
 
-# 在这里编写你的测试用例
+from apps.operations.models import InventoryOperation
+from apps.warehouses.models import Warehouse
+from common.exceptions import BusinessException
+from common.testing import ApiBudgetTestCase
+
+from . import stock
+from .models import Category, Item, ItemStock
+
+
+class InventoryQueryBudgetTests(ApiBudgetTestCase):
+    """类别、物品接口在多行数据下不超出查询预算"""
+
+    def test_endpoints_declare_budget(self):
+        self.assertEndpointsBudgeted('api/inventory/')
+
+    def test_category_endpoints(self):
+        root = self.root.pk
+        self.assertOk(self.client.get('/api/inventory/categories/'))
+        self.assertOk(self.client.get('/api/inventory/categories/tree/'))
+        self.assertOk(self.client.get(f'/api/inventory/categories/{root}/'))
+        created = self.assertOk(self.client.post('/api/inventory/categories/', {
+            'name': '新类别', 'code': 'NEW', 'parent': root,
+        }, format='json'))
+        self.assertOk(self.client.patch(
+            f'/api/inventory/categories/{self.categories[0].pk}/', {'description': '说明'}, format='json'
+        ))
+        self.assertOk(self.client.delete(f"/api/inventory/categories/{created.json()['data']['id']}/"))
+
+    def test_item_endpoints(self):
+        item = self.items[0]
+        response = self.assertOk(self.client.get('/api/inventory/items/'))
+        self.assertEqual(response.json()['data']['count'], self.ITEM_COUNT)
+        self.assertOk(self.client.get('/api/inventory/items/?search=ITEM'))
+        self.assertOk(self.client.get(f'/api/inventory/items/?category_tree={self.root.pk}'))
+        self.assertOk(self.client.get('/api/inventory/items/low_stock/'))
+        self.assertOk(self.client.get('/api/inventory/items/statistics/'))
+        self.assertOk(self.client.get(f'/api/inventory/items/{item.pk}/'))
+        created = self.assertOk(self.client.post('/api/inventory/items/', {
+            'name': '新物品', 'code': 'ITEM-NEW', 'category': self.categories[0].pk,
+            'warehouse': self.warehouses[0].pk, 'price': '1.00', 'stock': 3,
+        }, format='json'))
+        self.assertOk(self.client.patch(f'/api/inventory/items/{item.pk}/', {'name': '改名'}, format='json'))
+        self.assertOk(self.client.delete(f"/api/inventory/items/{created.json()['data']['id']}/"))
+
+
+class ItemStatusTriggerTests(ApiBudgetTestCase):
+    """状态由数据库触发器维护：QuerySet.update() 修改库存后状态同样正确"""
+
+    def status(self, item):
+        return Item.objects.values_list('status', flat=True).get(pk=item.pk)
+
+    def test_update_with_f_expression(self):
+        item = self.items[0]  # min_stock = 5
+        Item.objects.filter(pk=item.pk).update(stock=6)
+        self.assertEqual(self.status(item), 'normal')
+        Item.objects.filter(pk=item.pk).update(stock=F('stock') - 1)
+        self.assertEqual(self.status(item), 'low_stock')
+        Item.objects.filter(pk=item.pk).update(stock=F('stock') - 5)
+        self.assertEqual(self.status(item), 'out_of_stock')
+        Item.objects.filter(pk=item.pk).update(stock=F('stock') + 100)
+        self.assertEqual(self.status(item), 'normal')
+        # 只修改阈值同样重新计算
+        Item.objects.filter(pk=item.pk).update(min_stock=1000)
+        self.assertEqual(self.status(item), 'low_stock')
+
+    def test_low_stock_ordered_by_stock(self):
+        Item.objects.filter(pk__in=[item.pk for item in self.items]).update(stock=F('id') % 4)
+        response = self.assertOk(self.client.get('/api/inventory/items/low_stock/'))
+        data = response.json()['data']
+        self.assertEqual(
+            {row['id'] for row in data},
+            set(Item.objects.filter(status__in=Item.LOW_STOCK_STATUSES).values_list('id', flat=True)),
+        )
+        self.assertEqual([row['stock'] for row in data], sorted(row['stock'] for row in data))
+
+
+class CategoryTreeTests(ApiBudgetTestCase):
+    """物化路径的维护与子树查询"""
+
+    def setUp(self):
+        super().setUp()
+        self.child = Category.objects.create(name='子类0-1', code='OFFICE-0-1', parent=self.categories[0])
+        self.grandchild = Category.objects.create(name='子类0-1-1', code='OFFICE-0-1-1', parent=self.child)
+        self.leaf_item = Item.objects.create(
+            name='叶子物品', code='ITEM-LEAF', category=self.grandchild, warehouse=self.warehouses[0],
+            price=1, stock=10, created_by=self.user,
+        )
+
+    def item_ids(self, category):
+        return set(Item.objects.in_category_tree(category).values_list('id', flat=True))
+
+    def test_move_rewrites_subtree(self):
+        moved, target = Category.objects.get(pk=self.categories[0].pk), self.categories[1]
+        moved.parent = target
+        moved.save()
+
+        for category, depth in ((moved, 2), (self.child, 3), (self.grandchild, 4)):
+            category.refresh_from_db()
+            self.assertEqual(category.depth, depth)
+            self.assertTrue(category.path.startswith(target.path + Category.build_path('', moved.pk)))
+        self.assertEqual(self.grandchild.path, Category.build_path(self.child.path, self.grandchild.pk))
+        # 兄弟类别不受影响
+        self.categories[2].refresh_from_db()
+        self.assertEqual(self.categories[2].path, Category.build_path(self.root.path, self.categories[2].pk))
+
+        expected = {item.pk for item in self.items if item.category_id in (moved.pk, target.pk)}
+        self.assertEqual(self.item_ids(target), expected | {self.leaf_item.pk})
+
+    def test_in_category_tree_covers_descendants_only(self):
+        self.assertEqual(self.item_ids(self.child), {self.leaf_item.pk})
+        self.assertEqual(self.item_ids(self.grandchild.pk), {self.leaf_item.pk})
+        self.assertEqual(
+            self.item_ids(self.categories[0]),
+            {item.pk for item in self.items if item.category_id == self.categories[0].pk} | {self.leaf_item.pk},
+        )
+        self.assertEqual(self.item_ids(self.categories[2]), {self.items[2].pk, self.items[5].pk})
+        self.assertEqual(self.item_ids(self.root), {item.pk for item in Item.objects.all()})
+        self.assertEqual(self.item_ids(0), set())
+
+    def test_tree_root_parameter(self):
+        response = self.assertOk(self.client.get(f'/api/inventory/categories/tree/?root={self.child.pk}'))
+        [root] = response.json()['data']
+        self.assertEqual((root['id'], root['item_count']), (self.child.pk, 1))
+        self.assertEqual([child['id'] for child in root['children']], [self.grandchild.pk])
+        self.assertEqual(self.client.get('/api/inventory/categories/tree/?root=abc').status_code, 400)
+        self.assertEqual(self.client.get('/api/inventory/categories/tree/?root=-1').status_code, 400)
+        self.assertEqual(self.client.get('/api/inventory/categories/tree/?root=999999').status_code, 404)
+
+    def test_move_under_descendant_rejected(self):
+        category = Category.objects.get(pk=self.categories[0].pk)
+        paths = dict(Category.objects.values_list('pk', 'path'))
+        for parent in (self.grandchild, category):
+            category.parent = parent
+            with self.assertRaises(ValidationError):
+                category.save()
+        self.assertEqual(dict(Category.objects.values_list('pk', 'path')), paths)
+
+        response = self.client.patch(
+            f'/api/inventory/categories/{category.pk}/', {'parent': self.grandchild.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class StockBalanceTests(ApiBudgetTestCase):
+    """余额行与物品合计保持一致"""
+
+    def setUp(self):
+        super().setUp()
+        # 物品0：默认仓库 0 余额 55，调拨到仓库 1 的余额 2，合计 57
+        self.item = Item.objects.get(pk=self.items[0].pk)
+        self.home, self.other, self.spare = self.warehouses
+
+    def balances(self):
+        return dict(
+            ItemStock.objects.filter(item=self.item, quantity__gt=0)
+            .values_list('warehouse').annotate(total=Sum('quantity'))
+        )
+
+    def assertConsistent(self, expected):
+        self.item.refresh_from_db()
+        self.assertEqual(self.balances(), expected)
+        self.assertEqual(self.item.stock, sum(expected.values()))
+
+    def test_fixture_balances(self):
+        self.assertConsistent({self.home.pk: 55, self.other.pk: 2})
+
+    def test_partial_transfer(self):
+        self.assertOk(self.client.post('/api/operations/transfer/', {
+            'item': self.item.pk, 'quantity': 5,
+            'from_warehouse': self.home.pk, 'to_warehouse': self.spare.pk,
+        }, format='json'))
+        self.assertConsistent({self.home.pk: 50, self.other.pk: 2, self.spare.pk: 5})
+
+        stock.transfer(self.item, 1, self.other, self.home)
+        self.assertConsistent({self.home.pk: 51, self.other.pk: 1, self.spare.pk: 5})
+
+    def test_over_transfer_rejected(self):
+        operations = InventoryOperation.objects.count()
+        # 合计 57 足够，但源仓库只有 55
+        response = self.client.post('/api/operations/transfer/', {
+            'item': self.item.pk, 'quantity': 56,
+            'from_warehouse': self.home.pk, 'to_warehouse': self.spare.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        with self.assertRaises(BusinessException):
+            stock.transfer(self.item, 3, self.other, self.spare)
+        self.assertConsistent({self.home.pk: 55, self.other.pk: 2})
+        self.assertEqual(InventoryOperation.objects.count(), operations)
+
+    def test_change_home_warehouse_moves_balance(self):
+        self.assertOk(self.client.patch(
+            f'/api/inventory/items/{self.item.pk}/',
+            {'warehouse': self.spare.pk, 'warehouse_location': 'A-01'}, format='json',
+        ))
+        self.assertConsistent({self.spare.pk: 55, self.other.pk: 2})
+        self.assertEqual(ItemStock.objects.get(item=self.item, warehouse=self.spare).bin, 'A-01')
+
+        # 之后的出库优先从新默认仓库扣减
+        stock.issue(self.item, 10)
+        self.assertConsistent({self.spare.pk: 45, self.other.pk: 2})
+
+    def test_change_home_warehouse_checks_capacity(self):
+        Warehouse.objects.filter(pk=self.spare.pk).update(capacity=60)
+        response = self.client.patch(
+            f'/api/inventory/items/{self.item.pk}/', {'warehouse': self.spare.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('warehouse', response.json()['error']['details'])
+        self.assertEqual(Item.objects.get(pk=self.item.pk).warehouse_id, self.home.pk)
+        self.assertConsistent({self.home.pk: 55, self.other.pk: 2})
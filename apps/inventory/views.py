@@ -3,20 +3,24 @@
 """
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.db.models import Count
 
+from .filters import ItemFilter
 from .models import Category, Item
 from .serializers import (
     CategorySerializer, ItemSerializer,
     ItemListSerializer, ItemDetailSerializer
 )
+from common.conditional import ConditionalGetMixin
+from common.mixins import FastListMixin, SparseFieldsetMixin
 from common.responses import APIResponse
 from common.pagination import StandardPagination
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """类别视图集"""
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -25,10 +29,39 @@ class CategoryViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'code']
     ordering = ['code']
+    conditional_models = ('inventory.category', 'inventory.item')
+    query_budgets = {
+        'list': 4, 'retrieve': 4, 'tree': 4,
+        'create': 10, 'update': 8, 'partial_update': 8, 'destroy': 8,
+    }
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve') and self.wants_field('item_count'):
+            # 物品数随类别一次查出，避免逐行 COUNT
+            queryset = queryset.annotate(items_total=Count('items'))
+        return queryset
     
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
+        params = request.query_params
+        if params.get('search') or params.get('ordering'):
+            queryset = self.filter_queryset(self.get_queryset())
+            serializer = self.get_serializer(queryset, many=True)
+            return APIResponse.success(data=serializer.data)
+        
+        # 类别取自进程内引用数据（common.refdata，按 code 排序），需要物品数时一次按类别分组计数
+        from common import refdata
+        
+        categories = refdata.table('inventory.category')
+        instances = [categories.to_instance(row) for row in categories.rows()]
+        if self.wants_field('item_count'):
+            counts = dict(
+                Item.objects.order_by().values('category_id')
+                .annotate(total=Count('id')).values_list('category_id', 'total')
+            )
+            for category in instances:
+                category.items_total = counts.get(category.pk, 0)
+        serializer = self.get_serializer(instances, many=True)
         return APIResponse.success(data=serializer.data)
     
     def create(self, request, *args, **kwargs):
@@ -52,22 +85,92 @@ class CategoryViewSet(viewsets.ModelViewSet):
     
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        if instance.items.exists():
-            return APIResponse.error(message="该类别下有物品，无法删除")
+        # 删除类别会级联删除子类别，子树中任一类别有物品都不允许删除
+        if Item.objects.in_category_tree(instance).exists():
+            return APIResponse.error(message="该类别或其子类别下有物品，无法删除")
         self.perform_destroy(instance)
         return APIResponse.success(message="类别删除成功")
+    
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """类别树（含子树汇总的物品数、库存和金额）
+
+        一次聚合查询取出每个类别自身的统计，再按路径由深到浅向上汇总。
+        ?root=<id> 只返回该类别的子树。
+        """
+        from django.db.models import Count, DecimalField, F, Sum, Value
+        from django.db.models.functions import Coalesce
+        
+        queryset = Category.objects.all()
+        root_id = request.query_params.get('root')
+        if root_id:
+            if not root_id.isdigit():
+                raise ValidationError({'root': '必须是整数 ID'})
+            root = Category.objects.filter(pk=int(root_id)).only('path').first()
+            if root is None:
+                return APIResponse.error(message="类别不存在", status_code=status.HTTP_404_NOT_FOUND)
+            queryset = queryset.filter(path__startswith=root.path)
+        
+        rows = list(
+            queryset.annotate(
+                own_item_count=Count('items'),
+                own_stock=Coalesce(Sum('items__stock'), Value(0)),
+                own_value=Coalesce(
+                    Sum(F('items__price') * F('items__stock'), output_field=DecimalField()),
+                    Value(0), output_field=DecimalField()
+                ),
+            ).values(
+                'id', 'name', 'code', 'parent_id', 'path', 'depth', 'is_active',
+                'own_item_count', 'own_stock', 'own_value'
+            ).order_by('path')
+        )
+        
+        nodes = {}
+        for row in rows:
+            row['own_value'] = float(row['own_value'] or 0)
+            row['item_count'] = row['own_item_count']
+            row['stock'] = row['own_stock']
+            row['value'] = row['own_value']
+            row['children'] = []
+            nodes[row['id']] = row
+        
+        # 由深到浅汇总到父节点
+        for row in sorted(rows, key=lambda r: r['depth'], reverse=True):
+            parent = nodes.get(row['parent_id'])
+            if parent is not None:
+                parent['item_count'] += row['item_count']
+                parent['stock'] += row['stock']
+                parent['value'] += row['value']
+        
+        roots = []
+        for row in rows:  # 已按路径排序，父节点总在子节点之前
+            row['value'] = round(row['value'], 2)
+            parent = nodes.get(row['parent_id'])
+            if parent is not None:
+                parent['children'].append(row)
+            else:
+                roots.append(row)
+        return APIResponse.success(data=roots)
 
 
-class ItemViewSet(viewsets.ModelViewSet):
+class ItemViewSet(ConditionalGetMixin, SparseFieldsetMixin, FastListMixin, viewsets.ModelViewSet):
     """物品视图集"""
     queryset = Item.objects.select_related('category', 'supplier', 'warehouse', 'created_by').all()
     permission_classes = [IsAuthenticated]  # 需要登录
     pagination_class = StandardPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['category', 'supplier', 'warehouse', 'status', 'code', 'barcode']
+    filterset_class = ItemFilter
     search_fields = ['name', 'code', 'barcode']
     ordering_fields = ['created_at', 'name', 'code', 'stock', 'price']
     ordering = ['-created_at']
+    conditional_models = (
+        'inventory.item', 'inventory.category', 'suppliers.supplier', 'warehouses.warehouse'
+    )
+    query_budgets = {
+        'list': 5, 'retrieve': 8, 'low_stock': 4, 'statistics': 9,
+        # 更换默认仓库时需要移动余额（锁定余额行、合并写入新仓库）
+        'create': 10, 'update': 12, 'partial_update': 12, 'destroy': 10,
+    }
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -76,33 +179,10 @@ class ItemViewSet(viewsets.ModelViewSet):
             return ItemDetailSerializer
         return ItemSerializer
     
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(queryset)
-        
-        if page is not None:
-            serializer = self.get_serializer(page, many=True, context={'request': request})
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(queryset, many=True, context={'request': request})
-        return APIResponse.success(data=serializer.data)
-    
-    def _clear_dashboard_cache(self):
-        """清除仪表盘相关缓存"""
-        from django.core.cache import cache
-        cache_keys = [
-            'dashboard_overview',
-            'dashboard_low_stock',
-            'dashboard_distribution',
-        ]
-        for key in cache_keys:
-            cache.delete(key)
-    
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
-        self._clear_dashboard_cache()  # 清除仪表盘缓存
         return APIResponse.success(data=serializer.data, message="物品创建成功")
     
     def retrieve(self, request, *args, **kwargs):
@@ -116,7 +196,6 @@ class ItemViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
-        self._clear_dashboard_cache()  # 清除仪表盘缓存
         return APIResponse.success(data=serializer.data, message="物品更新成功")
     
     def destroy(self, request, *args, **kwargs):
@@ -125,15 +204,13 @@ class ItemViewSet(viewsets.ModelViewSet):
         if hasattr(instance, 'operations'):
             instance.operations.all().delete()
         self.perform_destroy(instance)
-        self._clear_dashboard_cache()  # 清除仪表盘缓存
         return APIResponse.success(message="物品删除成功")
     
     @action(detail=False, methods=['get'])
     def low_stock(self, request):
-        """获取低库存物品"""
-        queryset = self.get_queryset().filter(
-            Q(status='low_stock') | Q(status='out_of_stock')
-        )
+        """获取低库存物品（按库存升序，沿部分索引 items_low_stock_idx 顺序读取，不需要额外排序）"""
+        queryset = self.get_queryset().low_stock().order_by('stock')
+        queryset = self.project_queryset(queryset, ItemListSerializer)
         serializer = ItemListSerializer(queryset, many=True, context={'request': request})
         return APIResponse.success(data=serializer.data)
     
@@ -147,7 +224,7 @@ class ItemViewSet(viewsets.ModelViewSet):
             'total_items': queryset.count(),
             'total_stock': queryset.aggregate(total=Sum('stock'))['total'] or 0,
             'total_value': sum(item.total_value for item in queryset),
-            'low_stock_count': queryset.filter(Q(status='low_stock') | Q(status='out_of_stock')).count(),
+            'low_stock_count': queryset.low_stock().count(),
             'avg_price': queryset.aggregate(avg=Avg('price'))['avg'] or 0,
             'category_distribution': list(
                 queryset.values('category__name')
@@ -0,0 +1,140 @@
+"""
+最近活动 Feed（仪表盘“最近活动”）
+
+缓存中的定长环形缓冲区：操作记录 ID 即序号，ID 为 n 的活动保存在 slot:<n % SIZE>。
+
+- 写入：出入库/调拨记录提交后，把渲染好的活动条目写入 ID 对应的槽位，最多保留 SIZE 条，最旧的条目被覆盖。
+  序号来自数据库主键，不需要在缓存中分配（DatabaseCache 的 incr 是先读后写，并发写入会拿到同一序号）
+- 软删除：提交后把对应槽位替换为删除标记（不删除键，槽位数量保持不变）
+- 读取：一次 get_many 取出头部记录和全部槽位，按 ID 倒序返回，没有 ORM 查询，也没有缓存过期造成的延迟
+- 头部记录 activity_feed:head 保存重建时写入的槽位数。头部记录丢失，或者存在的槽位少于该数量
+  （缓存被清空、淘汰）时从数据库重建，也可以运行 rebuild_activity_feed 命令手动重建
+
+条目是写入时的快照：物品改名或更换图片后，已有条目仍显示操作发生时的信息。
+图片保存相对地址，由接口按请求补全为绝对地址。
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'activity_feed:'
+HEAD_KEY = f'{KEY_PREFIX}head'
+
+
+def get_size():
+    return getattr(settings, 'ACTIVITY_FEED', {}).get('SIZE', 50)
+
+
+def _slot_keys(size):
+    return [f'{KEY_PREFIX}slot:{index}' for index in range(size)]
+
+
+def render(operation):
+    """活动条目（与原最近活动接口的字段一致）"""
+    item = operation.item
+    operator = operation.operator
+    operator_name = (operator.get_full_name() or operator.username) if operator else ''
+    return {
+        'id': operation.id,
+        'type': operation.operation_type,
+        'operation_type': operation.operation_type,  # 前端使用这个字段
+        'type_display': operation.get_operation_type_display(),
+        'item_name': item.name,
+        'item_code': item.code,
+        'item_image': item.image.url if item.image else None,
+        'quantity': operation.quantity,
+        'operator_name': operator_name or '系统',
+        'created_at': operation.created_at.isoformat(),
+    }
+
+
+def append(operation):
+    """追加一条活动（在记录所在事务提交后调用）"""
+    if cache.get(HEAD_KEY) is None:
+        # 缓冲区不存在，重建（已提交的本条记录会包含在内）
+        rebuild()
+        return
+    size = get_size()
+    cache.set(_slot_keys(size)[operation.id % size], {'seq': operation.id, **render(operation)}, None)
+
+
+def remove(operation_ids):
+    """把已删除记录所在的槽位替换为删除标记"""
+    operation_ids = set(operation_ids)
+    keys = _slot_keys(get_size())
+    found = cache.get_many(keys)
+    stale = {
+        key: {'seq': entry['seq'], 'id': entry['id'], 'deleted': True}
+        for key, entry in found.items() if entry['id'] in operation_ids
+    }
+    if stale:
+        cache.set_many(stale, None)
+
+
+def append_on_commit(operation):
+    transaction.on_commit(lambda: append(operation))
+
+
+def remove_on_commit(operation_ids):
+    operation_ids = list(operation_ids)
+    transaction.on_commit(lambda: remove(operation_ids))
+
+
+def rebuild_on_commit():
+    transaction.on_commit(rebuild)
+
+
+def rebuild():
+    """从数据库重建缓冲区，返回全部条目（最新在前）"""
+    from .models import InventoryOperation
+
+    size = get_size()
+    # 物品和操作人随操作记录一次 JOIN 查出（排除已删除的记录，防止做假账）
+    operations = list(
+        InventoryOperation.objects.filter(is_deleted=False)
+        .select_related('item', 'operator')
+        .only(
+            'id', 'operation_type', 'quantity', 'created_at',
+            'item__name', 'item__code', 'item__image',
+            'operator__username', 'operator__first_name', 'operator__last_name',
+        )
+        .order_by('-created_at', '-id')[:size]
+    )
+    # 已删除记录留下的 ID 空缺可能使两条记录落在同一槽位，从新到旧写入，遇到已占用的槽位即停止，
+    # 缓冲区中始终是连续的最新若干条
+    keys = _slot_keys(size)
+    slots = {}
+    for operation in operations:
+        key = keys[operation.id % size]
+        if key in slots:
+            break
+        slots[key] = {'seq': operation.id, **render(operation)}
+    cache.delete_many(keys)
+    cache.set_many({**slots, HEAD_KEY: len(slots)}, None)
+    logger.info('最近活动已从数据库重建，共 %d 条', len(slots))
+    entries = sorted(slots.values(), key=lambda entry: entry['seq'], reverse=True)
+    return [_public(entry) for entry in entries]
+
+
+def _public(entry):
+    return {key: value for key, value in entry.items() if key != 'seq'}
+
+
+def recent(limit=10):
+    """最近 limit 条活动（最新在前）"""
+    size = get_size()
+    keys = _slot_keys(size)
+    found = cache.get_many([HEAD_KEY] + keys)
+    head = found.pop(HEAD_KEY, None)
+    if head is None or len(found) < head:
+        # 缓冲区不存在或部分槽位被淘汰
+        return rebuild()[:limit]
+    entries = sorted(
+        (entry for entry in found.values() if not entry.get('deleted')),
+        key=lambda entry: entry['seq'], reverse=True,
+    )
+    return [_public(entry) for entry in entries[:limit]]
@@ -2,7 +2,7 @@
 出入库操作管理后台
 """
 from django.contrib import admin
-from .models import InventoryOperation
+from .models import ArchivedOperation, Department, InventoryOperation, OperationArchive
 
 
 @admin.register(InventoryOperation)
@@ -12,7 +12,7 @@ class InventoryOperationAdmin(admin.ModelAdmin):
     list_filter = ['operation_type', 'is_deleted', 'created_at']
     search_fields = ['item__name', 'item__code', 'recipient', 'department', 'notes']
     ordering = ['-created_at']
-    raw_id_fields = ['item', 'supplier', 'operator', 'deleted_by']
+    raw_id_fields = ['item', 'supplier', 'warehouse', 'target_warehouse', 'recipient_department', 'operator', 'deleted_by']
     readonly_fields = ['created_at', 'before_stock', 'after_stock']
     date_hierarchy = 'created_at'
     
@@ -20,8 +20,8 @@ class InventoryOperationAdmin(admin.ModelAdmin):
         ('基本信息', {'fields': ('item', 'operation_type', 'quantity')}),
         ('库存变化', {'fields': ('before_stock', 'after_stock')}),
         ('入库信息', {'fields': ('supplier',), 'classes': ('collapse',)}),
-        ('出库信息', {'fields': ('recipient', 'department', 'purpose'), 'classes': ('collapse',)}),
-        ('调拨信息', {'fields': ('from_warehouse', 'to_warehouse'), 'classes': ('collapse',)}),
+        ('出库信息', {'fields': ('recipient', 'department', 'recipient_department', 'purpose'), 'classes': ('collapse',)}),
+        ('仓库信息', {'fields': ('warehouse', 'from_warehouse', 'to_warehouse', 'target_warehouse'), 'classes': ('collapse',)}),
         ('其他信息', {'fields': ('notes', 'operator')}),
         ('删除信息', {'fields': ('is_deleted', 'deleted_at', 'deleted_by'), 'classes': ('collapse',)}),
         ('时间信息', {'fields': ('created_at',)}),
@@ -30,3 +30,44 @@ class InventoryOperationAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """默认显示所有记录，包括已删除的"""
         return super().get_queryset(request)
+
+
+
+@admin.register(Department)
+class DepartmentAdmin(admin.ModelAdmin):
+    """领用部门管理"""
+    list_display = ['name', 'is_active', 'created_at']
+    list_filter = ['is_active']
+    search_fields = ['name']
+
+
+@admin.register(OperationArchive)
+class OperationArchiveAdmin(admin.ModelAdmin):
+    """操作记录归档清单（由 archive_operations 命令维护，只读）"""
+    list_display = ['month', 'storage', 'row_count', 'location', 'created_at']
+    list_filter = ['storage']
+    ordering = ['-month']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedOperation)
+class ArchivedOperationAdmin(admin.ModelAdmin):
+    """归档操作记录（只读）"""
+    list_display = ['id', 'item_id', 'operation_type', 'quantity', 'before_stock', 'after_stock', 'is_deleted', 'created_at']
+    list_filter = ['operation_type', 'is_deleted']
+    ordering = ['-created_at']
+    date_hierarchy = 'created_at'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
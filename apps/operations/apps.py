@@ -5,3 +5,6 @@ class OperationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.operations'
     verbose_name = '出入库操作'
+
+    def ready(self):
+        from . import signals  # noqa: F401
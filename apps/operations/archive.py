@@ -0,0 +1,302 @@
+"""
+操作记录归档
+
+inventory_operations 只增不减，超过保留期（默认 24 个月）的历史按自然月移出热表：
+
+- table：移入 inventory_operations_archive 归档表（SQLite 默认使用，热表索引保持精简）
+- file：导出为压缩 JSONL 文件（ARCHIVE_DIR/operations_YYYYMM.jsonl.gz）后从热表删除
+
+PostgreSQL 分区表下整月数据对应一个分区，归档后直接 DETACH + DROP 分区，不产生逐行删除。
+每个归档月份在 OperationArchive 中登记存储位置、记录数和按类型的汇总，
+报表应用通过 iter_archived_operations 读取归档数据。
+
+导出（写文件或分批复制到归档表）在事务之外进行，不长时间持有锁；最后在一个短事务中
+确认该月热表数据在导出期间没有变化，再移出热表并登记清单。中途失败时热表数据保持不变，
+重新运行即可。
+"""
+import gzip
+import hashlib
+import json
+import os
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from apps.reports import timeseries
+from common.cache_versions import bump_version_on_commit
+from . import activity_feed, partitions
+from .models import ArchivedOperation, InventoryOperation, OperationArchive
+
+DEFAULTS = {
+    'RETENTION_MONTHS': 24,   # 热表保留的完整自然月数
+    'STORAGE': 'table',       # table 或 file
+    'DIRECTORY': str(Path(settings.BASE_DIR) / 'archive'),
+    'BATCH_SIZE': 5000,
+    'PARTITIONS_AHEAD': 3,    # 提前创建的未来分区数
+}
+
+STORAGE_CHOICES = [choice for choice, _label in OperationArchive.STORAGE_CHOICES]
+
+# 热表与归档表共用的列（attname 与列名一致，如 item_id）
+COLUMNS = [field.column for field in ArchivedOperation._meta.concrete_fields]
+
+
+def get_archive_config():
+    return {**DEFAULTS, **getattr(settings, 'OPERATION_ARCHIVE', {})}
+
+
+def archive_cutoff(retention_months, today=None):
+    """保留期之前的第一个月份：早于该月份的数据需要归档"""
+    return partitions.add_months(partitions.month_start(today or timezone.localdate()), -retention_months)
+
+
+def pending_months(cutoff):
+    """热表中早于 cutoff 月份、尚未归档的月份"""
+    start, _end = partitions.month_bounds(cutoff)
+    months = (
+        InventoryOperation.objects.filter(created_at__lt=start)
+        .annotate(month=TruncMonth('created_at'))
+        .order_by('month')
+        .values_list('month', flat=True)
+        .distinct()
+    )
+    return [partitions.month_start(month) for month in months]
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat()
+    if isinstance(value, (date, Decimal)):
+        return str(value)
+    return value
+
+
+def encode_row(row):
+    """归档记录统一为 JSON 可序列化的字典（时间为本地时区 ISO 格式）"""
+    return {key: _encode(value) for key, value in row.items()}
+
+
+def _add_to_summary(summary, operation_type, count, quantity):
+    entry = summary.setdefault(operation_type, {'count': 0, 'quantity': 0})
+    entry['count'] += count
+    entry['quantity'] += quantity or 0
+
+
+def _file_path(month, config):
+    return Path(config['DIRECTORY']) / f'operations_{month:%Y%m}.jsonl.gz'
+
+
+def _read_file(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _export_file(month, rows, config, existing=None):
+    """写入压缩 JSONL 临时文件，返回 (临时文件路径, 记录数, 汇总, SHA256)
+
+    临时文件在最终事务中替换正式文件。同一月份重复归档时，已有文件中的记录会先写入新文件；
+    只读取清单登记的前 row_count 条，之前中途失败的归档写入文件的多余记录不会重复。
+    """
+    path = _file_path(month, config)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + '.tmp')
+    count, summary = 0, {}
+
+    def all_rows():
+        if existing and Path(existing.location).exists():
+            yield from islice(_read_file(existing.location), existing.row_count)
+        for row in rows:
+            yield encode_row(row)
+
+    with gzip.open(temp_path, 'wt', encoding='utf-8') as handle:
+        for row in all_rows():
+            handle.write(json.dumps(row, ensure_ascii=False))
+            handle.write('\n')
+            count += 1
+            _add_to_summary(summary, row['operation_type'], 1, row['quantity'])
+        handle.flush()
+        os.fsync(handle.fileno())
+
+    digest = hashlib.sha256()
+    with open(temp_path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(block)
+    return temp_path, count, summary, digest.hexdigest()
+
+
+def _adapt(*values):
+    # 原生 SQL 的时间参数需要按后端格式转换（SQLite 存储 UTC 文本）
+    return [connection.ops.adapt_datetimefield_value(value) for value in values]
+
+
+def _fingerprint(start, end):
+    """热表中一个月数据的指纹（记录数、最大 ID、最近删除时间），用于确认导出期间没有变化"""
+    return InventoryOperation.objects.filter(created_at__gte=start, created_at__lt=end).aggregate(
+        count=Count('id'), last_id=Max('id'), last_deleted=Max('deleted_at'),
+    )
+
+
+def _copy_to_table(start, end, batch_size):
+    """按 ID 分批 INSERT ... SELECT 把一个月的数据复制到归档表（每批单独提交）"""
+    quote_name = connection.ops.quote_name
+    columns = ', '.join(quote_name(column) for column in COLUMNS)
+    hot_table = quote_name(InventoryOperation._meta.db_table)
+    archive_table = quote_name(ArchivedOperation._meta.db_table)
+    hot = InventoryOperation.objects.filter(created_at__gte=start, created_at__lt=end)
+    with connection.cursor() as cursor:
+        # 之前中途失败的归档已复制、但仍在热表中的记录
+        cursor.execute(
+            f"DELETE FROM {archive_table} WHERE id IN "
+            f"(SELECT id FROM {hot_table} WHERE created_at >= %s AND created_at < %s)",
+            _adapt(start, end),
+        )
+        last_id = 0
+        while True:
+            ids = list(hot.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            cursor.execute(
+                f"INSERT INTO {archive_table} ({columns}) "
+                f"SELECT {columns} FROM {hot_table} "
+                f"WHERE created_at >= %s AND created_at < %s AND id > %s AND id <= %s",
+                [*_adapt(start, end), last_id, ids[-1]],
+            )
+            last_id = ids[-1]
+
+
+def _table_summary(start, end):
+    """归档表中一个月的记录数与按类型的汇总"""
+    archived = ArchivedOperation.objects.filter(created_at__gte=start, created_at__lt=end)
+    summary = {}
+    for row in archived.order_by().values('operation_type').annotate(count=Count('id'), quantity=Sum('quantity')):
+        _add_to_summary(summary, row['operation_type'], row['count'], row['quantity'])
+    return archived.count(), summary
+
+
+def _remove_hot(month, start, end):
+    """从热表移除一个月的数据：分区表直接分离分区，其余（含分区表的默认分区）按时间范围删除"""
+    if partitions.is_partitioned() and partitions.drop_partition(month):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {connection.ops.quote_name(InventoryOperation._meta.db_table)} "
+            f"WHERE created_at >= %s AND created_at < %s",
+            _adapt(start, end),
+        )
+
+
+def archive_month(month, storage=None, config=None):
+    """归档一个自然月的操作记录，返回 OperationArchive 清单记录
+
+    导出期间该月热表数据发生变化（新增、删除或软删除）时放弃本次归档并抛出 ValueError，重新运行即可。
+    """
+    config = config or get_archive_config()
+    storage = storage or config['STORAGE']
+    if storage not in STORAGE_CHOICES:
+        raise ValueError(f'未知的归档存储方式：{storage}')
+    start, end = partitions.month_bounds(month)
+
+    existing = OperationArchive.objects.filter(month=month).first()
+    if existing and existing.storage != storage:
+        raise ValueError(f'{month:%Y-%m} 已使用 {existing.storage} 方式归档，不能改为 {storage}')
+    fingerprint = _fingerprint(start, end)
+
+    # 事务外导出
+    temp_path = None
+    if storage == 'file':
+        rows = (
+            InventoryOperation.objects.filter(created_at__gte=start, created_at__lt=end)
+            .order_by('id')
+            .values(*COLUMNS)
+            .iterator(chunk_size=config['BATCH_SIZE'])
+        )
+        temp_path, count, summary, checksum = _export_file(month, rows, config, existing)
+        location = str(_file_path(month, config))
+    else:
+        _copy_to_table(start, end, config['BATCH_SIZE'])
+        location, checksum = ArchivedOperation._meta.db_table, ''
+
+    try:
+        with transaction.atomic():
+            current = OperationArchive.objects.select_for_update().filter(month=month).first()
+            previous_count = existing.row_count if existing else None
+            if (current.row_count if current else None) != previous_count or _fingerprint(start, end) != fingerprint:
+                raise ValueError(f'{month:%Y-%m} 的操作记录在归档期间发生变化，请重新运行')
+
+            if temp_path is not None:
+                os.replace(temp_path, location)
+                temp_path = None
+            else:
+                count, summary = _table_summary(start, end)
+            _remove_hot(month, start, end)
+            archive, _created = OperationArchive.objects.update_or_create(
+                month=month,
+                defaults={
+                    'storage': storage,
+                    'location': location,
+                    'row_count': count,
+                    'summary': summary,
+                    'checksum': checksum,
+                },
+            )
+            # 稀疏数据下最近活动可能包含被归档的记录，提交后重建
+            activity_feed.rebuild_on_commit()
+            # 归档的记录移出热表，该月所在的已缓存时间桶失效
+            timeseries.invalidate_on_commit(month + timedelta(days=offset) for offset in range((end - start).days))
+            bump_version_on_commit('operations.inventoryoperation', 'operations.operationarchive')
+    finally:
+        if temp_path is not None:
+            temp_path.unlink(missing_ok=True)
+    return archive
+
+
+def archive_operations(retention_months=None, storage=None, dry_run=False, progress=None):
+    """归档保留期之前的全部月份，返回 [(月份, 记录数)]"""
+    config = get_archive_config()
+    if retention_months is None:
+        retention_months = config['RETENTION_MONTHS']
+    cutoff = archive_cutoff(retention_months)
+    results = []
+    for month in pending_months(cutoff):
+        if dry_run:
+            start, end = partitions.month_bounds(month)
+            count = InventoryOperation.objects.filter(created_at__gte=start, created_at__lt=end).count()
+        else:
+            count = archive_month(month, storage, config).row_count
+        results.append((month, count))
+        if progress:
+            progress(month, count)
+    return results
+
+
+def iter_archived_operations(archive, item_id=None, operation_type=None):
+    """按 id 顺序读取一个归档月份的记录（字典），可按物品和操作类型过滤"""
+    if archive.storage == 'file':
+        # 早期归档文件没有后来新增的列（如仓库、部门），缺失的列按 None 输出
+        defaults = dict.fromkeys(COLUMNS)
+        for row in _read_file(archive.location):
+            row = {**defaults, **row}
+            if item_id is not None and row['item_id'] != item_id:
+                continue
+            if operation_type and row['operation_type'] != operation_type:
+                continue
+            yield row
+        return
+
+    start, end = partitions.month_bounds(archive.month)
+    queryset = ArchivedOperation.objects.filter(created_at__gte=start, created_at__lt=end)
+    if item_id is not None:
+        queryset = queryset.filter(item_id=item_id)
+    if operation_type:
+        queryset = queryset.filter(operation_type=operation_type)
+    for row in queryset.order_by('id').values(*COLUMNS).iterator(chunk_size=get_archive_config()['BATCH_SIZE']):
+        yield encode_row(row)
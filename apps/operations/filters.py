@@ -0,0 +1,58 @@
+"""
+出入库操作过滤器
+"""
+from datetime import datetime, time, timedelta
+
+import django_filters
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import InventoryOperation
+
+
+class OperationFilter(django_filters.FilterSet):
+    """操作记录过滤器
+
+    每种过滤条件都对应一个 (过滤列, created_at) 复合索引，过滤后按时间倒序分页是一次索引范围扫描：
+
+    - start / end：本地日期（含首尾两天），转换为 created_at 的半开时间范围，不在列上套 DATE() 函数
+    - warehouse：操作发生时所在的仓库（发生仓库或调入仓库）；item_warehouse：物品当前的默认仓库
+    - operator、department：操作人、规范化的领用部门
+    - deleted：false（默认，只看未删除）/ true（只看已删除）/ all
+    """
+    DELETED_CHOICES = (('false', '未删除'), ('true', '已删除'), ('all', '全部'))
+
+    start = django_filters.DateFilter(method='filter_start', label='开始日期')
+    end = django_filters.DateFilter(method='filter_end', label='结束日期')
+    warehouse = django_filters.NumberFilter(method='filter_warehouse', label='发生仓库（含调入）')
+    item_warehouse = django_filters.NumberFilter(field_name='item__warehouse', label='物品当前仓库')
+    department = django_filters.NumberFilter(field_name='recipient_department', label='领用部门')
+    deleted = django_filters.ChoiceFilter(choices=DELETED_CHOICES, method='filter_deleted', label='删除状态')
+
+    class Meta:
+        model = InventoryOperation
+        fields = ['operation_type', 'item', 'supplier', 'operator']
+
+    @staticmethod
+    def _local_midnight(day):
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    def filter_start(self, queryset, name, value):
+        return queryset.filter(created_at__gte=self._local_midnight(value))
+
+    def filter_end(self, queryset, name, value):
+        return queryset.filter(created_at__lt=self._local_midnight(value + timedelta(days=1)))
+
+    def filter_warehouse(self, queryset, name, value):
+        return queryset.filter(Q(warehouse_id=value) | Q(target_warehouse_id=value))
+
+    def filter_deleted(self, queryset, name, value):
+        # 未传 deleted 时由 filter_queryset 过滤掉已删除的记录
+        if value == 'true':
+            return queryset.filter(is_deleted=True)
+        return queryset
+
+    def filter_queryset(self, queryset):
+        if self.form.cleaned_data.get('deleted') in (None, '', 'false'):
+            queryset = queryset.filter(is_deleted=False)
+        return super().filter_queryset(queryset)
@@ -0,0 +1,48 @@
+"""
+归档超过保留期的操作记录
+
+    python manage.py archive_operations                      # 按 OPERATION_ARCHIVE 配置归档
+    python manage.py archive_operations --retention-months 12 --storage file
+    python manage.py archive_operations --dry-run            # 只列出待归档的月份
+
+归档后的数据可通过 /api/reports/archives/ 查询。
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.operations.archive import STORAGE_CHOICES, archive_operations
+
+
+class Command(BaseCommand):
+    help = '按月把超过保留期的操作记录移出热表'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-months', type=int, help='热表保留的完整自然月数')
+        parser.add_argument('--storage', choices=STORAGE_CHOICES, help='归档存储方式')
+        parser.add_argument('--dry-run', action='store_true', help='只统计，不归档')
+
+    def handle(self, *args, **options):
+        if options['retention_months'] is not None and options['retention_months'] < 1:
+            raise CommandError('保留期至少为 1 个月')
+        started = time.monotonic()
+
+        def progress(month, count):
+            self.stdout.write(f'  {month:%Y-%m}: {count} 条')
+
+        try:
+            results = archive_operations(
+                retention_months=options['retention_months'],
+                storage=options['storage'],
+                dry_run=options['dry_run'],
+                progress=progress,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        total = sum(count for _month, count in results)
+        elapsed = time.monotonic() - started
+        action = '待归档' if options['dry_run'] else '已归档'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {len(results)} 个月份，共 {total} 条记录，用时 {elapsed:.1f} 秒'
+        ))
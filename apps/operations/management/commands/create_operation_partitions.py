@@ -0,0 +1,30 @@
+"""
+提前创建操作记录表的月份分区（仅 PostgreSQL）
+
+    python manage.py create_operation_partitions                  # 当前月份及未来 3 个月
+    python manage.py create_operation_partitions --months-ahead 6
+
+建议每月通过 cron 运行一次，新数据不会落入默认分区。
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.operations.archive import get_archive_config
+from apps.operations.partitions import ensure_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    help = '提前创建操作记录表的月份分区'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=get_archive_config()['PARTITIONS_AHEAD'],
+                            help='提前创建的未来月份数')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql' or not is_partitioned():
+            self.stdout.write('操作记录表未分区（仅 PostgreSQL 支持分区），无需创建')
+            return
+        created = ensure_partitions(options['months_ahead'])
+        for name in created:
+            self.stdout.write(f'  已创建 {name}')
+        self.stdout.write(self.style.SUCCESS(f'分区检查完成，新建 {len(created)} 个分区'))
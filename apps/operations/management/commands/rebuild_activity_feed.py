@@ -0,0 +1,21 @@
+"""
+从数据库重建仪表盘最近活动
+
+    python manage.py rebuild_activity_feed
+
+最近活动在出入库记录提交时追加到缓存中；缓存被清空时首次读取会自动重建，
+批量导入数据（如 seed_perf_data）或直接修改数据库后可手动运行本命令。
+"""
+from django.core.management.base import BaseCommand
+
+from apps.operations import activity_feed
+
+
+class Command(BaseCommand):
+    help = '从数据库重建仪表盘最近活动'
+
+    def handle(self, *args, **options):
+        entries = activity_feed.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'最近活动已重建，共 {len(entries)} 条（最多保留 {activity_feed.get_size()} 条）'
+        ))
@@ -0,0 +1,61 @@
+"""
+SQLite 数据库例行维护（仅 SQLite）
+
+    python manage.py sqlite_maintenance              # PRAGMA optimize + WAL 检查点
+    python manage.py sqlite_maintenance --check      # 另外做一次快速完整性检查
+    python manage.py sqlite_maintenance --vacuum     # 另外整理数据库文件（需要独占，停机窗口运行）
+
+WAL 模式下自动检查点只在没有读事务时才能把 WAL 写回主库，繁忙时 WAL 文件会持续增长；
+建议每小时通过 cron 运行一次，TRUNCATE 检查点在读写空闲的瞬间完成回写并截断 WAL 文件。
+PRAGMA optimize 只重新分析统计信息过期的表，保持查询计划稳定。
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = 'SQLite 例行维护：更新统计信息、WAL 检查点'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='执行 PRAGMA quick_check')
+        parser.add_argument('--vacuum', action='store_true', help='执行 VACUUM 整理数据库文件')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stdout.write('当前数据库不是 SQLite，无需维护')
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+            self.stdout.write(f'日志模式：{journal_mode}')
+
+            started = time.monotonic()
+            cursor.execute('PRAGMA optimize')
+            self.stdout.write(f'  PRAGMA optimize 完成，用时 {time.monotonic() - started:.2f} 秒')
+
+            if options['check']:
+                cursor.execute('PRAGMA quick_check')
+                problems = [row[0] for row in cursor.fetchall() if row[0] != 'ok']
+                if problems:
+                    raise CommandError('完整性检查失败：' + '；'.join(problems[:10]))
+                self.stdout.write('  完整性检查通过')
+
+            if options['vacuum']:
+                started = time.monotonic()
+                cursor.execute('VACUUM')
+                self.stdout.write(f'  VACUUM 完成，用时 {time.monotonic() - started:.2f} 秒')
+
+            if journal_mode.lower() == 'wal':
+                cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                busy, log_pages, checkpointed = cursor.fetchone()
+                if busy:
+                    self.stdout.write(self.style.WARNING(
+                        f'  WAL 检查点未完成（有读写事务进行中），已回写 {checkpointed}/{log_pages} 页，稍后重试'
+                    ))
+                else:
+                    self.stdout.write(f'  WAL 检查点完成，回写 {checkpointed} 页')
+
+        self.stdout.write(self.style.SUCCESS('SQLite 维护完成'))
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_itemstock'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('suppliers', '0003_supplier_suppliers_status_e3c425_idx_and_more'),
+        ('operations', '0003_inventoryoperation_deleted_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OperationArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True, verbose_name='月份')),
+                ('storage', models.CharField(choices=[('table', '归档表'), ('file', '压缩文件')], max_length=10, verbose_name='存储方式')),
+                ('location', models.CharField(max_length=500, verbose_name='存储位置')),
+                ('row_count', models.IntegerField(default=0, verbose_name='记录数')),
+                ('summary', models.JSONField(default=dict, verbose_name='按类型汇总')),
+                ('checksum', models.CharField(blank=True, max_length=64, verbose_name='SHA256')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='归档时间')),
+            ],
+            options={
+                'verbose_name': '操作记录归档',
+                'verbose_name_plural': '操作记录归档',
+                'db_table': 'operation_archives',
+                'ordering': ['-month'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOperation',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='原记录ID')),
+                ('operation_type', models.CharField(choices=[('in', '入库'), ('out', '出库'), ('transfer', '调拨'), ('adjust', '调整'), ('check', '盘点')], max_length=20, verbose_name='操作类型')),
+                ('quantity', models.IntegerField(verbose_name='数量')),
+                ('before_stock', models.IntegerField(verbose_name='操作前库存')),
+                ('after_stock', models.IntegerField(verbose_name='操作后库存')),
+                ('recipient', models.CharField(blank=True, max_length=100, verbose_name='领用人')),
+                ('department', models.CharField(blank=True, max_length=100, verbose_name='领用部门')),
+                ('purpose', models.CharField(blank=True, max_length=200, verbose_name='用途')),
+                ('from_warehouse', models.CharField(blank=True, max_length=100, verbose_name='源仓库')),
+                ('to_warehouse', models.CharField(blank=True, max_length=100, verbose_name='目标仓库')),
+                ('notes', models.TextField(blank=True, verbose_name='备注')),
+                ('created_at', models.DateTimeField(verbose_name='操作时间')),
+                ('is_deleted', models.BooleanField(default=False, verbose_name='是否已删除')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True, verbose_name='删除时间')),
+                ('deleted_by', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='删除人')),
+                ('item', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventory.item', verbose_name='物品')),
+                ('operator', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='操作人')),
+                ('supplier', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='suppliers.supplier', verbose_name='供应商')),
+            ],
+            options={
+                'verbose_name': '归档操作记录',
+                'verbose_name_plural': '归档操作记录',
+                'db_table': 'inventory_operations_archive',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='ops_archive_created_idx'), models.Index(fields=['item', 'created_at'], name='ops_archive_item_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+"""
+PostgreSQL 下把 inventory_operations 改造为按 created_at 的月份分区表
+
+其他数据库不做任何改动（SQLite 使用归档表模式）。
+"""
+from django.db import migrations
+
+
+def partition_operations(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from apps.operations.partitions import convert_to_partitioned, is_partitioned
+    if is_partitioned(schema_editor.connection):
+        return
+    convert_to_partitioned(schema_editor, apps.get_model('operations', 'InventoryOperation'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0004_archivedoperation_operationarchive'),
+    ]
+
+    operations = [
+        # 分区表对 Django 透明，回滚时保留分区结构
+        migrations.RunPython(partition_operations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:41
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Trim
+import django.db.models.deletion
+
+
+def backfill(apps, schema_editor):
+    """按仓库名称快照和领用部门文本回填新列（热表和归档表）"""
+    Warehouse = apps.get_model('warehouses', 'Warehouse')
+    Item = apps.get_model('inventory', 'Item')
+    Department = apps.get_model('operations', 'Department')
+
+    def warehouse_by_name(column):
+        # 仓库名称没有唯一约束，同名仓库取 ID 最小（最早创建）的一个，结果不依赖数据库的返回顺序
+        return Subquery(Warehouse.objects.filter(name=OuterRef(column)).order_by('id').values('id')[:1])
+
+    names = set()
+    for model_name in ('InventoryOperation', 'ArchivedOperation'):
+        model = apps.get_model('operations', model_name)
+        names.update(
+            model.objects.exclude(department='').values_list('department', flat=True).distinct()
+        )
+    Department.objects.bulk_create(
+        [Department(name=name) for name in {name.strip() for name in names} if name],
+        ignore_conflicts=True,
+    )
+
+    for model_name in ('InventoryOperation', 'ArchivedOperation'):
+        model = apps.get_model('operations', model_name)
+        # 入库记录在 to_warehouse 保存收货仓库，出库和调拨在 from_warehouse 保存发货仓库
+        model.objects.filter(operation_type='in').update(warehouse=warehouse_by_name('to_warehouse'))
+        model.objects.filter(operation_type__in=['out', 'transfer']).update(
+            warehouse=warehouse_by_name('from_warehouse')
+        )
+        model.objects.filter(operation_type='transfer').update(
+            target_warehouse=warehouse_by_name('to_warehouse')
+        )
+        # 没有仓库名称（或仓库已改名）的记录取物品当前的默认仓库
+        model.objects.filter(warehouse__isnull=True).update(
+            warehouse=Subquery(Item.objects.filter(pk=OuterRef('item_id')).values('warehouse_id')[:1])
+        )
+        model.objects.exclude(department='').update(
+            recipient_department=Subquery(
+                Department.objects.filter(name=Trim(OuterRef('department'))).values('id')[:1]
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_itemstock'),
+        ('warehouses', '0003_warehouse_warehouses_is_acti_178fdd_idx_and_more'),
+        ('operations', '0005_partition_inventory_operations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Department',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='部门名称')),
+                ('is_active', models.BooleanField(default=True, verbose_name='是否启用')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '部门',
+                'verbose_name_plural': '部门',
+                'db_table': 'departments',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='archivedoperation',
+            name='target_warehouse',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='warehouses.warehouse', verbose_name='调入仓库'),
+        ),
+        migrations.AddField(
+            model_name='archivedoperation',
+            name='warehouse',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='warehouses.warehouse', verbose_name='发生仓库'),
+        ),
+        migrations.AddField(
+            model_name='inventoryoperation',
+            name='target_warehouse',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='warehouses.warehouse', verbose_name='调入仓库'),
+        ),
+        migrations.AddField(
+            model_name='inventoryoperation',
+            name='warehouse',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='warehouses.warehouse', verbose_name='发生仓库'),
+        ),
+        migrations.AddField(
+            model_name='archivedoperation',
+            name='recipient_department',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='operations.department', verbose_name='领用部门（规范化）'),
+        ),
+        migrations.AddField(
+            model_name='inventoryoperation',
+            name='recipient_department',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='operations', to='operations.department', verbose_name='领用部门（规范化）'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryoperation',
+            index=models.Index(fields=['warehouse', 'created_at'], name='ops_warehouse_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryoperation',
+            index=models.Index(fields=['recipient_department', 'created_at'], name='ops_department_created_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_itemstock'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('warehouses', '0003_warehouse_warehouses_is_acti_178fdd_idx_and_more'),
+        ('operations', '0006_operation_warehouse_department'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='inventoryoperation',
+            name='inventory_o_item_id_016c2c_idx',
+        ),
+        migrations.AlterField(
+            model_name='inventoryoperation',
+            name='is_deleted',
+            field=models.BooleanField(default=False, verbose_name='是否已删除'),
+        ),
+        migrations.AlterField(
+            model_name='inventoryoperation',
+            name='item',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='operations', to='inventory.item', verbose_name='物品'),
+        ),
+        migrations.AlterField(
+            model_name='inventoryoperation',
+            name='operator',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='operations', to=settings.AUTH_USER_MODEL, verbose_name='操作人'),
+        ),
+        migrations.AlterField(
+            model_name='inventoryoperation',
+            name='target_warehouse',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='warehouses.warehouse', verbose_name='调入仓库'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryoperation',
+            index=models.Index(fields=['is_deleted', 'created_at'], name='ops_deleted_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryoperation',
+            index=models.Index(fields=['item', 'created_at'], name='ops_item_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryoperation',
+            index=models.Index(fields=['target_warehouse', 'created_at'], name='ops_target_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryoperation',
+            index=models.Index(fields=['operator', 'created_at'], name='ops_operator_created_idx'),
+        ),
+    ]
@@ -5,6 +5,31 @@ from django.db import models
 from django.conf import settings
 
 
+class Department(models.Model):
+    """领用部门（出库时按名称自动登记）"""
+    name = models.CharField('部门名称', max_length=100, unique=True)
+    is_active = models.BooleanField('是否启用', default=True)
+    created_at = models.DateTimeField('创建时间', auto_now_add=True)
+    
+    class Meta:
+        db_table = 'departments'
+        verbose_name = '部门'
+        verbose_name_plural = '部门'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    @classmethod
+    def resolve(cls, name):
+        """按名称取得部门（不存在时创建），空名称返回 None"""
+        name = (name or '').strip()
+        if not name:
+            return None
+        department, _created = cls.objects.get_or_create(name=name)
+        return department
+
+
 class InventoryOperation(models.Model):
     """库存操作记录"""
     OPERATION_TYPES = [
@@ -18,6 +43,7 @@ class InventoryOperation(models.Model):
     item = models.ForeignKey(
         'inventory.Item',
         on_delete=models.PROTECT,
+        db_index=False,  # 由 (item, created_at) 复合索引覆盖
         related_name='operations',
         verbose_name='物品'
     )
@@ -44,23 +70,53 @@ class InventoryOperation(models.Model):
     department = models.CharField('领用部门', max_length=100, blank=True)
     purpose = models.CharField('用途', max_length=200, blank=True)
     
-    # 调拨相关
+    # 调拨相关（仓库名称快照）
     from_warehouse = models.CharField('源仓库', max_length=100, blank=True)
     to_warehouse = models.CharField('目标仓库', max_length=100, blank=True)
     
+    # 写入时记录的仓库和部门（报表按整数键分组，物品后来换仓库不影响历史记录）
+    warehouse = models.ForeignKey(
+        'warehouses.Warehouse',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,  # 由 (warehouse, created_at) 复合索引覆盖
+        related_name='+',
+        verbose_name='发生仓库'  # 入库仓库 / 出库仓库 / 调拨源仓库 / 调整所在仓库
+    )
+    target_warehouse = models.ForeignKey(
+        'warehouses.Warehouse',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,  # 由 (target_warehouse, created_at) 复合索引覆盖
+        related_name='+',
+        verbose_name='调入仓库'
+    )
+    recipient_department = models.ForeignKey(
+        Department,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,  # 由 (recipient_department, created_at) 复合索引覆盖
+        related_name='operations',
+        verbose_name='领用部门（规范化）'
+    )
+    
     # 通用字段
     notes = models.TextField('备注', blank=True)
     operator = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
         null=True,
+        db_index=False,  # 由 (operator, created_at) 复合索引覆盖
         related_name='operations',
         verbose_name='操作人'
     )
     created_at = models.DateTimeField('操作时间', auto_now_add=True)
     
     # 软删除字段（防止做假账，删除记录不影响报表统计）
-    is_deleted = models.BooleanField('是否已删除', default=False, db_index=True)
+    is_deleted = models.BooleanField('是否已删除', default=False)  # 由 (is_deleted, created_at) 复合索引覆盖
     deleted_at = models.DateTimeField('删除时间', null=True, blank=True)
     deleted_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -76,12 +132,134 @@ class InventoryOperation(models.Model):
         verbose_name = '库存操作'
         verbose_name_plural = '库存操作'
         ordering = ['-created_at']
+        # 列表的每种过滤条件（见 filters.OperationFilter）都有 (过滤列, created_at) 复合索引，
+        # 过滤后按时间倒序分页是一次索引范围扫描
         indexes = [
             models.Index(fields=['operation_type']),
             models.Index(fields=['created_at']),
-            models.Index(fields=['item']),  # 物品操作记录查询
             models.Index(fields=['operation_type', 'created_at']),  # 复合索引：按类型和时间查询
+            models.Index(fields=['is_deleted', 'created_at'], name='ops_deleted_created_idx'),  # 默认列表
+            models.Index(fields=['item', 'created_at'], name='ops_item_created_idx'),  # 物品操作记录查询
+            models.Index(fields=['warehouse', 'created_at'], name='ops_warehouse_created_idx'),
+            models.Index(fields=['target_warehouse', 'created_at'], name='ops_target_created_idx'),
+            models.Index(fields=['operator', 'created_at'], name='ops_operator_created_idx'),
+            models.Index(fields=['recipient_department', 'created_at'], name='ops_department_created_idx'),
         ]
     
     def __str__(self):
         return f"{self.get_operation_type_display()} - {self.item.name} - {self.quantity}"
+
+
+class ArchivedOperation(models.Model):
+    """已归档的操作记录（归档表模式）
+
+    超过保留期的操作记录由 archive_operations 命令从热表按月移入，列与 InventoryOperation 一致。
+    关联字段不建数据库外键约束，物品、用户被删除后归档记录保持不变。
+    """
+    id = models.BigIntegerField('原记录ID', primary_key=True)
+    item = models.ForeignKey(
+        'inventory.Item',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='物品'
+    )
+    operation_type = models.CharField('操作类型', max_length=20, choices=InventoryOperation.OPERATION_TYPES)
+    quantity = models.IntegerField('数量')
+    before_stock = models.IntegerField('操作前库存')
+    after_stock = models.IntegerField('操作后库存')
+    supplier = models.ForeignKey(
+        'suppliers.Supplier',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+',
+        verbose_name='供应商'
+    )
+    recipient = models.CharField('领用人', max_length=100, blank=True)
+    department = models.CharField('领用部门', max_length=100, blank=True)
+    purpose = models.CharField('用途', max_length=200, blank=True)
+    from_warehouse = models.CharField('源仓库', max_length=100, blank=True)
+    to_warehouse = models.CharField('目标仓库', max_length=100, blank=True)
+    warehouse = models.ForeignKey(
+        'warehouses.Warehouse',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+',
+        verbose_name='发生仓库'
+    )
+    target_warehouse = models.ForeignKey(
+        'warehouses.Warehouse',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+',
+        verbose_name='调入仓库'
+    )
+    recipient_department = models.ForeignKey(
+        Department,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+',
+        verbose_name='领用部门（规范化）'
+    )
+    notes = models.TextField('备注', blank=True)
+    operator = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+',
+        verbose_name='操作人'
+    )
+    created_at = models.DateTimeField('操作时间')
+    is_deleted = models.BooleanField('是否已删除', default=False)
+    deleted_at = models.DateTimeField('删除时间', null=True, blank=True)
+    deleted_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+',
+        verbose_name='删除人'
+    )
+    
+    class Meta:
+        db_table = 'inventory_operations_archive'
+        verbose_name = '归档操作记录'
+        verbose_name_plural = '归档操作记录'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='ops_archive_created_idx'),
+            models.Index(fields=['item', 'created_at'], name='ops_archive_item_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_operation_type_display()} - {self.item_id} - {self.quantity}"
+
+
+class OperationArchive(models.Model):
+    """操作记录归档清单：每个已归档的自然月一条"""
+    STORAGE_CHOICES = [
+        ('table', '归档表'),
+        ('file', '压缩文件'),
+    ]
+    
+    month = models.DateField('月份', unique=True)
+    storage = models.CharField('存储方式', max_length=10, choices=STORAGE_CHOICES)
+    location = models.CharField('存储位置', max_length=500)
+    row_count = models.IntegerField('记录数', default=0)
+    summary = models.JSONField('按类型汇总', default=dict)
+    checksum = models.CharField('SHA256', max_length=64, blank=True)
+    created_at = models.DateTimeField('归档时间', auto_now_add=True)
+    
+    class Meta:
+        db_table = 'operation_archives'
+        verbose_name = '操作记录归档'
+        verbose_name_plural = '操作记录归档'
+        ordering = ['-month']
+    
+    def __str__(self):
+        return f"{self.month:%Y-%m} ({self.get_storage_display()}, {self.row_count}条)"
@@ -0,0 +1,176 @@
+"""
+操作记录表按月分区（仅 PostgreSQL）
+
+PostgreSQL 下 inventory_operations 是按 created_at 范围分区的声明式分区表，
+每个自然月一个分区（inventory_operations_pYYYYMM），另有一个默认分区兜底。
+按时间过滤的查询（仪表盘、报表、预测）只会扫描命中的分区；
+过期的月份可以直接 DETACH 分区，而不是逐行删除。
+
+分区需要提前创建（create_operation_partitions 命令），
+否则新数据会落入默认分区，之后再为该月份建分区时会失败。
+其他数据库不做分区，本模块的函数直接返回。
+"""
+from datetime import date, datetime
+
+from django.db import connection
+from django.utils import timezone
+
+TABLE = 'inventory_operations'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(value):
+    """日期/时间所在自然月的第一天（按本地时区）"""
+    if isinstance(value, datetime):
+        value = timezone.localtime(value).date()
+    return value.replace(day=1)
+
+
+def month_bounds(month):
+    """月份的 [开始, 结束) 时间（带时区）"""
+    start = timezone.make_aware(datetime(month.year, month.month, 1))
+    next_month = add_months(month, 1)
+    end = timezone.make_aware(datetime(next_month.year, next_month.month, 1))
+    return start, end
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def is_partitioned(using=None):
+    """操作记录表当前是否为分区表"""
+    conn = using or connection
+    if conn.vendor != 'postgresql':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(using=None):
+    """已有的月份分区，返回按月份排序的 [(月份, 分区名)]"""
+    conn = using or connection
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid)",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    prefix = f'{TABLE}_p'
+    partitions = []
+    for name in names:
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+            partitions.append((date(int(suffix[:4]), int(suffix[4:]), 1), name))
+    return sorted(partitions)
+
+
+def create_partition(cursor, month, quote_name):
+    """创建单个月份分区（已存在时跳过）"""
+    start, end = month_bounds(month)
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {quote_name(partition_name(month))} "
+        f"PARTITION OF {quote_name(TABLE)} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def ensure_partitions(months_ahead=3, using=None):
+    """创建当前月份及未来 months_ahead 个月的分区，返回新建的分区名"""
+    conn = using or connection
+    if not is_partitioned(conn):
+        return []
+    existing = {month for month, _name in list_partitions(conn)}
+    current = month_start(timezone.localdate())
+    created = []
+    with conn.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            create_partition(cursor, month, conn.ops.quote_name)
+            created.append(partition_name(month))
+    return created
+
+
+def drop_partition(month, using=None):
+    """分离并删除一个月份分区（数据需已归档）；分区不存在时返回 False"""
+    conn = using or connection
+    name = partition_name(month)
+    if name not in {partition for _month, partition in list_partitions(conn)}:
+        return False
+    quote_name = conn.ops.quote_name
+    with conn.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {quote_name(TABLE)} DETACH PARTITION {quote_name(name)}")
+        cursor.execute(f"DROP TABLE {quote_name(name)}")
+    return True
+
+
+def convert_to_partitioned(schema_editor, model, months_ahead=3):
+    """把现有的操作记录表改造为按月分区表（迁移中调用）
+
+    分区表的主键必须包含分区键，因此数据库主键为 (id, created_at)；
+    id 仍由标识列生成、全局唯一，Django 侧依旧以 id 作为主键。
+    """
+    table = model._meta.db_table
+    legacy = f'{table}_legacy'
+    quote_name = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {quote_name(table)} RENAME TO {quote_name(legacy)}")
+        cursor.execute(
+            f"CREATE TABLE {quote_name(table)} (LIKE {quote_name(legacy)} "
+            f"INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE (created_at)"
+        )
+
+        cursor.execute(f"SELECT MIN(created_at) FROM {quote_name(legacy)}")
+        oldest = cursor.fetchone()[0]
+        current = month_start(timezone.localdate())
+        month = month_start(oldest) if oldest else current
+        last = add_months(current, months_ahead)
+        while month <= last:
+            create_partition(cursor, month, quote_name)
+            month = add_months(month, 1)
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {quote_name(DEFAULT_PARTITION)} "
+            f"PARTITION OF {quote_name(table)} DEFAULT"
+        )
+
+        cursor.execute(f"INSERT INTO {quote_name(table)} SELECT * FROM {quote_name(legacy)}")
+        # 旧表的主键、索引和外键名称与新表相同，先删除旧表再重建
+        cursor.execute(f"DROP TABLE {quote_name(legacy)}")
+        cursor.execute(
+            f"ALTER TABLE {quote_name(table)} ADD CONSTRAINT {quote_name(table + '_pkey')} "
+            f"PRIMARY KEY (id, created_at)"
+        )
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) "
+            f"FROM {quote_name(table)}",
+            [table],
+        )
+
+    # 在父表上建立的索引和外键会自动应用到所有分区
+    for field in model._meta.local_fields:
+        if field.primary_key:
+            continue
+        if field.db_index or field.remote_field:
+            schema_editor.execute(schema_editor._create_index_sql(model, fields=[field]))
+        if field.remote_field and field.db_constraint:
+            schema_editor.execute(
+                schema_editor._create_fk_sql(model, field, '_fk_%(to_table)s_%(to_column)s')
+            )
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
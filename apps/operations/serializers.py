@@ -2,12 +2,17 @@
 出入库操作序列化器
 """
 from rest_framework import serializers
-from django.db import transaction
-from .models import InventoryOperation
-from apps.inventory.models import Item
+from django.db.models import Sum
+from common import refdata
+from common.fast_serializers import FullName, MediaURL
+from common.serializers import SparseFieldsMixin
+from common.transactions import immediate_atomic
+from .models import Department, InventoryOperation
+from apps.inventory import stock
+from apps.inventory.models import Item, ItemStock
 
 
-class InventoryOperationSerializer(serializers.ModelSerializer):
+class InventoryOperationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """库存操作序列化器"""
     item_name = serializers.CharField(source='item.name', read_only=True)
     item_code = serializers.CharField(source='item.code', read_only=True)
@@ -25,9 +30,22 @@ class InventoryOperationSerializer(serializers.ModelSerializer):
             'item_warehouse_location', 'operation_type', 'operation_type_display',
             'quantity', 'before_stock', 'after_stock', 'supplier', 'supplier_name',
             'recipient', 'department', 'purpose', 'from_warehouse', 'to_warehouse',
+            'warehouse', 'target_warehouse', 'recipient_department',
             'notes', 'operator', 'operator_name', 'created_at'
         ]
-        read_only_fields = ['before_stock', 'after_stock', 'operator', 'created_at']
+        read_only_fields = [
+            'before_stock', 'after_stock', 'warehouse', 'target_warehouse', 'recipient_department',
+            'operator', 'created_at',
+        ]
+        sparse_sources = {
+            'item_image': ['item.image'],
+            'operator_name': ['operator.first_name', 'operator.last_name'],
+        }
+        # 列表快速路径的取值方式（见 common.fast_serializers）
+        fast_fields = {
+            'item_image': MediaURL('item.image'),
+            'operator_name': FullName('operator'),
+        }
     
     def get_item_image(self, obj):
         """获取物品图片URL"""
@@ -44,7 +62,7 @@ class InventoryOperationSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("数量必须大于0")
         return value
     
-    @transaction.atomic
+    @immediate_atomic
     def create(self, validated_data):
         """创建操作记录并更新库存"""
         request = self.context.get('request')
@@ -56,28 +74,24 @@ class InventoryOperationSerializer(serializers.ModelSerializer):
         if request and hasattr(request, 'user'):
             validated_data['operator'] = request.user
         
-        # 记录操作前库存
-        validated_data['before_stock'] = item.stock
-        
-        # 根据操作类型更新库存
+        # 根据操作类型更新库存（入库/出库使用物品默认仓库，调整直接设置合计）
+        warehouse_id = item.warehouse_id
         if operation_type == 'in':
-            item.stock += quantity
+            before, after = stock.receive(item, item.warehouse, quantity)
         elif operation_type == 'out':
-            if item.stock < quantity:
-                raise serializers.ValidationError("库存不足")
-            item.stock -= quantity
+            before, after, warehouse_id = stock.issue(item, quantity)
         elif operation_type == 'adjust':
-            # 调整为直接设置库存
-            item.stock = quantity
-        
-        # 记录操作后库存
-        validated_data['after_stock'] = item.stock
+            before, after = stock.adjust(item, quantity)
+        else:
+            before = after = item.stock
         
-        # 保存物品和操作记录
-        item.save()
-        operation = super().create(validated_data)
+        # 记录操作前后库存、发生仓库和规范化的领用部门
+        validated_data['before_stock'] = before
+        validated_data['after_stock'] = after
+        validated_data['warehouse_id'] = warehouse_id
+        validated_data['recipient_department'] = Department.resolve(validated_data.get('department'))
         
-        return operation
+        return super().create(validated_data)
 
 
 class InboundSerializer(serializers.Serializer):
@@ -85,59 +99,43 @@ class InboundSerializer(serializers.Serializer):
     item = serializers.PrimaryKeyRelatedField(queryset=Item.objects.all())
     quantity = serializers.IntegerField(min_value=1)
     warehouse = serializers.IntegerField(required=True)  # 入库仓库必选
+    bin = serializers.CharField(max_length=100, required=False, allow_blank=True)  # 仓位，默认沿用物品登记的仓位
     supplier = serializers.IntegerField(required=True)  # 供应商必选
     notes = serializers.CharField(required=False, allow_blank=True)
     
     def validate_supplier(self, value):
-        """验证供应商"""
+        """验证供应商（进程内引用数据，不查询数据库）"""
         if not value:
             raise serializers.ValidationError("请选择供应商")
-        from apps.suppliers.models import Supplier
-        if not Supplier.objects.filter(id=value, status='active').exists():
+        if refdata.table('suppliers.supplier').get(value, status='active') is None:
             raise serializers.ValidationError("供应商不存在或未启用")
         return value
     
     def validate_warehouse(self, value):
-        """验证仓库"""
+        """验证仓库（进程内引用数据，不查询数据库）"""
         if not value:
             raise serializers.ValidationError("请选择入库仓库")
-        from apps.warehouses.models import Warehouse
-        if not Warehouse.objects.filter(id=value, is_active=True).exists():
+        if refdata.table('warehouses.warehouse').get(value, is_active=True) is None:
             raise serializers.ValidationError("仓库不存在或未启用")
         return value
     
     def validate(self, attrs):
         """验证仓库容量"""
-        from apps.warehouses.models import Warehouse
-        quantity = attrs['quantity']
-        warehouse_id = attrs['warehouse']
-        
-        # 获取目标仓库
-        warehouse = Warehouse.objects.get(id=warehouse_id)
+        warehouse = refdata.table('warehouses.warehouse').instance(attrs['warehouse'])
         
         # 检查仓库容量
-        if warehouse.capacity > 0:
-            new_usage = warehouse.current_usage + quantity
-            if new_usage > warehouse.capacity:
-                available = warehouse.capacity - warehouse.current_usage
-                raise serializers.ValidationError(
-                    f"仓库容量不足！\n"
-                    f"仓库：{warehouse.name}\n"
-                    f"容量：{warehouse.capacity}\n"
-                    f"当前使用：{warehouse.current_usage}\n"
-                    f"可用空间：{max(0, available)}\n"
-                    f"入库数量：{quantity}"
-                )
+        error = stock.capacity_error(warehouse, attrs['quantity'])
+        if error:
+            raise serializers.ValidationError(error)
         
         # 保存仓库对象供后续使用
         attrs['warehouse_obj'] = warehouse
         
         return attrs
     
-    @transaction.atomic
+    @immediate_atomic
     def create(self, validated_data):
         """执行入库操作"""
-        from apps.suppliers.models import Supplier
         request = self.context.get('request')
         item = validated_data['item']
         quantity = validated_data['quantity']
@@ -146,35 +144,29 @@ class InboundSerializer(serializers.Serializer):
         
         supplier = None
         if supplier_id:
-            supplier = Supplier.objects.filter(id=supplier_id).first()
+            supplier = refdata.table('suppliers.supplier').instance(supplier_id)
         
         # 获取操作人（如果已登录）
         operator = None
         if request and hasattr(request, 'user') and request.user.is_authenticated:
             operator = request.user
         
-        # 记录原仓库名称（如果有变更）
-        old_warehouse_name = item.warehouse.name if item.warehouse else None
-        notes = validated_data.get('notes', '')
-        if old_warehouse_name and item.warehouse_id != warehouse.id:
-            notes = f"[仓库变更: {old_warehouse_name} → {warehouse.name}] {notes}"
+        # 入库到指定仓库的余额，不再改变物品的默认仓库
+        before, after = stock.receive(item, warehouse, quantity, bin=validated_data.get('bin') or None)
         
         operation = InventoryOperation.objects.create(
             item=item,
             operation_type='in',
             quantity=quantity,
-            before_stock=item.stock,
-            after_stock=item.stock + quantity,
+            before_stock=before,
+            after_stock=after,
             supplier=supplier,
-            notes=notes,
+            to_warehouse=warehouse.name,
+            warehouse=warehouse,
+            notes=validated_data.get('notes', ''),
             operator=operator
         )
         
-        # 更新物品库存和仓库
-        item.stock += quantity
-        item.warehouse = warehouse  # 更新物品所在仓库
-        item.save()
-        
         return operation
 
 
@@ -182,6 +174,7 @@ class OutboundSerializer(serializers.Serializer):
     """出库操作序列化器"""
     item = serializers.PrimaryKeyRelatedField(queryset=Item.objects.all())
     quantity = serializers.IntegerField(min_value=1)
+    warehouse = serializers.IntegerField(required=False, allow_null=True)  # 可选，默认从物品默认仓库优先出库
     recipient = serializers.CharField(max_length=100)
     department = serializers.CharField(max_length=100, required=False, allow_blank=True)
     purpose = serializers.CharField(max_length=200, required=False, allow_blank=True)
@@ -191,38 +184,53 @@ class OutboundSerializer(serializers.Serializer):
         """验证库存是否足够"""
         item = attrs['item']
         quantity = attrs['quantity']
-        if item.stock < quantity:
+        warehouse_id = attrs.get('warehouse')
+        if warehouse_id:
+            warehouse = refdata.table('warehouses.warehouse').instance(warehouse_id)
+            if not warehouse:
+                raise serializers.ValidationError("仓库不存在")
+            available = ItemStock.objects.filter(
+                item=item, warehouse=warehouse
+            ).aggregate(total=Sum('quantity'))['total'] or 0
+            if available < quantity:
+                raise serializers.ValidationError(f"仓库「{warehouse.name}」库存不足，当前库存：{available}")
+            attrs['warehouse_obj'] = warehouse
+        elif item.stock < quantity:
             raise serializers.ValidationError(f"库存不足，当前库存：{item.stock}")
         return attrs
     
-    @transaction.atomic
+    @immediate_atomic
     def create(self, validated_data):
         """执行出库操作"""
         request = self.context.get('request')
         item = validated_data['item']
         quantity = validated_data['quantity']
+        warehouse = validated_data.get('warehouse_obj')
         
         # 获取操作人（如果已登录）
         operator = None
         if request and hasattr(request, 'user') and request.user.is_authenticated:
             operator = request.user
         
+        before, after, source_id = stock.issue(item, quantity, warehouse=warehouse)
+        department = validated_data.get('department', '')
+        
         operation = InventoryOperation.objects.create(
             item=item,
             operation_type='out',
             quantity=quantity,
-            before_stock=item.stock,
-            after_stock=item.stock - quantity,
+            before_stock=before,
+            after_stock=after,
             recipient=validated_data['recipient'],
-            department=validated_data.get('department', ''),
+            department=department,
+            recipient_department=Department.resolve(department),
             purpose=validated_data.get('purpose', ''),
+            from_warehouse=warehouse.name if warehouse else '',
+            warehouse_id=source_id,
             notes=validated_data.get('notes', ''),
             operator=operator
         )
         
-        item.stock -= quantity
-        item.save()
-        
         return operation
 
 
@@ -231,7 +239,9 @@ class TransferSerializer(serializers.Serializer):
     item = serializers.PrimaryKeyRelatedField(queryset=Item.objects.all())
     quantity = serializers.IntegerField(min_value=1)
     from_warehouse = serializers.IntegerField(required=False, allow_null=True)  # 可选，默认使用物品所在仓库
+    from_bin = serializers.CharField(max_length=100, required=False, allow_blank=True)
     to_warehouse = serializers.IntegerField()
+    to_bin = serializers.CharField(max_length=100, required=False, allow_blank=True)
     notes = serializers.CharField(required=False, allow_blank=True)
     
     def validate(self, attrs):
@@ -242,79 +252,81 @@ class TransferSerializer(serializers.Serializer):
         
         # 如果没有提供源仓库，使用物品所在仓库
         from_warehouse_id = attrs.get('from_warehouse')
-        if not from_warehouse_id and item.warehouse:
-            from_warehouse_id = item.warehouse.id
+        if not from_warehouse_id and item.warehouse_id:
+            from_warehouse_id = item.warehouse_id
             attrs['from_warehouse'] = from_warehouse_id
         
         if not from_warehouse_id:
             raise serializers.ValidationError("无法确定源仓库，请选择源仓库或确保物品已分配仓库")
         
-        # 验证源仓库和目标仓库不能相同
-        if from_warehouse_id == to_warehouse_id:
+        # 验证源仓库和目标仓库不能相同（同一仓库内允许在不同仓位之间移库）
+        if from_warehouse_id == to_warehouse_id and (attrs.get('from_bin') or '') == (attrs.get('to_bin') or ''):
             raise serializers.ValidationError("源仓库和目标仓库不能相同")
         
-        # 验证仓库是否存在
-        from apps.warehouses.models import Warehouse
-        if not Warehouse.objects.filter(id=from_warehouse_id, is_active=True).exists():
+        # 验证仓库是否存在（进程内引用数据，不查询数据库）
+        warehouses = refdata.table('warehouses.warehouse')
+        from_warehouse = warehouses.instance(from_warehouse_id, is_active=True)
+        if not from_warehouse:
             raise serializers.ValidationError("源仓库不存在或未启用")
         
-        to_warehouse = Warehouse.objects.filter(id=to_warehouse_id, is_active=True).first()
+        to_warehouse = warehouses.instance(to_warehouse_id, is_active=True)
         if not to_warehouse:
             raise serializers.ValidationError("目标仓库不存在或未启用")
         
-        # 验证库存是否足够
-        if item.stock < quantity:
-            raise serializers.ValidationError(f"库存不足，当前库存：{item.stock}")
+        # 验证源位置库存是否足够（只调拨请求的数量）
+        balances = ItemStock.objects.filter(item=item, warehouse=from_warehouse)
+        if attrs.get('from_bin'):
+            balances = balances.filter(bin=attrs['from_bin'])
+        available = balances.aggregate(total=Sum('quantity'))['total'] or 0
+        if available < quantity:
+            raise serializers.ValidationError(f"源仓库「{from_warehouse.name}」库存不足，当前库存：{available}")
         
-        # 验证目标仓库容量
-        if to_warehouse.capacity > 0:
-            current_usage = to_warehouse.current_usage
-            new_usage = current_usage + quantity
-            available = to_warehouse.capacity - current_usage
-            
-            if new_usage > to_warehouse.capacity:
-                raise serializers.ValidationError(
-                    f"目标仓库容量不足！仓库「{to_warehouse.name}」容量：{to_warehouse.capacity}，已使用：{current_usage}，可用：{max(0, available)}，调拨数量：{quantity}"
-                )
+        # 验证目标仓库容量（同一仓库内移库不占用新容量）
+        if to_warehouse.pk != from_warehouse.pk:
+            error = stock.capacity_error(to_warehouse, quantity)
+            if error:
+                raise serializers.ValidationError(f"目标{error}")
         
-        # 保存目标仓库对象供后续使用
+        # 保存仓库对象供后续使用
+        attrs['from_warehouse_obj'] = from_warehouse
         attrs['to_warehouse_obj'] = to_warehouse
         
         return attrs
     
-    @transaction.atomic
+    @immediate_atomic
     def create(self, validated_data):
         """执行调拨操作"""
-        from apps.warehouses.models import Warehouse
         request = self.context.get('request')
         item = validated_data['item']
         quantity = validated_data['quantity']
-        from_warehouse_id = validated_data['from_warehouse']
-        to_warehouse_id = validated_data['to_warehouse']
-        
-        from_warehouse = Warehouse.objects.get(id=from_warehouse_id)
-        to_warehouse = Warehouse.objects.get(id=to_warehouse_id)
+        from_warehouse = validated_data['from_warehouse_obj']
+        to_warehouse = validated_data['to_warehouse_obj']
         
         # 获取操作人（如果已登录）
         operator = None
         if request and hasattr(request, 'user') and request.user.is_authenticated:
             operator = request.user
         
+        # 只在两个位置之间移动请求的数量，物品合计不变
+        before, after = stock.transfer(
+            item, quantity, from_warehouse, to_warehouse,
+            from_bin=validated_data.get('from_bin') or None,
+            to_bin=validated_data.get('to_bin') or None,
+        )
+        
         # 创建调拨记录
         operation = InventoryOperation.objects.create(
             item=item,
             operation_type='transfer',
             quantity=quantity,
-            before_stock=item.stock,
-            after_stock=item.stock,  # 调拨不改变总库存
+            before_stock=before,
+            after_stock=after,  # 调拨不改变总库存
             from_warehouse=from_warehouse.name,
             to_warehouse=to_warehouse.name,
+            warehouse=from_warehouse,
+            target_warehouse=to_warehouse,
             notes=validated_data.get('notes', ''),
             operator=operator
         )
         
-        # 真正更新物品的仓库！
-        item.warehouse = to_warehouse
-        item.save()
-        
         return operation
@@ -0,0 +1,27 @@
+"""
+出入库操作信号
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from common.cache_versions import track_model_versions
+from . import activity_feed
+from .models import Department, InventoryOperation
+
+
+# 必须先于 track_model_versions 注册：提交后先更新最近活动再递增版本号，
+# 否则并发请求可能用新版本号的 ETag 缓存旧的活动列表
+@receiver(post_save, sender=InventoryOperation, dispatch_uid='operations_activity_feed')
+def update_activity_feed(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """新记录追加到最近活动，软删除时移除"""
+    if raw:
+        return
+    if created:
+        activity_feed.append_on_commit(instance)
+    elif instance.is_deleted and (update_fields is None or 'is_deleted' in update_fields):
+        activity_feed.remove_on_commit([instance.pk])
+
+
+# 数据变化时递增缓存版本号（ETag、仪表盘缓存依赖）
+track_model_versions(InventoryOperation)
+track_model_versions(Department)
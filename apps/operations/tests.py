@@ -1,6 +1,329 @@
 """
 出入库操作测试
 """
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# 在这里编写你的测试用例
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from common.testing import ApiBudgetTestCase
+
+from . import activity_feed, archive, partitions
+from .models import ArchivedOperation, Department, InventoryOperation, OperationArchive
+
+
+class OperationQueryBudgetTests(ApiBudgetTestCase):
+    """出入库接口在多行数据下不超出查询预算"""
+
+    def test_endpoints_declare_budget(self):
+        self.assertEndpointsBudgeted('api/operations/')
+
+    def test_read_endpoints(self):
+        operation = InventoryOperation.objects.first()
+        response = self.assertOk(self.client.get('/api/operations/'))
+        self.assertEqual(response.json()['data']['count'], self.ITEM_COUNT * 3)
+        self.assertOk(self.client.get(f'/api/operations/?item={self.items[0].pk}'))
+        self.assertOk(self.client.get('/api/operations/recent/'))
+        self.assertOk(self.client.get('/api/operations/statistics/'))
+        self.assertOk(self.client.get(f'/api/operations/{operation.pk}/'))
+
+    def test_write_endpoints(self):
+        item, warehouse = self.items[0], self.warehouses[0]
+        self.assertOk(self.client.post('/api/operations/', {
+            'item': item.pk, 'operation_type': 'in', 'quantity': 1,
+        }, format='json'))
+        self.assertOk(self.client.post('/api/operations/inbound/', {
+            'item': item.pk, 'quantity': 1, 'warehouse': warehouse.pk, 'supplier': self.suppliers[0].pk,
+        }, format='json'))
+        self.assertOk(self.client.post('/api/operations/outbound/', {
+            'item': item.pk, 'quantity': 1, 'recipient': '员工',
+        }, format='json'))
+        self.assertOk(self.client.post('/api/operations/transfer/', {
+            'item': item.pk, 'quantity': 1, 'from_warehouse': warehouse.pk, 'to_warehouse': self.warehouses[1].pk,
+        }, format='json'))
+        operation = InventoryOperation.objects.filter(item=item).first()
+        self.assertOk(self.client.patch(f'/api/operations/{operation.pk}/', {'notes': '备注'}, format='json'))
+
+    def test_delete_endpoints(self):
+        first, *rest = InventoryOperation.objects.values_list('id', flat=True)
+        self.assertOk(self.client.post(
+            f'/api/operations/{first}/delete_with_password/', {'password': 'admin123'}, format='json'
+        ))
+        response = self.assertOk(self.client.post('/api/operations/batch_delete_with_password/', {
+            'password': 'admin123', 'ids': [first, *rest[:6]],
+        }, format='json'))
+        self.assertEqual(InventoryOperation.objects.filter(is_deleted=False).count(), self.ITEM_COUNT * 3 - 7)
+        data = response.json()['data']
+        self.assertEqual((data['success_count'], data['failed_count']), (6, 1))
+
+
+class OperationStatisticsTests(ApiBudgetTestCase):
+    """操作统计的时间范围参数"""
+
+    def stats(self, days):
+        return self.assertOk(self.client.get(f'/api/operations/statistics/?days={days}')).json()['data']
+
+    def test_days(self):
+        total = InventoryOperation.objects.count()
+        # 超出时间桶上限的长范围与按天聚合的结果一致
+        for days in (7, 1100, 1101, 3650):
+            stats = self.stats(days)
+            self.assertEqual(stats['total_operations'], total, days)
+            self.assertEqual(stats['inbound_quantity'], self.ITEM_COUNT * 10, days)
+            self.assertEqual(stats['outbound_count'], self.ITEM_COUNT, days)
+        self.assertEqual(self.stats(0)['total_operations'], 0)
+        for days in ('abc', '-1', '1.5'):
+            response = self.client.get(f'/api/operations/statistics/?days={days}')
+            self.assertEqual(response.status_code, 400, days)
+
+
+class ActivityFeedTests(ApiBudgetTestCase):
+    """最近活动：写入时追加、软删除时移除，读取不查询数据库"""
+
+    def feed_ids(self, limit=10):
+        return [entry['id'] for entry in activity_feed.recent(limit)]
+
+    def latest_ids(self, limit=10):
+        return list(
+            InventoryOperation.objects.filter(is_deleted=False)
+            .order_by('-created_at', '-id').values_list('id', flat=True)[:limit]
+        )
+
+    def test_rebuilds_when_cache_is_empty(self):
+        self.assertIsNone(cache.get(activity_feed.HEAD_KEY))
+        expected = self.latest_ids()
+        self.assertEqual(self.feed_ids(), expected)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.feed_ids(), expected)
+        self.assertEqual([query for query in queries if 'django_cache' not in query['sql']], [])
+
+    def test_append_and_remove_on_commit(self):
+        activity_feed.rebuild()
+        item = self.items[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertOk(self.client.post('/api/operations/outbound/', {
+                'item': item.pk, 'quantity': 1, 'recipient': '员工',
+            }, format='json'))
+        newest = activity_feed.recent(1)[0]
+        self.assertEqual(newest['id'], self.latest_ids(1)[0])
+        self.assertEqual((newest['operation_type'], newest['item_code']), ('out', item.code))
+        self.assertEqual(self.feed_ids(), self.latest_ids())
+
+        first, second, third = self.latest_ids(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertOk(self.client.post(
+                f'/api/operations/{first}/delete_with_password/', {'password': 'admin123'}, format='json'
+            ))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertOk(self.client.post('/api/operations/batch_delete_with_password/', {
+                'password': 'admin123', 'ids': [second, third],
+            }, format='json'))
+        self.assertEqual(self.feed_ids(5), self.latest_ids(5))
+        self.assertNotIn(first, self.feed_ids(activity_feed.get_size()))
+
+    def test_capped_at_size(self):
+        with self.settings(ACTIVITY_FEED={'SIZE': 5}):
+            activity_feed.rebuild()
+            for _ in range(3):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.assertOk(self.client.post('/api/operations/inbound/', {
+                        'item': self.items[1].pk, 'quantity': 1, 'warehouse': self.warehouses[0].pk,
+                        'supplier': self.suppliers[0].pk,
+                    }, format='json'))
+            self.assertEqual(self.feed_ids(10), self.latest_ids(5))
+
+    def test_racing_appends(self):
+        activity_feed.rebuild()
+        head = cache.get(activity_feed.HEAD_KEY)
+        with self.captureOnCommitCallbacks() as callbacks:
+            for item in self.items[:2]:
+                self.assertOk(self.client.post('/api/operations/outbound/', {
+                    'item': item.pk, 'quantity': 1, 'recipient': '员工',
+                }, format='json'))
+        appends = [callback for callback in callbacks if 'append' in callback.__qualname__]
+        self.assertEqual(len(appends), 2)
+        # 两个事务读到同一个头部记录，且后提交的记录先写入
+        for callback in reversed(appends):
+            cache.set(activity_feed.HEAD_KEY, head, None)
+            callback()
+        self.assertEqual(self.feed_ids(), self.latest_ids())
+
+    def test_rebuilds_when_slots_are_evicted(self):
+        newest = activity_feed.rebuild()[0]
+        cache.delete(f'{activity_feed.KEY_PREFIX}slot:{newest["id"] % activity_feed.get_size()}')
+        self.assertEqual(self.feed_ids(), self.latest_ids())
+        self.assertEqual(self.feed_ids(), self.latest_ids())
+
+    def test_rebuild_keeps_newer_entry_on_slot_collision(self):
+        with self.settings(ACTIVITY_FEED={'SIZE': 5}):
+            # 软删除在 ID 中留下空缺，最新 5 条未删除记录跨越超过 5 个 ID
+            InventoryOperation.objects.filter(pk__in=self.latest_ids(3)[1:]).update(is_deleted=True)
+            entries = activity_feed.rebuild()
+            self.assertEqual([entry['id'] for entry in entries], self.latest_ids(len(entries)))
+            self.assertEqual(self.feed_ids(), self.latest_ids(len(entries)))
+
+
+class OperationSnapshotTests(ApiBudgetTestCase):
+    """写入时记录发生仓库、调拨目标仓库和规范化的领用部门"""
+
+    def test_fixture_operations(self):
+        item = self.items[1]
+        rows = {
+            row['operation_type']: row
+            for row in InventoryOperation.objects.filter(item=item).values(
+                'operation_type', 'warehouse_id', 'target_warehouse_id', 'recipient_department_id'
+            )
+        }
+        self.assertEqual(rows['in']['warehouse_id'], item.warehouse_id)
+        self.assertEqual(rows['out']['warehouse_id'], item.warehouse_id)
+        self.assertEqual(rows['transfer']['warehouse_id'], item.warehouse_id)
+        self.assertEqual(rows['transfer']['target_warehouse_id'], self.warehouses[2].pk)
+        self.assertIsNone(rows['out']['recipient_department_id'])
+
+    def test_outbound_records_source_and_department(self):
+        item, other = self.items[0], self.warehouses[1]
+        for department in (' 研发部 ', '研发部'):
+            response = self.assertOk(self.client.post('/api/operations/outbound/', {
+                'item': item.pk, 'quantity': 1, 'recipient': '员工', 'department': department,
+                'warehouse': other.pk,
+            }, format='json'))
+            data = response.json()['data']
+            self.assertEqual(data['warehouse'], other.pk)
+        department = Department.objects.get()
+        self.assertEqual(department.name, '研发部')
+        self.assertEqual(data['recipient_department'], department.pk)
+
+        # 物品更换默认仓库后，历史记录仍按发生时的仓库统计
+        item.warehouse = self.warehouses[2]
+        item.save()
+        response = self.assertOk(self.client.get(
+            '/api/reports/timeseries/?granularity=day&periods=1&operation_type=out'
+            f'&item={item.pk}&warehouse={other.pk}'
+        ))
+        self.assertEqual(sum(response.json()['data']['series'][0]['count']), 2)
+        response = self.assertOk(self.client.get(
+            f'/api/reports/timeseries/?granularity=day&periods=1&department={department.pk}'
+        ))
+        self.assertEqual(sum(response.json()['data']['series'][0]['count']), 2)
+
+
+class OperationFilterTests(ApiBudgetTestCase):
+    """列表过滤条件在数据库中执行"""
+
+    def ids(self, query):
+        response = self.assertOk(self.client.get(f'/api/operations/?page_size=100&{query}'))
+        return {row['id'] for row in response.json()['data']['results']}
+
+    def expected(self, **filters):
+        return set(InventoryOperation.objects.filter(**filters).values_list('id', flat=True))
+
+    def test_date_range(self):
+        today = timezone.localdate()
+        old = InventoryOperation.objects.filter(item=self.items[0]).first()
+        InventoryOperation.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=10))
+        self.assertNotIn(old.pk, self.ids(f'start={today}'))
+        self.assertEqual(self.ids(f'end={today - timedelta(days=1)}'), {old.pk})
+        self.assertEqual(
+            self.ids(f'start={today - timedelta(days=10)}&end={today - timedelta(days=10)}'), {old.pk}
+        )
+
+    def test_warehouse_operator_department(self):
+        warehouse = self.warehouses[1]
+        historical = self.ids(f'warehouse={warehouse.pk}')
+        self.assertEqual(
+            historical,
+            self.expected(warehouse=warehouse) | self.expected(target_warehouse=warehouse),
+        )
+        self.assertEqual(self.ids(f'item_warehouse={warehouse.pk}'), self.expected(item__warehouse=warehouse))
+        self.assertEqual(self.ids(f'operator={self.user.pk}'), self.expected())
+        response = self.assertOk(self.client.post('/api/operations/outbound/', {
+            'item': self.items[0].pk, 'quantity': 1, 'recipient': '员工', 'department': '研发部',
+        }, format='json'))
+        department = Department.objects.get()
+        self.assertEqual(self.ids(f'department={department.pk}'), {response.json()['data']['id']})
+
+    def test_deleted_state(self):
+        first = InventoryOperation.objects.first()
+        InventoryOperation.objects.filter(pk=first.pk).update(is_deleted=True)
+        self.assertNotIn(first.pk, self.ids(''))
+        self.assertNotIn(first.pk, self.ids('deleted=false'))
+        self.assertEqual(self.ids('deleted=true'), {first.pk})
+        self.assertEqual(self.ids('deleted=all'), self.expected())
+        # 详情等其他操作只处理未删除的记录
+        self.assertEqual(self.client.get(f'/api/operations/{first.pk}/').status_code, 404)
+
+    def test_filters_use_composite_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('只检查 SQLite 的查询计划')
+        since = timezone.now() - timedelta(days=30)
+        base = InventoryOperation.objects.filter(is_deleted=False, created_at__gte=since)
+        for filters, index in (
+            ({'item': self.items[0]}, 'ops_item_created_idx'),
+            ({'operator': self.user}, 'ops_operator_created_idx'),
+            ({'warehouse': self.warehouses[0]}, 'ops_warehouse_created_idx'),
+        ):
+            with self.subTest(index=index):
+                self.assertIn(index, base.filter(**filters).order_by('-created_at')[:20].explain())
+
+
+class ArchiveTests(ApiBudgetTestCase):
+    """按月归档：分批导出、最终短事务移出热表"""
+
+    def setUp(self):
+        super().setUp()
+        self.month = partitions.month_start(timezone.localdate())
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.config = {**archive.get_archive_config(), 'BATCH_SIZE': 5, 'DIRECTORY': self.directory.name}
+        self.total = InventoryOperation.objects.count()
+
+    def test_table_storage_in_batches(self):
+        # 模拟之前中途失败的归档：部分记录已复制到归档表但仍在热表中
+        start, end = partitions.month_bounds(self.month)
+        archive._copy_to_table(start, end, 5)
+
+        manifest = archive.archive_month(self.month, storage='table', config=self.config)
+        self.assertEqual(manifest.row_count, self.total)
+        self.assertEqual(ArchivedOperation.objects.count(), self.total)
+        self.assertFalse(InventoryOperation.objects.exists())
+
+    def test_file_storage_appends_to_existing_archive(self):
+        first = archive.archive_month(self.month, storage='file', config=self.config)
+        self.assertEqual(first.row_count, self.total)
+        self.assertFalse(InventoryOperation.objects.exists())
+
+        self.assertOk(self.client.post('/api/operations/inbound/', {
+            'item': self.items[0].pk, 'quantity': 1, 'supplier': self.suppliers[0].pk,
+            'warehouse': self.warehouses[0].pk,
+        }, format='json'))
+        second = archive.archive_month(self.month, storage='file', config=self.config)
+        rows = list(archive.iter_archived_operations(second))
+        self.assertEqual(second.row_count, self.total + 1)
+        self.assertEqual(len({row['id'] for row in rows}), self.total + 1)
+        self.assertEqual(second.summary['in']['count'], self.ITEM_COUNT + 1)
+
+    def test_change_during_export_aborts(self):
+        export = archive._export_file
+
+        def export_and_soft_delete(*args, **kwargs):
+            result = export(*args, **kwargs)
+            InventoryOperation.objects.filter(pk=InventoryOperation.objects.first().pk).update(
+                is_deleted=True, deleted_at=timezone.now()
+            )
+            return result
+
+        with mock.patch.object(archive, '_export_file', export_and_soft_delete):
+            with self.assertRaises(ValueError):
+                archive.archive_month(self.month, storage='file', config=self.config)
+        self.assertEqual(InventoryOperation.objects.count(), self.total)
+        self.assertFalse(OperationArchive.objects.exists())
+        self.assertFalse(archive._file_path(self.month, self.config).exists())
+        self.assertFalse(any(archive._file_path(self.month, self.config).parent.iterdir()))
+
+        # 重新运行即可完成归档
+        manifest = archive.archive_month(self.month, storage='file', config=self.config)
+        self.assertEqual(manifest.row_count, self.total)
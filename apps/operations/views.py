@@ -3,12 +3,14 @@
 """
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum, Count
-from datetime import datetime, timedelta
+from datetime import timedelta
 
+from . import activity_feed
+from .filters import OperationFilter
 from .models import InventoryOperation
 from .serializers import (
     InventoryOperationSerializer,
@@ -16,34 +18,42 @@ from .serializers import (
     OutboundSerializer,
     TransferSerializer
 )
+from common.conditional import ConditionalGetMixin
+from common.mixins import FastListMixin, SparseFieldsetMixin
 from common.responses import APIResponse
 from common.pagination import StandardPagination
 
 
-class InventoryOperationViewSet(viewsets.ModelViewSet):
+class InventoryOperationViewSet(ConditionalGetMixin, SparseFieldsetMixin, FastListMixin, viewsets.ModelViewSet):
     """库存操作视图集"""
     queryset = InventoryOperation.objects.select_related(
         'item', 'item__warehouse', 'item__category', 'supplier', 'operator'
-    ).filter(is_deleted=False)  # 默认只显示未删除的记录
+    )
     serializer_class = InventoryOperationSerializer
     permission_classes = [IsAuthenticated]  # 需要登录
     pagination_class = StandardPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['operation_type', 'item', 'supplier']
+    filterset_class = OperationFilter
     search_fields = ['item__name', 'item__code', 'recipient', 'department']
     ordering_fields = ['created_at']
     ordering = ['-created_at']
+    conditional_models = (
+        'operations.inventoryoperation', 'inventory.item', 'suppliers.supplier', 'warehouses.warehouse'
+    )
+    conditional_actions = ('list', 'retrieve', 'recent')  # statistics 按时间窗口滚动，不做条件请求
+    query_budgets = {
+        'list': 5, 'retrieve': 4, 'recent': 4, 'statistics': 4,
+        'create': 12, 'inbound': 16, 'outbound': 12, 'transfer': 16,
+        'update': 5, 'partial_update': 5, 'destroy': 5,
+        'delete_with_password': 7, 'batch_delete_with_password': 6,
+    }
     
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(queryset)
-        
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return APIResponse.success(data=serializer.data)
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # 列表默认只显示未删除的记录（由 OperationFilter 的 deleted 参数控制），其他操作只处理未删除的记录
+        if self.action != 'list':
+            queryset = queryset.filter(is_deleted=False)
+        return queryset
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data, context={'request': request})
@@ -56,30 +66,12 @@ class InventoryOperationViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(instance)
         return APIResponse.success(data=serializer.data)
     
-    def _clear_dashboard_cache(self):
-        """清除仪表盘相关缓存"""
-        from django.core.cache import cache
-        cache_keys = [
-            'dashboard_overview',
-            'dashboard_low_stock',
-            'dashboard_distribution',
-            'dashboard_charts_7',
-            'dashboard_charts_30',
-            'dashboard_trend_month',
-            'dashboard_trend_quarter',
-            'dashboard_trend_year',
-            'dashboard_activities_10',
-        ]
-        for key in cache_keys:
-            cache.delete(key)
-    
     @action(detail=False, methods=['post'])
     def inbound(self, request):
         """入库操作"""
         serializer = InboundSerializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         operation = serializer.save()
-        self._clear_dashboard_cache()  # 清除仪表盘缓存
         result = InventoryOperationSerializer(operation).data
         return APIResponse.success(data=result, message="入库成功")
     
@@ -89,7 +81,6 @@ class InventoryOperationViewSet(viewsets.ModelViewSet):
         serializer = OutboundSerializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         operation = serializer.save()
-        self._clear_dashboard_cache()  # 清除仪表盘缓存
         result = InventoryOperationSerializer(operation).data
         return APIResponse.success(data=result, message="出库成功")
     
@@ -99,7 +90,6 @@ class InventoryOperationViewSet(viewsets.ModelViewSet):
         serializer = TransferSerializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         operation = serializer.save()
-        self._clear_dashboard_cache()  # 清除仪表盘缓存
         result = InventoryOperationSerializer(operation).data
         return APIResponse.success(data=result, message="调拨成功")
     
@@ -109,28 +99,46 @@ class InventoryOperationViewSet(viewsets.ModelViewSet):
         
         注意：报表统计包含所有记录（包括已删除的），防止通过删除记录做假账
         """
-        # 获取时间范围参数
-        days = int(request.query_params.get('days', 7))
-        start_date = datetime.now() - timedelta(days=days)
+        from datetime import datetime, time
+        from django.db.models import Count, Sum
+        from django.utils import timezone
+        from apps.reports import timeseries
         
-        # 报表统计包含所有记录（包括已删除的），防止做假账
-        queryset = InventoryOperation.objects.filter(
-            created_at__gte=start_date,
-            # 不过滤 is_deleted，报表包含所有历史记录
-        )
+        # 获取时间范围参数（最近 days 天，含今天；0 表示不统计）
+        value = request.query_params.get('days', '7')
+        if not value.isdigit():
+            raise ValidationError({'days': '必须是非负整数'})
+        days = int(value)
+        today = timezone.localdate()
+        start = today - timedelta(days=days - 1)
         
-        # 统计各类型操作数量
+        # 报表统计包含所有记录（包括已删除的），防止做假账
+        if days == 0:
+            counts, quantities = {}, {}
+        elif days <= timeseries.MAX_BUCKETS:
+            # 按天聚合，已结束的日期读取时间桶缓存
+            series = timeseries.aggregate(
+                'day', start, today, measures=('count', 'quantity'), dimension='type',
+            )
+            counts, quantities = series.totals('count'), series.totals('quantity')
+        else:
+            # 超出时间桶上限的长范围只需要合计，一次按类型分组的聚合
+            rows = (
+                InventoryOperation.objects.filter(
+                    created_at__gte=timezone.make_aware(datetime.combine(start, time.min))
+                )
+                .order_by().values('operation_type')
+                .annotate(count=Count('id'), quantity=Sum('quantity'))
+            )
+            counts = {row['operation_type']: row['count'] for row in rows}
+            quantities = {row['operation_type']: row['quantity'] or 0 for row in rows}
         stats = {
-            'total_operations': queryset.count(),
-            'inbound_count': queryset.filter(operation_type='in').count(),
-            'outbound_count': queryset.filter(operation_type='out').count(),
-            'transfer_count': queryset.filter(operation_type='transfer').count(),
-            'inbound_quantity': queryset.filter(operation_type='in').aggregate(
-                total=Sum('quantity')
-            )['total'] or 0,
-            'outbound_quantity': queryset.filter(operation_type='out').aggregate(
-                total=Sum('quantity')
-            )['total'] or 0,
+            'total_operations': sum(counts.values()),
+            'inbound_count': counts.get('in', 0),
+            'outbound_count': counts.get('out', 0),
+            'transfer_count': counts.get('transfer', 0),
+            'inbound_quantity': quantities.get('in', 0),
+            'outbound_quantity': quantities.get('out', 0),
         }
         
         return APIResponse.success(data=stats)
@@ -139,7 +147,7 @@ class InventoryOperationViewSet(viewsets.ModelViewSet):
     def recent(self, request):
         """获取最近操作记录"""
         limit = int(request.query_params.get('limit', 10))
-        queryset = self.get_queryset()[:limit]
+        queryset = self.project_queryset(self.get_queryset())[:limit]
         serializer = self.get_serializer(queryset, many=True)
         return APIResponse.success(data=serializer.data)
     
@@ -229,33 +237,52 @@ class InventoryOperationViewSet(viewsets.ModelViewSet):
         
         # 软删除：标记为已删除，但不真正删除记录
         from django.utils import timezone
+        from apps.reports import timeseries
+        from common.cache_versions import bump_version_on_commit
         success_count = 0
         failed_count = 0
         errors = []
         
+        valid_ids = []
         for operation_id in ids:
             try:
-                # 使用 all() 查询，包括已删除的记录，以便可以"恢复"删除
-                operation = InventoryOperation.objects.all().get(id=operation_id)
-                
-                # 如果已经删除，跳过
-                if operation.is_deleted:
-                    failed_count += 1
-                    errors.append(f"记录ID {operation_id} 已被删除")
-                    continue
-                
-                # 软删除：标记为已删除
-                operation.is_deleted = True
-                operation.deleted_at = timezone.now()
-                operation.deleted_by = request.user
-                operation.save(update_fields=['is_deleted', 'deleted_at', 'deleted_by'])
-                success_count += 1
-            except InventoryOperation.DoesNotExist:
+                valid_ids.append(int(operation_id))
+            except (TypeError, ValueError):
+                failed_count += 1
+                errors.append(f"记录ID {operation_id} 不存在")
+        
+        # 一次查出所有记录的删除状态和操作时间（使用 all()，包括已删除的记录）
+        records = {
+            operation_id: (is_deleted, created_at)
+            for operation_id, is_deleted, created_at in InventoryOperation.objects.filter(
+                id__in=valid_ids
+            ).values_list('id', 'is_deleted', 'created_at')
+        }
+        deleted_state = {operation_id: state[0] for operation_id, state in records.items()}
+        to_delete = []
+        for operation_id in valid_ids:
+            if operation_id not in deleted_state:
                 failed_count += 1
                 errors.append(f"记录ID {operation_id} 不存在")
-            except Exception as e:
+            elif deleted_state[operation_id] or operation_id in to_delete:
+                # 如果已经删除（或重复提交），跳过
                 failed_count += 1
-                errors.append(f"删除记录ID {operation_id} 失败: {str(e)}")
+                errors.append(f"记录ID {operation_id} 已被删除")
+            else:
+                to_delete.append(operation_id)
+        
+        if to_delete:
+            # 软删除：一条 UPDATE 标记为已删除（条件更新，并发重复删除不会重复计数）
+            success_count = InventoryOperation.objects.filter(
+                id__in=to_delete, is_deleted=False
+            ).update(is_deleted=True, deleted_at=timezone.now(), deleted_by=request.user)
+            failed_count += len(to_delete) - success_count
+            # update() 不触发信号，手动移除最近活动并使缓存版本、所在的时间桶失效
+            activity_feed.remove_on_commit(to_delete)
+            timeseries.invalidate_on_commit(
+                timezone.localdate(records[operation_id][1]) for operation_id in to_delete
+            )
+            bump_version_on_commit('operations.inventoryoperation')
         
         message = f"✅ 成功标记删除 {success_count} 条操作记录"
         if failed_count > 0:
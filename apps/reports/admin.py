@@ -2,5 +2,13 @@
 报表分析管理后台
 """
 from django.contrib import admin
+from .models import ItemForecast
 
-# 在这里注册你的模型到管理后台
+
+@admin.register(ItemForecast)
+class ItemForecastAdmin(admin.ModelAdmin):
+    """消耗预测"""
+    list_display = ['item', 'daily_rate', 'demand_std', 'days_of_cover', 'reorder_point', 'reorder_quantity', 'last_day']
+    list_select_related = ['item']
+    search_fields = ['item__name', 'item__code']
+    readonly_fields = ['ema_rate', 'ema_square', 'observed_days', 'last_day', 'updated_at']
@@ -0,0 +1,215 @@
+"""
+ABC / XYZ 库存分类分析
+
+ABC：按价值占比排序，累计占比前 80% 为 A 类、80%~95% 为 B 类、其余为 C 类。
+XYZ：按月需求变异系数（标准差 / 均值）划分，≤0.5 为 X 类（稳定）、≤1.0 为 Y 类、其余（含无需求）为 Z 类。
+
+物品只读取一次 values_list 投影（流式迭代，不创建模型实例），出库量由数据库按 (物品, 月份) 聚合，
+排序、累计求和、分组统计全部在 NumPy 中向量化完成。
+"""
+from datetime import date, datetime, time
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from apps.inventory.models import Category, Item
+from apps.operations.models import InventoryOperation
+from apps.warehouses.models import Warehouse
+
+DEFAULTS = {
+    'ABC_THRESHOLDS': (0.8, 0.95),
+    'XYZ_THRESHOLDS': (0.5, 1.0),
+    'MONTHS': 12,
+    'CURVE_POINTS': 100,
+    'CHUNK_SIZE': 20000,
+}
+
+ABC_CLASSES = ['A', 'B', 'C']
+XYZ_CLASSES = ['X', 'Y', 'Z']
+BASIS_CHOICES = ('consumption', 'stock')
+
+ITEM_DTYPE = np.dtype([
+    ('id', np.int64),
+    ('category', np.int64),
+    ('warehouse', np.int64),
+    ('price', np.float64),
+    ('stock', np.float64),
+])
+
+
+def get_analytics_config():
+    return {**DEFAULTS, **getattr(settings, 'ABC_XYZ', {})}
+
+
+def _month_index(day):
+    return day.year * 12 + day.month - 1
+
+
+def _load_items(chunk_size):
+    """流式读取物品投影到结构化数组"""
+    rows = (
+        Item.objects.order_by('id')
+        .values_list('id', 'category_id', 'warehouse_id', 'price', 'stock')
+        .iterator(chunk_size=chunk_size)
+    )
+    return np.fromiter(
+        ((pk, category, warehouse, float(price), stock) for pk, category, warehouse, price, stock in rows),
+        dtype=ITEM_DTYPE,
+    )
+
+
+def _load_monthly_demand(ids, months, chunk_size):
+    """最近 months 个完整自然月的出库量，返回每个物品的月需求合计、平方和与统计区间"""
+    current = _month_index(timezone.localdate())
+    first = current - months
+    period_start = date(first // 12, first % 12 + 1, 1)
+    period_end = date(current // 12, current % 12 + 1, 1)
+    rows = (
+        # 不过滤 is_deleted，报表包含所有历史记录
+        InventoryOperation.objects.filter(
+            operation_type='out',
+            created_at__gte=timezone.make_aware(datetime.combine(period_start, time.min)),
+            created_at__lt=timezone.make_aware(datetime.combine(period_end, time.min)),
+        )
+        .annotate(month=TruncMonth('created_at'))
+        .order_by()
+        .values_list('item_id', 'month')
+        .annotate(total=Sum('quantity'))
+        .iterator(chunk_size=chunk_size)
+    )
+    demand = np.fromiter(
+        ((item_id, total) for item_id, _month, total in rows),
+        dtype=[('item', np.int64), ('total', np.float64)],
+    )
+    if len(ids):
+        index = np.clip(np.searchsorted(ids, demand['item']), 0, len(ids) - 1)
+        known = ids[index] == demand['item']
+        index, demand = index[known], demand[known]
+    else:
+        index = np.zeros(0, dtype=np.int64)
+
+    total = np.bincount(index, weights=demand['total'], minlength=len(ids))
+    square = np.bincount(index, weights=demand['total'] ** 2, minlength=len(ids))
+    return total, square, (period_start, period_end)
+
+
+def _classify_abc(values, thresholds):
+    """按价值降序累计占比分类，返回 (分类下标, 降序累计占比)"""
+    order = np.argsort(-values, kind='stable')
+    sorted_values = values[order]
+    total = sorted_values.sum()
+    cumulative = np.cumsum(sorted_values) / total if total > 0 else np.zeros(len(values))
+    # 按加入该物品之前的累计占比判断，跨越阈值的物品归入上一档
+    before = cumulative - (sorted_values / total if total > 0 else 0)
+    sorted_classes = np.searchsorted(np.asarray(thresholds), before, side='right')
+    sorted_classes[sorted_values <= 0] = len(ABC_CLASSES) - 1
+    classes = np.empty(len(values), dtype=np.int64)
+    classes[order] = sorted_classes
+    return classes, cumulative
+
+
+def _classify_xyz(total, square, months, thresholds):
+    mean = total / months
+    variance = np.clip(square / months - mean ** 2, 0, None)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cv = np.where(mean > 0, np.sqrt(variance) / mean, np.inf)
+    return np.searchsorted(np.asarray(thresholds), cv, side='left'), cv
+
+
+def _value_curve(cumulative, points):
+    """帕累托曲线：前 x% 物品贡献的价值占比"""
+    count = len(cumulative)
+    if not count:
+        return []
+    shares = np.linspace(0, 1, points + 1)
+    positions = np.ceil(shares * count).astype(np.int64)
+    values = np.where(positions > 0, cumulative[np.clip(positions - 1, 0, count - 1)], 0.0)
+    return [
+        {'item_share': round(float(share) * 100, 2), 'value_share': round(float(value) * 100, 2)}
+        for share, value in zip(shares, values)
+    ]
+
+
+def _breakdown(group_ids, abc, xyz, values, names):
+    """按分组（类别/仓库）统计各分类的物品数和价值"""
+    keys, inverse = np.unique(group_ids, return_inverse=True)
+    size = len(keys)
+    counts_abc = np.bincount(inverse * 3 + abc, minlength=size * 3).reshape(size, 3)
+    counts_xyz = np.bincount(inverse * 3 + xyz, minlength=size * 3).reshape(size, 3)
+    value_abc = np.bincount(inverse * 3 + abc, weights=values, minlength=size * 3).reshape(size, 3)
+    result = []
+    for row, key in enumerate(keys):
+        result.append({
+            'id': int(key),
+            'name': names.get(int(key), ''),
+            'item_count': int(counts_abc[row].sum()),
+            'value': round(float(value_abc[row].sum()), 2),
+            'abc': {
+                label: {'count': int(counts_abc[row, i]), 'value': round(float(value_abc[row, i]), 2)}
+                for i, label in enumerate(ABC_CLASSES)
+            },
+            'xyz': {label: int(counts_xyz[row, i]) for i, label in enumerate(XYZ_CLASSES)},
+        })
+    result.sort(key=lambda entry: entry['value'], reverse=True)
+    return result
+
+
+def compute_classification(basis='consumption', months=None):
+    """计算全部物品的 ABC/XYZ 分类汇总
+
+    basis='consumption' 按统计期内出库金额（出库量 × 单价）分类，basis='stock' 按当前库存金额分类。
+    """
+    config = get_analytics_config()
+    months = months or config['MONTHS']
+    items = _load_items(config['CHUNK_SIZE'])
+    ids = items['id']
+    total, square, (period_start, period_end) = _load_monthly_demand(ids, months, config['CHUNK_SIZE'])
+
+    if basis == 'stock':
+        values = items['price'] * items['stock']
+    else:
+        values = items['price'] * total
+
+    abc, cumulative = _classify_abc(values, config['ABC_THRESHOLDS'])
+    xyz, _cv = _classify_xyz(total, square, months, config['XYZ_THRESHOLDS'])
+
+    total_value = float(values.sum())
+    abc_counts = np.bincount(abc, minlength=3)
+    abc_values = np.bincount(abc, weights=values, minlength=3)
+    matrix = np.bincount(abc * 3 + xyz, minlength=9).reshape(3, 3)
+
+    return {
+        'basis': basis,
+        'period': {'start': period_start.isoformat(), 'end': period_end.isoformat(), 'months': months},
+        'total_items': int(len(ids)),
+        'total_value': round(total_value, 2),
+        'abc': [
+            {
+                'class': label,
+                'count': int(abc_counts[i]),
+                'value': round(float(abc_values[i]), 2),
+                'value_share': round(float(abc_values[i]) / total_value * 100, 2) if total_value else 0,
+            }
+            for i, label in enumerate(ABC_CLASSES)
+        ],
+        'xyz': [
+            {'class': label, 'count': int(count)}
+            for label, count in zip(XYZ_CLASSES, np.bincount(xyz, minlength=3))
+        ],
+        'matrix': {
+            a: {x: int(matrix[i, j]) for j, x in enumerate(XYZ_CLASSES)}
+            for i, a in enumerate(ABC_CLASSES)
+        },
+        'curve': _value_curve(cumulative, config['CURVE_POINTS']),
+        'by_category': _breakdown(
+            items['category'], abc, xyz, values,
+            dict(Category.objects.values_list('id', 'name')),
+        ),
+        'by_warehouse': _breakdown(
+            items['warehouse'], abc, xyz, values,
+            dict(Warehouse.objects.values_list('id', 'name')),
+        ),
+    }
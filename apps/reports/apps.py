@@ -5,3 +5,6 @@ class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reports'
     verbose_name = '报表分析'
+
+    def ready(self):
+        from . import signals  # noqa: F401
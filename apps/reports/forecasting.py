@@ -0,0 +1,201 @@
+"""
+物品消耗预测与补货建议
+
+按物品 ID 分块，每块用一次聚合查询取出 (物品, 日期) 的出库量，填入 NumPy 矩阵后
+对整块物品做向量化的指数平滑，计算日均消耗、波动、可用天数、再订货点和建议采购量。
+
+指数平滑状态（平滑值、平方平滑值、已观测天数、截止日期）保存在 ItemForecast 表中，
+增量刷新时只处理截止日期之后的出库数据：
+
+    s_new = s_old * (1 - α)^n + α * Σ x_k * (1 - α)^(end - k)
+
+初始状态为 0，计算结果时按 1 - (1 - α)^observed_days 做偏差修正，新物品不会被低估。
+"""
+import math
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.inventory.models import Item
+from apps.operations.models import InventoryOperation
+from common.cache_versions import bump_version_on_commit
+from common.db_routing import read_from_replica
+from .models import ItemForecast
+
+DEFAULTS = {
+    'SMOOTHING': 0.1,        # 平滑系数 α，越大越重视近期消耗
+    'HISTORY_DAYS': 730,     # 首次计算时回溯的天数
+    'LEAD_TIME_DAYS': 7,     # 采购提前期
+    'REVIEW_DAYS': 30,       # 一次采购覆盖的天数
+    'SERVICE_FACTOR': 1.65,  # 安全库存系数（约 95% 服务水平）
+    'CHUNK_SIZE': 5000,      # 每批处理的物品数
+}
+
+RESULT_FIELDS = [
+    'ema_rate', 'ema_square', 'observed_days', 'last_day',
+    'daily_rate', 'demand_std', 'days_of_cover', 'reorder_point', 'reorder_quantity', 'updated_at',
+]
+
+
+def get_forecast_config():
+    return {**DEFAULTS, **getattr(settings, 'FORECAST', {})}
+
+
+def _load_item_chunk(item_ids, with_state=True):
+    """物品库存、创建日期与已有的平滑状态（with_state=False 时从初始状态开始）"""
+    lo, hi = int(item_ids[0]), int(item_ids[-1])
+    rows = list(
+        Item.objects.filter(id__gte=lo, id__lte=hi)
+        .annotate(created_day=TruncDate('created_at'))
+        .order_by('id')
+        .values_list('id', 'stock', 'created_day')
+    )
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    stock = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+    created = np.fromiter((row[2].toordinal() for row in rows), dtype=np.int64, count=len(rows))
+
+    state = list(
+        ItemForecast.objects.filter(item_id__gte=lo, item_id__lte=hi).values_list(
+            'item_id', 'ema_rate', 'ema_square', 'observed_days', 'last_day'
+        )
+    ) if with_state else []
+    ema = np.zeros(len(ids))
+    ema_square = np.zeros(len(ids))
+    observed = np.zeros(len(ids), dtype=np.int64)
+    last_day = np.full(len(ids), -1, dtype=np.int64)
+    if state:
+        columns = list(zip(*state))
+        index = np.searchsorted(ids, np.array(columns[0], dtype=np.int64))
+        ema[index] = columns[1]
+        ema_square[index] = columns[2]
+        observed[index] = columns[3]
+        last_day[index] = [day.toordinal() for day in columns[4]]
+    return ids, stock, created, ema, ema_square, observed, last_day
+
+
+def _load_outbound(lo, hi, start_day):
+    """一次聚合查询取出 (物品, 日期, 出库量) 三元组"""
+    # 不过滤 is_deleted：软删除不回滚库存，出库消耗真实发生
+    # 只统计截止到昨天的历史，复制延迟无影响，配置了只读副本时从副本读取
+    with read_from_replica():
+        rows = list(
+            InventoryOperation.objects.filter(
+                operation_type='out',
+                item_id__gte=lo,
+                item_id__lte=hi,
+                created_at__gte=timezone.make_aware(datetime.fromordinal(start_day)),
+            )
+            .annotate(day=TruncDate('created_at'))
+            .order_by()
+            .values_list('item_id', 'day')
+            .annotate(total=Sum('quantity'))
+        )
+    item_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    days = np.fromiter((row[1].toordinal() for row in rows), dtype=np.int64, count=len(rows))
+    totals = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+    return item_ids, days, totals
+
+
+def forecast_chunk(item_ids, end_day, config, full=False):
+    """计算一块物品的预测结果，返回 ItemForecast 实例列表（未保存）"""
+    ids, stock, created, ema, ema_square, observed, last_day = _load_item_chunk(item_ids, with_state=not full)
+    if not len(ids):
+        return []
+
+    alpha = config['SMOOTHING']
+    decay = 1 - alpha
+    # 每个物品从截止日期的下一天开始处理；首次计算从回溯窗口或物品创建日开始
+    first_day = np.where(
+        last_day >= 0,
+        last_day + 1,
+        np.maximum(created, end_day - config['HISTORY_DAYS'] + 1),
+    )
+    new_days = np.clip(end_day - first_day + 1, 0, None)
+
+    start_day = int(first_day.min())
+    width = max(end_day - start_day + 1, 0)
+    matrix = np.zeros((len(ids), width))
+    if width:
+        op_items, op_days, op_totals = _load_outbound(int(ids[0]), int(ids[-1]), start_day)
+        rows = np.searchsorted(ids, op_items)
+        rows = np.clip(rows, 0, len(ids) - 1)
+        keep = (ids[rows] == op_items) & (op_days >= first_day[rows]) & (op_days <= end_day)
+        np.add.at(matrix, (rows[keep], op_days[keep] - start_day), op_totals[keep])
+
+    # 第 k 天的权重 (1 - α)^(end - k)，整块物品一次矩阵乘法完成平滑
+    weights = decay ** np.arange(width - 1, -1, -1, dtype=np.float64)
+    carry = decay ** new_days
+    ema = ema * carry + alpha * (matrix @ weights)
+    ema_square = ema_square * carry + alpha * ((matrix * matrix) @ weights)
+    observed = observed + new_days
+
+    correction = 1 - decay ** observed
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily_rate = np.where(correction > 0, ema / correction, 0.0)
+        mean_square = np.where(correction > 0, ema_square / correction, 0.0)
+        days_of_cover = np.where(daily_rate > 1e-9, stock / daily_rate, np.nan)
+    demand_std = np.sqrt(np.clip(mean_square - daily_rate ** 2, 0, None))
+
+    lead_time = config['LEAD_TIME_DAYS']
+    reorder_point = np.ceil(
+        daily_rate * lead_time + config['SERVICE_FACTOR'] * demand_std * math.sqrt(lead_time)
+    )
+    # 库存低于再订货点时，补到再订货点 + 一个采购周期的消耗
+    reorder_quantity = np.where(
+        stock <= reorder_point,
+        np.ceil(reorder_point + daily_rate * config['REVIEW_DAYS'] - stock),
+        0,
+    )
+
+    end_date = date.fromordinal(end_day)
+    now = timezone.now()
+    return [
+        ItemForecast(
+            item_id=int(ids[i]),
+            ema_rate=float(ema[i]),
+            ema_square=float(ema_square[i]),
+            observed_days=int(observed[i]),
+            last_day=end_date,
+            daily_rate=round(float(daily_rate[i]), 4),
+            demand_std=round(float(demand_std[i]), 4),
+            days_of_cover=None if np.isnan(days_of_cover[i]) else round(float(days_of_cover[i]), 1),
+            reorder_point=int(reorder_point[i]),
+            reorder_quantity=max(int(reorder_quantity[i]), 0),
+            updated_at=now,
+        )
+        for i in range(len(ids))
+    ]
+
+
+def refresh_forecasts(full=False, chunk_size=None, end_day=None, progress=None):
+    """刷新全部物品的消耗预测，返回处理的物品数
+
+    默认增量刷新：只处理上次计算之后的完整天（截止到昨天）。full=True 时忽略已有状态重新计算，
+    结果同样按块覆盖写入（不先删除），中途失败时每个物品仍保留一份完整的旧预测或新预测。
+    """
+    config = get_forecast_config()
+    chunk_size = chunk_size or config['CHUNK_SIZE']
+    if end_day is None:
+        end_day = (timezone.localdate() - timedelta(days=1)).toordinal()
+
+    all_ids = np.fromiter(Item.objects.order_by('id').values_list('id', flat=True), dtype=np.int64)
+    processed = 0
+    for offset in range(0, len(all_ids), chunk_size):
+        forecasts = forecast_chunk(all_ids[offset:offset + chunk_size], end_day, config, full=full)
+        ItemForecast.objects.bulk_create(
+            forecasts,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['item'],
+            update_fields=RESULT_FIELDS,
+        )
+        processed += len(forecasts)
+        if progress:
+            progress(processed, len(all_ids))
+
+    bump_version_on_commit('reports.itemforecast')
+    return processed
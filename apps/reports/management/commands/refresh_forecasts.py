@@ -0,0 +1,34 @@
+"""
+刷新物品消耗预测
+
+    python manage.py refresh_forecasts          # 增量刷新（每晚运行）
+    python manage.py refresh_forecasts --full   # 丢弃已有状态重新计算（修改平滑参数后使用）
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.reports.forecasting import refresh_forecasts
+
+
+class Command(BaseCommand):
+    help = '批量计算物品消耗速度、可用天数和补货建议'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='重新计算全部历史')
+        parser.add_argument('--chunk-size', type=int, help='每批处理的物品数')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(done, total):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {done}/{total}')
+
+        count = refresh_forecasts(
+            full=options['full'],
+            chunk_size=options['chunk_size'],
+            progress=progress,
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'已更新 {count} 个物品的消耗预测，用时 {elapsed:.1f} 秒'))
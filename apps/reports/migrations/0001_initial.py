@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('inventory', '0003_item_status_trigger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemForecast',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='forecast', serialize=False, to='inventory.item', verbose_name='物品')),
+                ('ema_rate', models.FloatField(default=0, verbose_name='日消耗平滑值')),
+                ('ema_square', models.FloatField(default=0, verbose_name='日消耗平方平滑值')),
+                ('observed_days', models.IntegerField(default=0, verbose_name='已观测天数')),
+                ('last_day', models.DateField(verbose_name='数据截止日期')),
+                ('daily_rate', models.FloatField(default=0, verbose_name='日均消耗')),
+                ('demand_std', models.FloatField(default=0, verbose_name='日消耗标准差')),
+                ('days_of_cover', models.FloatField(blank=True, null=True, verbose_name='可用天数')),
+                ('reorder_point', models.IntegerField(default=0, verbose_name='再订货点')),
+                ('reorder_quantity', models.IntegerField(default=0, verbose_name='建议采购量')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='计算时间')),
+            ],
+            options={
+                'verbose_name': '消耗预测',
+                'verbose_name_plural': '消耗预测',
+                'db_table': 'item_forecasts',
+                'indexes': [models.Index(fields=['days_of_cover'], name='item_foreca_days_of_756c14_idx')],
+            },
+        ),
+    ]
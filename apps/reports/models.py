@@ -3,4 +3,41 @@
 """
 from django.db import models
 
-# 在这里定义你的模型
+
+class ItemForecast(models.Model):
+    """物品消耗预测（由 refresh_forecasts 命令批量计算）
+
+    ema_rate/ema_square/observed_days/last_day 为指数平滑的中间状态，
+    每晚只需处理 last_day 之后的新数据即可增量更新。
+    """
+    item = models.OneToOneField(
+        'inventory.Item',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='forecast',
+        verbose_name='物品'
+    )
+    # 指数平滑状态
+    ema_rate = models.FloatField('日消耗平滑值', default=0)
+    ema_square = models.FloatField('日消耗平方平滑值', default=0)
+    observed_days = models.IntegerField('已观测天数', default=0)
+    last_day = models.DateField('数据截止日期')
+    
+    # 预测结果
+    daily_rate = models.FloatField('日均消耗', default=0)
+    demand_std = models.FloatField('日消耗标准差', default=0)
+    days_of_cover = models.FloatField('可用天数', null=True, blank=True)
+    reorder_point = models.IntegerField('再订货点', default=0)
+    reorder_quantity = models.IntegerField('建议采购量', default=0)
+    updated_at = models.DateTimeField('计算时间', auto_now=True)
+    
+    class Meta:
+        db_table = 'item_forecasts'
+        verbose_name = '消耗预测'
+        verbose_name_plural = '消耗预测'
+        indexes = [
+            models.Index(fields=['days_of_cover']),
+        ]
+    
+    def __str__(self):
+        return f"{self.item_id}: {self.daily_rate:.2f}/天"
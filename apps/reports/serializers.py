@@ -2,5 +2,31 @@
 报表分析序列化器
 """
 from rest_framework import serializers
+from apps.operations.models import OperationArchive
+from .models import ItemForecast
 
-# 在这里定义你的序列化器
+
+class ItemForecastSerializer(serializers.ModelSerializer):
+    """消耗预测序列化器"""
+    item_name = serializers.CharField(source='item.name', read_only=True)
+    item_code = serializers.CharField(source='item.code', read_only=True)
+    stock = serializers.IntegerField(source='item.stock', read_only=True)
+    min_stock = serializers.IntegerField(source='item.min_stock', read_only=True)
+    
+    class Meta:
+        model = ItemForecast
+        fields = [
+            'item', 'item_name', 'item_code', 'stock', 'min_stock',
+            'daily_rate', 'demand_std', 'days_of_cover', 'reorder_point', 'reorder_quantity',
+            'last_day', 'updated_at'
+        ]
+
+
+class OperationArchiveSerializer(serializers.ModelSerializer):
+    """操作记录归档清单序列化器"""
+    month = serializers.DateField(format='%Y-%m', read_only=True)
+    storage_display = serializers.CharField(source='get_storage_display', read_only=True)
+    
+    class Meta:
+        model = OperationArchive
+        fields = ['id', 'month', 'storage', 'storage_display', 'row_count', 'summary', 'created_at']
@@ -0,0 +1,18 @@
+"""
+报表分析信号
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.operations.models import InventoryOperation
+from . import timeseries
+
+
+@receiver(post_save, sender=InventoryOperation, dispatch_uid='reports_timeseries_save')
+@receiver(post_delete, sender=InventoryOperation, dispatch_uid='reports_timeseries_delete')
+def invalidate_time_buckets(sender, instance, raw=False, **kwargs):
+    """操作记录变化后，使其所在的已缓存时间桶失效（当天的记录只影响未结束的时间桶，提交时跳过）"""
+    if raw or instance.created_at is None:
+        return
+    timeseries.invalidate_on_commit([timezone.localdate(instance.created_at)])
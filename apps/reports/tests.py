@@ -1,6 +1,345 @@
 """
 报表分析测试
 """
-from django.test import TestCase
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 
-# 在这里编写你的测试用例
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.inventory.models import Item
+from apps.operations import archive, partitions
+from apps.operations.models import InventoryOperation
+from common.testing import ApiBudgetTestCase
+
+from . import timeseries
+from .analytics import compute_classification
+from .forecasting import get_forecast_config, refresh_forecasts
+from .models import ItemForecast
+
+
+class ReportQueryBudgetTests(ApiBudgetTestCase):
+    """报表接口在多行数据下不超出查询预算"""
+
+    def test_endpoints_declare_budget(self):
+        self.assertEndpointsBudgeted('api/reports/')
+
+    def test_classification_and_forecasts(self):
+        today = timezone.localdate()
+        for item in self.items:
+            ItemForecast.objects.create(item=item, last_day=today, daily_rate=1.5, reorder_point=10)
+        self.assertOk(self.client.get('/api/reports/classification/'))
+        self.assertOk(self.client.get('/api/reports/classification/?basis=stock'))
+        response = self.assertOk(self.client.get('/api/reports/forecasts/'))
+        self.assertEqual(response.json()['data']['count'], self.ITEM_COUNT)
+        self.assertOk(self.client.get(f'/api/reports/forecasts/{self.items[0].pk}/'))
+
+    def test_archives(self):
+        month = partitions.month_start(timezone.localdate())
+        manifest = archive.archive_month(month, storage='table')
+        self.assertEqual(manifest.row_count, self.ITEM_COUNT * 3)
+        self.assertOk(self.client.get('/api/reports/archives/'))
+        self.assertOk(self.client.get('/api/reports/archives/summary/'))
+        self.assertOk(self.client.get(f'/api/reports/archives/{manifest.pk}/'))
+        response = self.assertOk(self.client.get(f'/api/reports/archives/{manifest.pk}/operations/'))
+        self.assertEqual(response.json()['data']['count'], self.ITEM_COUNT * 3)
+
+
+class ClassificationTests(ApiBudgetTestCase):
+    """ABC/XYZ 分类结果与手工计算一致"""
+
+    def setUp(self):
+        super().setUp()
+        # 库存金额 500/200/100/80/60/40/20/0，合计 1000
+        for item, stock in zip(self.items, [50, 20, 10, 8, 6, 4, 2, 0]):
+            Item.objects.filter(pk=item.pk).update(price=10, stock=stock)
+
+    def add_outbound(self, item, months_ago, quantity):
+        today = timezone.localdate()
+        index = today.year * 12 + today.month - 1 - months_ago
+        operation = InventoryOperation.objects.create(
+            item=item, operation_type='out', quantity=quantity,
+            before_stock=0, after_stock=0, operator=self.user,
+        )
+        created_at = timezone.make_aware(datetime(index // 12, index % 12 + 1, 15, 12))
+        InventoryOperation.objects.filter(pk=operation.pk).update(created_at=created_at)
+
+    def test_stock_basis(self):
+        result = compute_classification(basis='stock', months=12)
+        self.assertEqual(result['total_items'], self.ITEM_COUNT)
+        self.assertEqual(result['total_value'], 1000)
+        # 累计占比（加入前）0 / 50% / 70% 为 A，80% / 88% / 94% 为 B，98% 与零值为 C
+        self.assertEqual(
+            [(entry['class'], entry['count'], entry['value'], entry['value_share']) for entry in result['abc']],
+            [('A', 3, 800, 80), ('B', 3, 180, 18), ('C', 2, 20, 2)],
+        )
+        self.assertEqual(result['curve'][0], {'item_share': 0, 'value_share': 0})
+        self.assertEqual(result['curve'][-1], {'item_share': 100, 'value_share': 100})
+
+        by_category = {entry['id']: entry for entry in result['by_category']}
+        first = by_category[self.categories[0].pk]  # 物品 0、3、6
+        self.assertEqual(first['value'], 600)
+        self.assertEqual({label: bucket['count'] for label, bucket in first['abc'].items()},
+                         {'A': 1, 'B': 1, 'C': 1})
+        self.assertEqual([entry['value'] for entry in result['by_category']], [600, 260, 140])
+
+    def test_consumption_basis(self):
+        a, b, c = self.items[:3]
+        for months_ago in range(1, 13):
+            self.add_outbound(a, months_ago, 10)               # 每月 10：变异系数 0 → X
+            if months_ago % 2:
+                self.add_outbound(c, months_ago, 10)           # 隔月 10：均值 5、标准差 5 → Y
+        self.add_outbound(b, 3, 12)                            # 只有一个月：变异系数 √11 → Z
+        self.add_outbound(a, 13, 1000)                         # 统计区间之外
+
+        result = compute_classification(basis='consumption', months=12)
+        # 出库金额 1200 / 120 / 600，合计 1920
+        self.assertEqual(result['total_value'], 1920)
+        self.assertEqual(
+            [(entry['class'], entry['count'], entry['value']) for entry in result['abc']],
+            [('A', 2, 1800), ('B', 1, 120), ('C', 5, 0)],
+        )
+        self.assertEqual([entry['count'] for entry in result['xyz']], [1, 1, 6])
+        self.assertEqual(result['matrix'], {
+            'A': {'X': 1, 'Y': 1, 'Z': 0},
+            'B': {'X': 0, 'Y': 0, 'Z': 1},
+            'C': {'X': 0, 'Y': 0, 'Z': 5},
+        })
+        self.assertEqual(result['period']['months'], 12)
+
+
+class ForecastTests(ApiBudgetTestCase):
+    """增量刷新与全量重算结果一致"""
+
+    def setUp(self):
+        super().setUp()
+        self.today = timezone.localdate()
+        self.first_day = self.today - timedelta(days=40)
+        Item.objects.update(created_at=self.local_noon(self.first_day))
+        # 前三个物品按固定规律出库，其余物品只有测试基类中今天的出库（不计入截止到昨天的预测）
+        self.daily = {}
+        for index, item in enumerate(self.items[:3]):
+            for offset in range(index, 40, 3):
+                day = self.first_day + timedelta(days=offset)
+                quantity = offset % 7 + 1
+                operation = InventoryOperation.objects.create(
+                    item=item, operation_type='out', quantity=quantity,
+                    before_stock=item.stock, after_stock=item.stock, operator=self.user,
+                )
+                InventoryOperation.objects.filter(pk=operation.pk).update(created_at=self.local_noon(day))
+                self.daily[item.pk, day] = quantity
+
+    @staticmethod
+    def local_noon(day):
+        return timezone.make_aware(datetime.combine(day, datetime.min.time()) + timedelta(hours=12))
+
+    def expected_rate(self, item, end):
+        """逐日计算的偏差修正指数平滑"""
+        alpha = get_forecast_config()['SMOOTHING']
+        ema, days = 0.0, 0
+        day = self.first_day
+        while day <= end:
+            ema = (1 - alpha) * ema + alpha * self.daily.get((item.pk, day), 0)
+            days += 1
+            day += timedelta(days=1)
+        return ema / (1 - (1 - alpha) ** days)
+
+    def snapshot(self):
+        return {
+            forecast.item_id: forecast
+            for forecast in ItemForecast.objects.all()
+        }
+
+    def test_incremental_matches_full(self):
+        end = self.today - timedelta(days=1)
+        refresh_forecasts(end_day=(self.today - timedelta(days=15)).toordinal(), chunk_size=3)
+        refresh_forecasts(end_day=end.toordinal(), chunk_size=3)
+        incremental = self.snapshot()
+        self.assertEqual(len(incremental), self.ITEM_COUNT)
+
+        # 全量重算忽略已有状态（即使状态已损坏）
+        ItemForecast.objects.update(ema_rate=999, observed_days=1)
+        refresh_forecasts(full=True, end_day=end.toordinal(), chunk_size=3)
+        full = self.snapshot()
+
+        for item in self.items:
+            a, b = incremental[item.pk], full[item.pk]
+            self.assertEqual(a.observed_days, b.observed_days)
+            self.assertEqual(b.observed_days, 40)
+            self.assertAlmostEqual(a.ema_rate, b.ema_rate, places=9)
+            self.assertAlmostEqual(a.ema_square, b.ema_square, places=9)
+            self.assertAlmostEqual(a.daily_rate, b.daily_rate, places=4)
+            self.assertEqual(a.reorder_point, b.reorder_point)
+            self.assertAlmostEqual(b.daily_rate, round(self.expected_rate(item, end), 4), places=4)
+        self.assertGreater(full[self.items[0].pk].daily_rate, 0)
+        self.assertEqual(full[self.items[3].pk].daily_rate, 0)
+
+
+class TimeSeriesTests(ApiBudgetTestCase):
+    """时间序列聚合：日历对齐、时区和补零"""
+
+    def test_calendar_alignment(self):
+        for granularity, expected in [
+            ('day', date(2024, 5, 15)), ('week', date(2024, 5, 13)), ('month', date(2024, 5, 1)),
+            ('quarter', date(2024, 4, 1)), ('year', date(2024, 1, 1)),
+        ]:
+            start, end = timeseries.last_buckets(granularity, 1, today=date(2024, 5, 15))
+            self.assertEqual((start, end), (expected, date(2024, 5, 15)), granularity)
+        start, _end = timeseries.last_buckets('quarter', 4, today=date(2024, 2, 10))
+        self.assertEqual(start, date(2023, 4, 1))
+
+    def test_local_time_buckets_and_gap_filling(self):
+        operations = list(InventoryOperation.objects.filter(operation_type='in').order_by('id')[:3])
+        # UTC 3 月 31 日 16:30 是北京时间 4 月 1 日 00:30，归入第二季度
+        moments = [
+            datetime(2024, 3, 31, 16, 30, tzinfo=dt_timezone.utc),
+            datetime(2024, 3, 31, 15, 30, tzinfo=dt_timezone.utc),
+            datetime(2024, 11, 5, 8, 0, tzinfo=dt_timezone.utc),
+        ]
+        for operation, moment in zip(operations, moments):
+            InventoryOperation.objects.filter(pk=operation.pk).update(created_at=moment, quantity=4)
+
+        series = timeseries.aggregate(
+            'quarter', date(2024, 1, 1), date(2024, 12, 31),
+            measures=('count', 'quantity'), dimension='type', keys=['in', 'out'],
+        )
+        self.assertEqual(series.labels, ['Q1', 'Q2', 'Q3', 'Q4'])
+        self.assertEqual(series.series('in'), [1, 1, 0, 1])
+        self.assertEqual(series.series('in', 'quantity'), [4, 4, 0, 4])
+        self.assertEqual(series.series('out'), [0, 0, 0, 0])
+
+    def operation_queries(self, queries):
+        return [query['sql'] for query in queries if 'inventory_operations' in query['sql']]
+
+    def test_closed_buckets_are_cached(self):
+        today = timezone.localdate()
+        past = timezone.make_aware(datetime(today.year - 2, 6, 1, 12))
+        first, second = InventoryOperation.objects.filter(operation_type='in').order_by('id')[:2]
+        InventoryOperation.objects.filter(pk=first.pk).update(created_at=past)
+        args = ('year', date(today.year - 2, 1, 1), today)
+        options = {'dimension': 'type', 'keys': ['in', 'out', 'transfer']}
+        expected = timeseries.aggregate(*args, **options)
+        self.assertEqual(expected.series('in'), [1, 0, self.ITEM_COUNT - 1])
+
+        # update() 不触发信号：已结束的年份直接读取缓存，只查询当前年份
+        InventoryOperation.objects.filter(pk=second.pk).update(created_at=past)
+        with CaptureQueriesContext(connection) as queries:
+            cached = timeseries.aggregate(*args, **options)
+        self.assertEqual(len(self.operation_queries(queries)), 1)
+        self.assertEqual(cached.series('in'), [1, 0, self.ITEM_COUNT - 2])
+        self.assertEqual(cached.series('out'), expected.series('out'))
+
+        # 删除历史记录使其所在的时间桶失效
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryOperation.objects.get(pk=first.pk).delete()
+        updated = timeseries.aggregate(*args, **options)
+        self.assertEqual(updated.series('in'), [1, 0, self.ITEM_COUNT - 2])
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryOperation.objects.get(pk=second.pk).delete()
+        self.assertEqual(timeseries.aggregate(*args, **options).series('in'), [0, 0, self.ITEM_COUNT - 2])
+
+    def test_invalidation_is_per_chunk(self):
+        today = timezone.localdate()
+        last_month = (today.replace(day=1) - timedelta(days=1)).replace(day=10)
+        older_month = (last_month.replace(day=1) - timedelta(days=1)).replace(day=10)
+        recent, older = InventoryOperation.objects.filter(operation_type='in').order_by('id')[:2]
+        for operation, day in ((recent, last_month), (older, older_month)):
+            InventoryOperation.objects.filter(pk=operation.pk).update(created_at=timeseries._aware(day))
+        args = ('day', older_month, today)
+        options = {'dimension': 'type', 'keys': ['in']}
+        series = timeseries.aggregate(*args, **options)
+        position = {day: (day - older_month).days for day in (last_month, older_month)}
+        self.assertEqual([series.series('in')[position[day]] for day in (last_month, older_month)], [1, 1])
+
+        # update() 不触发信号，更早月份的缓存块保留旧值；删除上个月的记录只使上个月的缓存块失效
+        InventoryOperation.objects.filter(pk=older.pk).update(created_at=timezone.now())
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryOperation.objects.get(pk=recent.pk).delete()
+        series = timeseries.aggregate(*args, **options)
+        self.assertEqual([series.series('in')[position[day]] for day in (last_month, older_month)], [0, 1])
+
+    def test_year_of_days_is_bounded(self):
+        today = timezone.localdate()
+        args = ('day', today - timedelta(days=364), today)
+        options = {'dimension': 'warehouse', 'measures': ('count', 'quantity')}
+        with CaptureQueriesContext(connection) as cold:
+            expected = timeseries.aggregate(*args, **options)
+        # 一年的日数据合并为 12~13 个缓存块，一次聚合查询
+        self.assertEqual(len(self.operation_queries(cold)), 1)
+        # 含缓存读写：DatabaseCache 的 set_many 逐键写入，每个缓存块的数据和版本号初始化约 11 次查询
+        self.assertLessEqual(len(cold), 160)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM django_cache WHERE cache_key LIKE %s", ['%timeseries:day:%'])
+            self.assertLessEqual(cursor.fetchone()[0], 13)
+
+        with CaptureQueriesContext(connection) as warm:
+            cached = timeseries.aggregate(*args, **options)
+        self.assertEqual(len(self.operation_queries(warm)), 1)  # 只查询当天
+        self.assertLessEqual(len(warm), 3)  # 版本号、缓存块各一次 get_many
+        self.assertEqual(cached.to_dict(), expected.to_dict())
+
+    def test_soft_delete_invalidates_bucket(self):
+        yesterday = timezone.now() - timedelta(days=1)
+        ids = list(InventoryOperation.objects.filter(operation_type='out').values_list('id', flat=True)[:2])
+        InventoryOperation.objects.filter(pk__in=ids).update(created_at=yesterday)
+        timeseries.invalidate_all()
+        today = timezone.localdate()
+        options = {'filters': {'is_deleted': False}, 'dimension': 'type', 'keys': ['out']}
+        self.assertEqual(timeseries.aggregate('day', today - timedelta(days=1), today, **options).series('out')[0], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertOk(self.client.post('/api/operations/batch_delete_with_password/', {
+                'password': 'admin123', 'ids': ids[:1],
+            }, format='json'))
+        self.assertEqual(timeseries.aggregate('day', today - timedelta(days=1), today, **options).series('out')[0], 1)
+
+    def test_endpoint(self):
+        response = self.assertOk(self.client.get(
+            '/api/reports/timeseries/?granularity=day&periods=7&measure=count,quantity&dimension=warehouse'
+        ))
+        data = response.json()['data']
+        self.assertEqual(len(data['buckets']), 7)
+        self.assertEqual(sum(sum(row['count']) for row in data['series']), InventoryOperation.objects.count())
+        self.assertEqual(
+            {row['name'] for row in data['series']}, {warehouse.name for warehouse in self.warehouses}
+        )
+        response = self.assertOk(self.client.get(
+            f'/api/reports/timeseries/?granularity=month&operation_type=in&supplier={self.suppliers[0].pk}'
+        ))
+        self.assertEqual(
+            sum(response.json()['data']['series'][0]['count']),
+            InventoryOperation.objects.filter(operation_type='in', supplier=self.suppliers[0]).count(),
+        )
+        for query in ('granularity=hour', 'dimension=color', 'start=2024-13-01', 'warehouse=x'):
+            self.assertEqual(self.client.get(f'/api/reports/timeseries/?{query}').status_code, 400, query)
+
+    def test_etag_tracks_dimension_and_filter_models(self):
+        def etag_changed(path, change):
+            etag = self.assertOk(self.client.get(path))['ETag']
+            self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            return self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+
+        warehouse = self.warehouses[0]
+        response = etag_changed(
+            '/api/reports/timeseries/?granularity=day&periods=7&dimension=warehouse',
+            lambda: self.assertOk(self.client.patch(
+                f'/api/warehouses/{warehouse.pk}/', {'name': '改名仓库'}, format='json'
+            )),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('改名仓库', {row['name'] for row in response.json()['data']['series']})
+
+        item = self.items[0]
+        response = etag_changed(
+            f'/api/reports/timeseries/?granularity=day&periods=7&category={self.categories[1].pk}',
+            lambda: self.assertOk(self.client.patch(
+                f'/api/inventory/items/{item.pk}/', {'category': self.categories[1].pk}, format='json'
+            )),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sum(response.json()['data']['series'][0]['count']),
+            InventoryOperation.objects.filter(item__category=self.categories[1]).count(),
+        )
@@ -0,0 +1,378 @@
+"""
+操作记录时间序列聚合
+
+所有趋势图、统计图共用的聚合引擎：按粒度（日/周/月/季度/年）、日期范围、度量（次数/数量合计）、
+维度（类型/仓库/部门/类别/供应商/操作人）和过滤条件，一次 GROUP BY 查询得到 (维度, 时间桶) 的聚合值。
+
+- 时间桶由数据库在当前时区内截断（Trunc），跨时区、跨月末的记录归入本地时间所在的桶
+- 时间桶起始日期转换为整数序号后在 NumPy 中向量化补零：没有记录的桶、没有记录的维度值都为 0
+- 季度、周按日历对齐（季度为 1/4/7/10 月 1 日开始，周为周一开始），标签不会随天数累积漂移
+
+已结束的时间桶不会再变化，永久缓存（不设过期时间），每次只查询未缓存的桶和当前未结束的桶：
+- 按天统计时每个自然月、其他粒度每个自然年的已结束时间桶合并保存在一个缓存键中，
+  一年的日数据只占 12~13 个键，不会挤占缓存容量（DatabaseCache 超过 MAX_ENTRIES 后会随机淘汰）
+- 每个缓存块有自己的版本号：补录、删除、归档等改动历史数据时，只递增这些日期在各粒度下所在缓存块的版本号
+  （invalidate），其他月份、年份的缓存块不受影响，下一次请求只重新查询失效的缓存块
+- 按仓库、部门、类别、供应商分组时还包含这些模型的版本号（名称、物品归属变化后失效）；操作人维度的名称为用户名
+- 批量导入历史数据后调用 invalidate_all() 使全部时间桶失效
+
+报表统计包含所有记录（包括已删除的），防止通过删除记录做假账。
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import Coalesce, Trunc
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from apps.operations.models import InventoryOperation
+from common.cache_versions import bump_version, get_versions, versioned_key
+
+GRANULARITIES = ('day', 'week', 'month', 'quarter', 'year')
+
+MEASURES = {
+    'count': lambda: Count('id'),
+    'quantity': lambda: Coalesce(Sum('quantity'), 0),
+}
+
+# 维度 -> (分组字段, 名称字段)；名称随分组一起 JOIN 查出
+# 仓库、部门按写入时记录在操作上的外键分组（(外键, created_at) 复合索引），不经过物品表
+DIMENSIONS = {
+    'type': ('operation_type', None),
+    'warehouse': ('warehouse', 'warehouse__name'),
+    'department': ('recipient_department', 'recipient_department__name'),
+    'category': ('item__category', 'item__category__name'),
+    'supplier': ('supplier', 'supplier__name'),
+    'operator': ('operator', 'operator__username'),
+}
+
+# 维度名称、按物品归属分组时依赖的其他模型（版本号变化后已缓存的时间桶失效）
+DIMENSION_MODELS = {
+    'warehouse': ('warehouses.warehouse',),
+    'department': ('operations.department',),
+    'category': ('inventory.item', 'inventory.category'),
+    'supplier': ('suppliers.supplier',),
+}
+
+GLOBAL_LABEL = 'timeseries'
+
+# 单次查询最多的时间桶数（按天统计约 3 年）
+MAX_BUCKETS = 1100
+
+TOTAL_KEY = 'total'
+
+
+def get_config():
+    return {'CACHE_CLOSED_BUCKETS': True, **getattr(settings, 'TIMESERIES', {})}
+
+
+def _check_granularity(granularity):
+    if granularity not in GRANULARITIES:
+        raise ValidationError({'granularity': f"无效的粒度，可选值：{', '.join(GRANULARITIES)}"})
+
+
+def bucket_index(days, granularity):
+    """日期（1970-01-01 起的天数数组）-> 时间桶序号"""
+    days = np.asarray(days, dtype=np.int64)
+    if granularity == 'day':
+        return days
+    if granularity == 'week':
+        # 1970-01-01 是周四，+3 后按 7 天整除即以周一为界
+        return (days + 3) // 7
+    months = days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    if granularity == 'month':
+        return months
+    if granularity == 'quarter':
+        return months // 3
+    return days.astype('datetime64[D]').astype('datetime64[Y]').astype(np.int64)
+
+
+def bucket_start(index, granularity):
+    """时间桶序号 -> 起始日期（datetime64[D] 数组）"""
+    index = np.asarray(index, dtype=np.int64)
+    if granularity == 'day':
+        return index.astype('datetime64[D]')
+    if granularity == 'week':
+        return (index * 7 - 3).astype('datetime64[D]')
+    if granularity == 'month':
+        return index.astype('datetime64[M]').astype('datetime64[D]')
+    if granularity == 'quarter':
+        return (index * 3).astype('datetime64[M]').astype('datetime64[D]')
+    return index.astype('datetime64[Y]').astype('datetime64[D]')
+
+
+def _to_days(day):
+    return np.datetime64(day, 'D').astype(np.int64)
+
+
+def _bucket_of(day, granularity):
+    return int(bucket_index([_to_days(day)], granularity)[0])
+
+
+def last_buckets(granularity, count, today=None):
+    """最近 count 个时间桶（含当前桶）的 (起始日期, 结束日期)"""
+    _check_granularity(granularity)
+    today = today or timezone.localdate()
+    first = _bucket_of(today, granularity) - count + 1
+    return bucket_start([first], granularity)[0].item(), today
+
+
+def format_label(day, granularity):
+    if granularity in ('day', 'week'):
+        return day.isoformat()
+    if granularity == 'month':
+        return f'{day.month}月'
+    if granularity == 'quarter':
+        return f'Q{(day.month - 1) // 3 + 1}'
+    return f'{day.year}年'
+
+
+def _aware(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+@dataclass
+class TimeSeries:
+    """聚合结果：values[度量] 为 (维度值数, 时间桶数) 的数组"""
+    granularity: str
+    buckets: list  # 每个时间桶的起始日期
+    keys: list     # 维度取值（无维度时为 ['total']）
+    names: list    # 维度取值的显示名称
+    values: dict
+
+    @property
+    def labels(self):
+        return [format_label(day, self.granularity) for day in self.buckets]
+
+    def series(self, key=TOTAL_KEY, measure='count'):
+        """某个维度值各时间桶的聚合值"""
+        try:
+            row = self.keys.index(key)
+        except ValueError:
+            return [0] * len(self.buckets)
+        return self.values[measure][row].tolist()
+
+    def totals(self, measure='count'):
+        """各维度值在整个范围内的合计"""
+        return dict(zip(self.keys, self.values[measure].sum(axis=1).tolist()))
+
+    def to_dict(self):
+        return {
+            'granularity': self.granularity,
+            'buckets': [day.isoformat() for day in self.buckets],
+            'labels': self.labels,
+            'series': [
+                {'key': key, 'name': name, **{measure: values[row].tolist() for measure, values in self.values.items()}}
+                for row, (key, name) in enumerate(zip(self.keys, self.names))
+            ],
+        }
+
+
+def _runs(indices):
+    """有序的时间桶序号 -> 连续区间 [(起, 止)]"""
+    runs = []
+    for index in indices:
+        if runs and runs[-1][1] == index - 1:
+            runs[-1][1] = index
+        else:
+            runs.append([index, index])
+    return runs
+
+
+def _query(queryset, granularity, indices, measures, dimension, filters):
+    """查询指定时间桶，返回 {时间桶序号: [(维度值, 名称, 度量值...)]}"""
+    condition = Q()
+    for low, high in _runs(indices):
+        range_start, range_end = bucket_start([low, high + 1], granularity)
+        condition |= Q(created_at__gte=_aware(range_start.item()), created_at__lt=_aware(range_end.item()))
+
+    group_field, name_field = DIMENSIONS[dimension] if dimension else (None, None)
+    group_by = [field for field in (group_field, name_field) if field]
+    rows = list(
+        queryset.filter(condition, **filters)
+        .annotate(bucket=Trunc('created_at', granularity, output_field=DateField()))
+        .values('bucket', *group_by)
+        .annotate(**{measure: MEASURES[measure]() for measure in measures})
+        .order_by()
+    )
+    days = np.array([row['bucket'] for row in rows], dtype='datetime64[D]').astype(np.int64)
+    buckets = {}
+    for index, row in zip(bucket_index(days, granularity).tolist(), rows):
+        buckets.setdefault(index, []).append((
+            row[group_field] if group_field else TOTAL_KEY,
+            row[name_field] if name_field else None,
+            *(row[measure] for measure in measures),
+        ))
+    return buckets
+
+
+def _chunk_of(granularity, indices):
+    """时间桶序号 -> 所在缓存块的序号（按天为自然月，其他粒度为自然年）"""
+    starts = bucket_start(indices, granularity)
+    unit = 'datetime64[M]' if granularity == 'day' else 'datetime64[Y]'
+    return starts.astype(unit).astype(np.int64)
+
+
+def chunk_label(granularity, chunk):
+    """缓存块的版本号标签，如 timeseries.day.652"""
+    return f'{GLOBAL_LABEL}.{granularity}.{chunk}'
+
+
+def _closed_chunk_keys(granularity, indices, measures, dimension, filters):
+    """已结束时间桶的缓存键 -> 该缓存块中需要的时间桶序号
+
+    缓存键包含全局版本号（invalidate_all）、该缓存块自己的版本号和查询依赖的其他模型的版本号，
+    所有版本号一次读取。
+    """
+    chunks = {}
+    for index, chunk in zip(indices, _chunk_of(granularity, indices).tolist()):
+        chunks.setdefault(chunk, []).append(index)
+    dependencies = set(DIMENSION_MODELS.get(dimension, ()))
+    if any(lookup.startswith('item__') for lookup in filters):
+        dependencies.add('inventory.item')
+    labels = {chunk: chunk_label(granularity, chunk) for chunk in chunks}
+    versions = get_versions(GLOBAL_LABEL, *dependencies, *labels.values())
+    shared = {label: versions[label] for label in (GLOBAL_LABEL, *dependencies)}
+    signature = hashlib.md5(repr((measures, dimension, sorted(filters.items()))).encode()).hexdigest()[:12]
+    return {
+        versioned_key(
+            f'timeseries:{granularity}:{chunk}:{signature}', {**shared, labels[chunk]: versions[labels[chunk]]}
+        ): chunk_indices
+        for chunk, chunk_indices in chunks.items()
+    }
+
+
+def aggregate(granularity, start, end=None, measures=('count',), dimension=None, filters=None, keys=None,
+              queryset=None):
+    """按时间桶聚合操作记录
+
+    start / end 为日期（含），分别向前、向后对齐到完整的时间桶。
+    filters 为 ORM 过滤条件（如 {'operation_type__in': ['in', 'out']}）；
+    keys 指定维度值及顺序时，没有记录的维度值也会返回全 0 序列，否则按合计降序返回出现过的维度值。
+
+    已结束的时间桶（昨天及以前、上个月及以前……）按月/年合并永久缓存，只查询未缓存的桶和当前未结束的桶；
+    传入自定义 queryset 时不使用缓存。
+    """
+    _check_granularity(granularity)
+    if isinstance(measures, str):
+        measures = (measures,)
+    measures = tuple(measures)
+    unknown = [measure for measure in measures if measure not in MEASURES]
+    if unknown:
+        raise ValidationError({'measure': f"无效的度量，可选值：{', '.join(MEASURES)}"})
+    if dimension is not None and dimension not in DIMENSIONS:
+        raise ValidationError({'dimension': f"无效的维度，可选值：{', '.join(DIMENSIONS)}"})
+
+    end = end or timezone.localdate()
+    first, last = (_bucket_of(day, granularity) for day in (start, end))
+    if last < first:
+        raise ValidationError({'start': '开始日期不能晚于结束日期'})
+    if last - first + 1 > MAX_BUCKETS:
+        raise ValidationError({'start': f'时间范围过大，最多 {MAX_BUCKETS} 个时间桶'})
+    indices = range(first, last + 1)
+    filters = filters or {}
+
+    buckets = {}
+    chunk_keys = {}
+    cached_chunks = {}
+    if queryset is None and get_config()['CACHE_CLOSED_BUCKETS']:
+        current = _bucket_of(timezone.localdate(), granularity)
+        closed = [index for index in indices if index < current]
+        if closed:
+            chunk_keys = _closed_chunk_keys(granularity, closed, measures, dimension, filters)
+            cached_chunks = cache.get_many(list(chunk_keys))
+            for chunk in cached_chunks.values():
+                buckets.update(chunk)
+    missing = [index for index in indices if index not in buckets]
+    if missing:
+        queryset = InventoryOperation.objects.all() if queryset is None else queryset
+        fresh = _query(queryset, granularity, missing, measures, dimension, filters)
+        for index in missing:
+            buckets[index] = fresh.get(index, [])
+        # 缓存块可能只保存了部分时间桶（上次查询的范围不同、当月逐日结束），合并后整块写回
+        missing = set(missing)
+        computed = {
+            key: {**cached_chunks.get(key, {}), **{index: buckets[index] for index in chunk_indices}}
+            for key, chunk_indices in chunk_keys.items()
+            if missing.intersection(chunk_indices)
+        }
+        if computed:
+            cache.set_many(computed, None)
+
+    names = {}
+    for index in indices:
+        for key, name, *_amounts in buckets[index]:
+            names.setdefault(key, name)
+    observed = keys is None and dimension is not None
+    keys = list(names) if observed else list(keys or [TOTAL_KEY])
+    row_of = {key: row for row, key in enumerate(keys)}
+
+    entries = [
+        (row_of.get(key, -1), index - first, amounts)
+        for index in indices for key, _name, *amounts in buckets[index]
+    ]
+    values = {measure: np.zeros((len(keys), len(indices)), dtype=np.int64) for measure in measures}
+    if entries:
+        series = np.array([entry[0] for entry in entries])
+        columns = np.array([entry[1] for entry in entries])
+        amounts = np.array([entry[2] for entry in entries], dtype=np.int64).reshape(len(entries), len(measures))
+        # 不在 keys 中的维度值不参与统计
+        mask = series >= 0
+        for position, measure in enumerate(measures):
+            np.add.at(values[measure], (series[mask], columns[mask]), amounts[mask, position])
+
+    if observed and len(keys) > 1:
+        order = np.argsort(-values[measures[0]].sum(axis=1), kind='stable')
+        keys = [keys[index] for index in order]
+        values = {measure: array[order] for measure, array in values.items()}
+    return TimeSeries(
+        granularity=granularity,
+        buckets=[day.item() for day in bucket_start(np.arange(first, last + 1), granularity)],
+        keys=keys,
+        names=[_display_name(dimension, key, names.get(key)) for key in keys],
+        values=values,
+    )
+
+
+def invalidate(days):
+    """包含这些日期（本地日期）的已结束时间桶发生变化时，使它们所在的缓存块失效
+
+    每个粒度下每个缓存块最多递增一次；尚未结束的时间桶不在缓存中，不需要失效。
+    """
+    days = np.array(sorted({_to_days(day) for day in days}), dtype=np.int64)
+    if not len(days):
+        return
+    today = _to_days(timezone.localdate())
+    labels = set()
+    for granularity in GRANULARITIES:
+        indices = bucket_index(days, granularity)
+        closed = indices[indices < bucket_index([today], granularity)[0]]
+        chunks = np.unique(_chunk_of(granularity, closed)).tolist()
+        labels.update(chunk_label(granularity, chunk) for chunk in chunks)
+    if labels:
+        bump_version(*sorted(labels))
+
+
+def invalidate_on_commit(days):
+    """事务提交后使这些日期所在的时间桶失效（提交时才判断是否已跨过零点）"""
+    days = list(days)
+    transaction.on_commit(lambda: invalidate(days))
+
+
+def invalidate_all():
+    """使全部已缓存的时间桶失效（批量导入历史数据后调用）"""
+    bump_version(GLOBAL_LABEL)
+
+
+def _display_name(dimension, key, name):
+    if dimension is None:
+        return '合计'
+    if dimension == 'type':
+        return dict(InventoryOperation.OPERATION_TYPES).get(key, key)
+    return name if name is not None else '未指定'
@@ -3,12 +3,18 @@
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .views import (
+    ItemForecastViewSet, InventoryClassificationView, OperationArchiveViewSet, OperationTimeSeriesView,
+)
 
 app_name = 'reports'
 
 router = DefaultRouter()
-# router.register(r'', YourViewSet, basename='your-model')
+router.register(r'forecasts', ItemForecastViewSet, basename='item-forecast')
+router.register(r'archives', OperationArchiveViewSet, basename='operation-archive')
 
 urlpatterns = [
+    path('classification/', InventoryClassificationView.as_view(), name='classification'),
+    path('timeseries/', OperationTimeSeriesView.as_view(), name='timeseries'),
     path('', include(router.urls)),
 ]
@@ -1,7 +1,270 @@
 """
 报表分析视图
 """
-from rest_framework import viewsets
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import viewsets, filters
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+
+from apps.operations.models import OperationArchive
+from .models import ItemForecast
+from .serializers import ItemForecastSerializer, OperationArchiveSerializer
+from common.conditional import ConditionalGetMixin
 from common.responses import APIResponse
+from common.pagination import StandardPagination
+
+
+class ItemForecastViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """消耗预测与补货建议
+
+    预测结果由 refresh_forecasts 命令每晚批量计算，这里只读取结果表。
+    ?needs_reorder=true 只返回当前库存已低于再订货点的物品。
+    """
+    queryset = ItemForecast.objects.select_related('item')
+    serializer_class = ItemForecastSerializer
+    permission_classes = [IsAuthenticated]
+    query_budgets = {'list': 4, 'retrieve': 4}
+    pagination_class = StandardPagination
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    search_fields = ['item__name', 'item__code']
+    ordering_fields = ['days_of_cover', 'daily_rate', 'reorder_quantity']
+    ordering = [F('days_of_cover').asc(nulls_last=True)]
+    conditional_models = ('reports.itemforecast', 'inventory.item')
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.query_params.get('needs_reorder') in ('true', '1'):
+            # 与当前库存比较，入库后立即从补货列表中消失
+            queryset = queryset.filter(item__stock__lte=F('reorder_point'))
+        return queryset
+    
+    def retrieve(self, request, *args, **kwargs):
+        """获取单个物品的预测"""
+        serializer = self.get_serializer(self.get_object())
+        return APIResponse.success(data=serializer.data)
+
+
+class InventoryClassificationView(APIView):
+    """ABC / XYZ 库存分类分析
+
+    GET /api/reports/classification/?basis=consumption|stock&months=12
+    全量物品计算，结果按天缓存。
+    """
+    permission_classes = [IsAuthenticated]
+    query_budget = 7
+    
+    def get(self, request):
+        from .analytics import BASIS_CHOICES, compute_classification, get_analytics_config
+        
+        basis = request.query_params.get('basis', 'consumption')
+        if basis not in BASIS_CHOICES:
+            return APIResponse.error(message=f"basis 参数无效，可选值：{', '.join(BASIS_CHOICES)}")
+        try:
+            months = int(request.query_params.get('months', get_analytics_config()['MONTHS']))
+        except ValueError:
+            return APIResponse.error(message="months 参数必须是整数")
+        if not 1 <= months <= 36:
+            return APIResponse.error(message="months 参数范围为 1~36")
+        
+        cache_key = f'reports_classification:{timezone.localdate():%Y%m%d}:{basis}:{months}'
+        data = cache.get(cache_key)
+        if data is None:
+            data = compute_classification(basis=basis, months=months)
+            data['generated_at'] = timezone.localtime().strftime('%Y-%m-%d %H:%M:%S')
+            cache.set(cache_key, data, 60 * 60 * 24)
+        return APIResponse.success(data=data)
+
+
+class OperationArchiveViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """已归档的历史操作记录
+
+    GET /api/reports/archives/?start=2023-01&end=2023-12     归档月份清单
+    GET /api/reports/archives/summary/?start=&end=           按月份、操作类型汇总（读取清单，不扫描数据）
+    GET /api/reports/archives/<id>/operations/?item=&operation_type=&page=
+                                                             某个月份的明细（归档表或压缩文件）
+    """
+    queryset = OperationArchive.objects.all()
+    serializer_class = OperationArchiveSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = StandardPagination
+    conditional_models = ('operations.operationarchive',)
+    query_budgets = {'list': 4, 'retrieve': 4, 'summary': 4, 'operations': 5}
+    
+    @staticmethod
+    def _parse_month(value):
+        from datetime import datetime
+        return datetime.strptime(value, '%Y-%m').date()
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if params.get('start'):
+            queryset = queryset.filter(month__gte=self._parse_month(params['start']))
+        if params.get('end'):
+            queryset = queryset.filter(month__lte=self._parse_month(params['end']))
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        try:
+            return super().list(request, *args, **kwargs)
+        except ValueError:
+            return APIResponse.error(message="月份格式应为 YYYY-MM")
+    
+    def retrieve(self, request, *args, **kwargs):
+        """获取归档月份详情"""
+        serializer = self.get_serializer(self.get_object())
+        return APIResponse.success(data=serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """按月份和操作类型汇总归档数据"""
+        try:
+            archives = list(self.get_queryset().order_by('month'))
+        except ValueError:
+            return APIResponse.error(message="月份格式应为 YYYY-MM")
+        
+        totals = {}
+        months = []
+        for archive in archives:
+            for operation_type, entry in archive.summary.items():
+                total = totals.setdefault(operation_type, {'count': 0, 'quantity': 0})
+                total['count'] += entry['count']
+                total['quantity'] += entry['quantity']
+            months.append({
+                'month': f'{archive.month:%Y-%m}',
+                'row_count': archive.row_count,
+                'by_type': archive.summary,
+            })
+        return APIResponse.success(data={
+            'months': months,
+            'totals': totals,
+            'row_count': sum(archive.row_count for archive in archives),
+        })
+    
+    @action(detail=True, methods=['get'])
+    def operations(self, request, pk=None):
+        """某个归档月份的操作明细（按 id 顺序分页）"""
+        from apps.operations.archive import iter_archived_operations
+        
+        archive = self.get_object()
+        params = request.query_params
+        try:
+            item_id = int(params['item']) if params.get('item') else None
+            page = max(int(params.get('page', 1)), 1)
+            page_size = min(max(int(params.get('page_size', StandardPagination.page_size)), 1),
+                            StandardPagination.max_page_size)
+        except ValueError:
+            return APIResponse.error(message="item、page、page_size 参数必须是整数")
+        
+        # 冷数据查询频率低，顺序扫描整个月份以返回准确的总数
+        offset = (page - 1) * page_size
+        results = []
+        count = 0
+        for row in iter_archived_operations(archive, item_id=item_id,
+                                            operation_type=params.get('operation_type')):
+            if offset <= count < offset + page_size:
+                results.append(row)
+            count += 1
+        return APIResponse.success(data={
+            'month': f'{archive.month:%Y-%m}',
+            'count': count,
+            'page': page,
+            'page_size': page_size,
+            'results': results,
+        })
+
+
+class OperationTimeSeriesView(ConditionalGetMixin, APIView):
+    """操作记录时间序列（通用图表数据）
+
+    GET /api/reports/timeseries/?granularity=month&periods=12&measure=count,quantity&dimension=warehouse
+    GET /api/reports/timeseries/?granularity=day&start=2024-01-01&end=2024-01-31&operation_type=in,out
 
-# 在这里定义你的视图
+    granularity：day / week / month / quarter / year；start、end 省略时取最近 periods 个时间桶。
+    measure：count（次数）、quantity（数量合计），可逗号分隔同时返回；
+    dimension：type / warehouse / department / category / supplier / operator，省略时只返回合计。
+    过滤参数：operation_type、item、category、warehouse、department、supplier、operator；
+    warehouse、department 按操作发生时记录的仓库和领用部门过滤。
+    """
+    permission_classes = [IsAuthenticated]
+    query_budget = 3
+    conditional_models = ('operations.inventoryoperation',)
+    
+    # 查询参数 -> ORM 过滤条件
+    FILTERS = {
+        'item': 'item_id',
+        'category': 'item__category_id',
+        'warehouse': 'warehouse_id',
+        'department': 'recipient_department_id',
+        'supplier': 'supplier_id',
+        'operator': 'operator_id',
+    }
+    
+    def get_conditional_models(self):
+        # 与时间桶缓存一致：维度名称、按物品类别过滤时还依赖对应模型
+        from .timeseries import DIMENSION_MODELS
+        
+        params = self.request.query_params
+        models = [*self.conditional_models, *DIMENSION_MODELS.get(params.get('dimension'), ())]
+        if params.get('category'):
+            models.append('inventory.item')
+        return tuple(dict.fromkeys(models))
+    
+    def get_conditional_extra(self):
+        # 省略 end 时统计到今天
+        return timezone.localdate().isoformat()
+    
+    @staticmethod
+    def _parse_date(params, name):
+        from django.utils.dateparse import parse_date
+        
+        value = params.get(name)
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError({name: '日期格式应为 YYYY-MM-DD'})
+        return day
+    
+    def get_filters(self, params):
+        filters = {}
+        types = [value for value in params.get('operation_type', '').split(',') if value]
+        if types:
+            filters['operation_type__in'] = types
+        for name, lookup in self.FILTERS.items():
+            value = params.get(name)
+            if value:
+                if not value.isdigit():
+                    raise ValidationError({name: '必须是整数 ID'})
+                filters[lookup] = int(value)
+        return filters
+    
+    def get(self, request):
+        from .timeseries import aggregate, last_buckets
+        
+        params = request.query_params
+        granularity = params.get('granularity', 'month')
+        start = self._parse_date(params, 'start')
+        end = self._parse_date(params, 'end')
+        if start is None:
+            try:
+                periods = int(params.get('periods', 12))
+            except ValueError:
+                raise ValidationError({'periods': '必须是整数'})
+            if periods < 1:
+                raise ValidationError({'periods': '至少为 1'})
+            start, _today = last_buckets(granularity, periods, today=end)
+        series = aggregate(
+            granularity, start, end,
+            measures=[value for value in params.get('measure', 'count').split(',') if value] or ['count'],
+            dimension=params.get('dimension') or None,
+            filters=self.get_filters(params),
+        )
+        return APIResponse.success(data=series.to_dict())
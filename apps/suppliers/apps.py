@@ -5,3 +5,6 @@ class SuppliersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.suppliers'
     verbose_name = '供应商管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
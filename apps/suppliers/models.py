@@ -42,5 +42,7 @@ class Supplier(models.Model):
     
     @property
     def item_count(self):
-        """供货物品数量"""
+        """供货物品数量（列表接口通过 items_total 注解批量计算，未注解时单独计数）"""
+        if hasattr(self, 'items_total'):
+            return self.items_total
         return self.items.count()
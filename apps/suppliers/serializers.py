@@ -2,6 +2,7 @@
 供应商管理序列化器
 """
 from rest_framework import serializers
+from common.serializers import SparseFieldsMixin
 from .models import Supplier
 
 class SupplierSerializer(serializers.ModelSerializer):
@@ -41,7 +42,7 @@ class SupplierSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class SupplierListSerializer(serializers.ModelSerializer):
+class SupplierListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """供应商列表序列化器（简化版）"""
     item_count = serializers.ReadOnlyField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
@@ -49,3 +50,4 @@ class SupplierListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Supplier
         fields = ['id', 'name', 'code', 'contact', 'phone', 'email', 'status', 'status_display', 'item_count']
+        sparse_sources = {'item_count': []}
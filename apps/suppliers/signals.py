@@ -0,0 +1,11 @@
+"""
+供应商管理信号
+"""
+from common.cache_versions import track_model_versions
+from common.refdata import track_reference_data
+from .models import Supplier
+
+# 数据变化时递增缓存版本号（ETag、仪表盘缓存依赖）
+track_model_versions(Supplier)
+# 进程内引用数据缓存（下拉框、出入库校验），见 common.refdata
+track_reference_data(Supplier)
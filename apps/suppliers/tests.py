@@ -1,6 +1,22 @@
 """
 供应商管理测试
 """
-from django.test import TestCase
+from common.testing import ApiBudgetTestCase
 
-# 在这里编写你的测试用例
+
+class SupplierQueryBudgetTests(ApiBudgetTestCase):
+    """供应商接口在多行数据下不超出查询预算"""
+
+    def test_endpoints_declare_budget(self):
+        self.assertEndpointsBudgeted('api/suppliers/')
+
+    def test_endpoints(self):
+        supplier = self.suppliers[0]
+        response = self.assertOk(self.client.get('/api/suppliers/'))
+        counts = {row['code']: row['item_count'] for row in response.json()['data']['results']}
+        self.assertEqual(counts, {'SUP-0': 3, 'SUP-1': 3, 'SUP-2': 2})
+        self.assertOk(self.client.get('/api/suppliers/active/'))
+        self.assertOk(self.client.get(f'/api/suppliers/{supplier.pk}/'))
+        created = self.assertOk(self.client.post('/api/suppliers/', {'name': '新供应商', 'code': 'SUP-NEW'}, format='json'))
+        self.assertOk(self.client.patch(f'/api/suppliers/{supplier.pk}/', {'contact': '张三'}, format='json'))
+        self.assertOk(self.client.delete(f"/api/suppliers/{created.json()['data']['id']}/"))
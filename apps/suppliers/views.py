@@ -5,14 +5,17 @@ from rest_framework import viewsets, filters
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Count
 
 from .models import Supplier
 from .serializers import SupplierSerializer, SupplierListSerializer
+from common.conditional import ConditionalGetMixin
+from common.mixins import SparseFieldsetMixin
 from common.responses import APIResponse
 from common.pagination import StandardPagination
 
 
-class SupplierViewSet(viewsets.ModelViewSet):
+class SupplierViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """供应商视图集"""
     queryset = Supplier.objects.all()
     permission_classes = [IsAuthenticated]  # 需要登录
@@ -22,6 +25,18 @@ class SupplierViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'code', 'contact', 'phone']
     ordering_fields = ['created_at', 'name', 'code']
     ordering = ['-created_at']
+    conditional_models = ('suppliers.supplier', 'inventory.item')
+    query_budgets = {
+        'list': 5, 'retrieve': 4, 'active': 4,
+        'create': 6, 'update': 7, 'partial_update': 7, 'destroy': 8,
+    }
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve', 'active') and self.wants_field('item_count'):
+            # 供货物品数随供应商一次查出，避免逐行 COUNT
+            queryset = queryset.annotate(items_total=Count('items'))
+        return queryset
     
     def get_serializer_class(self):
         """根据动作选择序列化器"""
@@ -74,9 +89,24 @@ class SupplierViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def active(self, request):
-        """获取启用的供应商列表"""
-        queryset = self.get_queryset().filter(status='active')
-        serializer = SupplierListSerializer(queryset, many=True)
+        """获取启用的供应商列表
+
+        供应商取自进程内引用数据（common.refdata），不查询供应商表；需要供货物品数时一次按供应商分组计数。
+        支持 ?fields= / ?omit=。
+        """
+        from apps.inventory.models import Item
+        from common import refdata
+        
+        suppliers = refdata.table('suppliers.supplier')
+        instances = [suppliers.to_instance(row) for row in suppliers.rows(status='active')]
+        if self.wants_field('item_count', SupplierListSerializer):
+            counts = dict(
+                Item.objects.order_by().values('supplier_id')
+                .annotate(total=Count('id')).values_list('supplier_id', 'total')
+            )
+            for supplier in instances:
+                supplier.items_total = counts.get(supplier.pk, 0)
+        serializer = SupplierListSerializer(instances, many=True, context=self.get_serializer_context())
         return APIResponse.success(data=serializer.data)
 
 # 在这里定义你的视图
@@ -5,3 +5,6 @@ class WarehousesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.warehouses'
     verbose_name = '仓库管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -35,9 +35,9 @@ class Warehouse(models.Model):
         # 如果有预计算的值（通过annotate），直接使用
         if hasattr(self, '_current_usage'):
             return self._current_usage
-        # 否则执行查询
+        # 否则汇总库存余额表
         from django.db.models import Sum
-        total = self.items.aggregate(total=Sum('stock'))['total']
+        total = self.balances.aggregate(total=Sum('quantity'))['total']
         return total or 0
     
     @property
@@ -3,6 +3,7 @@
 """
 import uuid
 from rest_framework import serializers
+from common.serializers import SparseFieldsMixin
 from .models import Warehouse
 
 class WarehouseSerializer(serializers.ModelSerializer):
@@ -43,7 +44,7 @@ class WarehouseSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class WarehouseListSerializer(serializers.ModelSerializer):
+class WarehouseListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """仓库列表序列化器"""
     current_usage = serializers.ReadOnlyField()
     usage_rate = serializers.ReadOnlyField()
@@ -51,3 +52,7 @@ class WarehouseListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Warehouse
         fields = ['id', 'name', 'code', 'location', 'capacity', 'current_usage', 'usage_rate', 'is_active', 'manager', 'phone']
+        sparse_sources = {
+            'current_usage': [],
+            'usage_rate': ['capacity'],
+        }
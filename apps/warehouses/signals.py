@@ -0,0 +1,11 @@
+"""
+仓库管理信号
+"""
+from common.cache_versions import track_model_versions
+from common.refdata import track_reference_data
+from .models import Warehouse
+
+# 数据变化时递增缓存版本号（ETag、仪表盘缓存依赖）
+track_model_versions(Warehouse)
+# 进程内引用数据缓存（下拉框、出入库校验），见 common.refdata
+track_reference_data(Warehouse)
@@ -1,6 +1,22 @@
 """
 仓库管理测试
 """
-from django.test import TestCase
+from common.testing import ApiBudgetTestCase
 
-# 在这里编写你的测试用例
+
+class WarehouseQueryBudgetTests(ApiBudgetTestCase):
+    """仓库接口在多行数据下不超出查询预算"""
+
+    def test_endpoints_declare_budget(self):
+        self.assertEndpointsBudgeted('api/warehouses/')
+
+    def test_endpoints(self):
+        warehouse = self.warehouses[0]
+        self.assertOk(self.client.get('/api/warehouses/'))
+        self.assertOk(self.client.get('/api/warehouses/?fields=id,name,current_usage'))
+        self.assertOk(self.client.get('/api/warehouses/active/'))
+        self.assertOk(self.client.get(f'/api/warehouses/{warehouse.pk}/'))
+        self.assertOk(self.client.get(f'/api/warehouses/{warehouse.pk}/stock/'))
+        created = self.assertOk(self.client.post('/api/warehouses/', {'name': '新仓库', 'code': 'WH-NEW'}, format='json'))
+        self.assertOk(self.client.patch(f'/api/warehouses/{warehouse.pk}/', {'manager': '李四'}, format='json'))
+        self.assertOk(self.client.delete(f"/api/warehouses/{created.json()['data']['id']}/"))
@@ -8,11 +8,13 @@ from django_filters.rest_framework import DjangoFilterBackend
 
 from .models import Warehouse
 from .serializers import WarehouseSerializer, WarehouseListSerializer
+from common.conditional import ConditionalGetMixin
+from common.mixins import SparseFieldsetMixin
 from common.responses import APIResponse
 from common.pagination import StandardPagination
 
 
-class WarehouseViewSet(viewsets.ModelViewSet):
+class WarehouseViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """仓库视图集"""
     permission_classes = [IsAuthenticated]  # 需要登录
     pagination_class = StandardPagination
@@ -21,14 +23,25 @@ class WarehouseViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'code', 'location', 'manager']
     ordering_fields = ['created_at', 'name', 'code']
     ordering = ['-created_at']
+    conditional_models = ('warehouses.warehouse', 'inventory.item')
+    query_budgets = {
+        'list': 5, 'retrieve': 4, 'active': 4, 'stock': 6,
+        'create': 6, 'update': 5, 'partial_update': 5, 'destroy': 9,
+    }
     
     def get_queryset(self):
         """优化查询，预计算current_usage避免N+1问题"""
         from django.db.models import Sum, Value
         from django.db.models.functions import Coalesce
         
+        # 列表请求未要求使用量字段时，省掉对余额表的JOIN和聚合
+        if self.action == 'list' and not (
+            self.wants_field('current_usage') or self.wants_field('usage_rate')
+        ):
+            return Warehouse.objects.all()
+        
         return Warehouse.objects.annotate(
-            _current_usage=Coalesce(Sum('items__stock'), Value(0))
+            _current_usage=Coalesce(Sum('balances__quantity'), Value(0))
         )
     
     def get_serializer_class(self):
@@ -68,16 +81,56 @@ class WarehouseViewSet(viewsets.ModelViewSet):
     
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        if instance.items.exists():
+        if instance.items.exists() or instance.balances.filter(quantity__gt=0).exists():
             return APIResponse.error(message="该仓库下有库存物品，无法删除")
         self.perform_destroy(instance)
         return APIResponse.success(message="仓库删除成功")
     
+    @action(detail=True, methods=['get'])
+    def stock(self, request, pk=None):
+        """仓库内的库存余额
+
+        ?low_stock=true 只返回低库存/缺货物品，?bin= 按仓位过滤。
+        """
+        from apps.inventory.models import Item, ItemStock
+        from apps.inventory.serializers import ItemStockSerializer
+        
+        warehouse = self.get_object()
+        queryset = ItemStock.objects.filter(warehouse=warehouse, quantity__gt=0).select_related(
+            'item', 'warehouse'
+        ).order_by('bin', 'item__code')
+        if request.query_params.get('low_stock') in ('true', '1'):
+            queryset = queryset.filter(item__status__in=Item.LOW_STOCK_STATUSES)
+        if request.query_params.get('bin'):
+            queryset = queryset.filter(bin=request.query_params['bin'])
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(ItemStockSerializer(page, many=True).data)
+        return APIResponse.success(data=ItemStockSerializer(queryset, many=True).data)
+    
     @action(detail=False, methods=['get'])
     def active(self, request):
-        """获取启用的仓库列表"""
-        queryset = self.get_queryset().filter(is_active=True)
-        serializer = WarehouseListSerializer(queryset, many=True)
+        """获取启用的仓库列表
+
+        仓库取自进程内引用数据（common.refdata），不查询仓库表；需要使用量字段时一次汇总余额表。
+        支持 ?fields= / ?omit=。
+        """
+        from django.db.models import Sum
+        from apps.inventory.models import ItemStock
+        from common import refdata
+        
+        warehouses = refdata.table('warehouses.warehouse')
+        instances = [warehouses.to_instance(row) for row in warehouses.rows(is_active=True)]
+        if self.wants_field('current_usage', WarehouseListSerializer) or \
+                self.wants_field('usage_rate', WarehouseListSerializer):
+            usage = dict(
+                ItemStock.objects.order_by().values('warehouse_id')
+                .annotate(total=Sum('quantity')).values_list('warehouse_id', 'total')
+            )
+            for warehouse in instances:
+                warehouse._current_usage = usage.get(warehouse.pk) or 0
+        serializer = WarehouseListSerializer(instances, many=True, context=self.get_serializer_context())
         return APIResponse.success(data=serializer.data)
 
 # 在这里定义你的视图
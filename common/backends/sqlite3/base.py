@@ -0,0 +1,52 @@
+"""
+SQLite 生产配置数据库后端
+
+在 Django 自带 SQLite 后端的基础上：
+
+- 每个新连接执行 OPTIONS['pragmas'] 中的 PRAGMA（WAL、synchronous=NORMAL、mmap、页缓存等）。
+  WAL 模式下读不阻塞写、写不阻塞读，仪表盘查询不会再等待入库/出库事务
+- 连接设置 begin_immediate 后，下一个最外层事务以 BEGIN IMMEDIATE 开始（见 common.transactions），
+  写事务一开始就取得写锁并按 timeout 排队等待，而不是读取之后升级写锁时直接报 database is locked
+
+    DATABASES = {'default': {
+        'ENGINE': 'common.backends.sqlite3',
+        'NAME': 'db.sqlite3',
+        'OPTIONS': {'timeout': 20, 'pragmas': {'journal_mode': 'WAL', 'synchronous': 'NORMAL'}},
+    }}
+"""
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMA_NAME_RE = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE_RE = re.compile(r'^-?[\w]+$')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    supports_immediate_transactions = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.begin_immediate = False
+
+    @property
+    def pragmas(self):
+        return self.settings_dict['OPTIONS'].get('pragmas') or {}
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        # pragmas 不是 sqlite3.connect() 的参数
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            if not PRAGMA_NAME_RE.match(name) or not PRAGMA_VALUE_RE.match(str(value)):
+                raise ImproperlyConfigured(f'无效的 SQLite PRAGMA 配置：{name}={value}')
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE' if self.begin_immediate else 'BEGIN')
@@ -0,0 +1,90 @@
+"""
+缓存版本计数器
+
+每个模型维护一个保存在共享缓存中的版本号，模型保存/删除（事务提交后）时递增。
+条件请求的 ETag、版本化的缓存键都基于这些计数器计算，无需查询业务数据。
+
+递增使用 cache.incr：Redis 上是原子操作；DatabaseCache、LocMemCache 上是先读后写，
+并发的两次递增可能合并为一次。合并不会留下过期的 ETag：两次递增都发生在各自事务提交之后，
+合并后的版本号仍不同于提交前的版本号，只要读取方先取版本号、再查询数据（get_versions 的调用方都是如此）。
+多台服务器部署时建议使用 Redis（REDIS_URL），计数器精确且不受数据库缓存淘汰影响。
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .db_routing import mark_recent_writes
+
+VERSION_KEY_PREFIX = 'cache_version:'
+
+
+def model_label(model):
+    """模型标签，如 inventory.item"""
+    return model._meta.label_lower
+
+
+def _version_key(label):
+    return f'{VERSION_KEY_PREFIX}{label.lower()}'
+
+
+def _initial_version():
+    # 以时间作为初始值：缓存被清空后不会与之前发出的版本号重复
+    return time.time_ns() // 1000
+
+
+def get_versions(*labels):
+    """批量获取版本号（一次缓存读取），返回 {标签: 版本号}
+
+    缺失的版本号一次 set_many 初始化后再一次 get_many 读回：并发初始化时以最后写入的值为准，
+    各进程读回的值一致。
+    """
+    keys = {_version_key(label): label.lower() for label in labels}
+    found = cache.get_many(list(keys))
+    missing = [key for key in keys if key not in found]
+    if missing:
+        initial = _initial_version()
+        cache.set_many({key: initial for key in missing}, None)
+        found.update(cache.get_many(missing))
+        for key in missing:
+            found.setdefault(key, initial)
+    return {label: found[key] for key, label in keys.items()}
+
+
+def versioned_key(base_key, versions):
+    """在缓存键中加入版本摘要，依赖数据变化后旧缓存自动失效"""
+    digest = hashlib.md5(repr(sorted(versions.items())).encode()).hexdigest()[:12]
+    return f'{base_key}:{digest}'
+
+
+def bump_version(*labels):
+    """递增版本号，使依赖这些模型的 ETag 和缓存失效"""
+    for label in labels:
+        key = _version_key(label)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
+    # 配置了只读副本时记录变化时间，复制延迟窗口内依赖这些模型的请求改读主库
+    mark_recent_writes(*labels)
+
+
+def bump_version_on_commit(*labels):
+    """在当前事务提交后递增版本号（不在事务中时立即执行）"""
+    transaction.on_commit(lambda: bump_version(*labels))
+
+
+def _bump_for_instance(sender, **kwargs):
+    bump_version_on_commit(model_label(sender))
+
+
+def track_model_versions(*models):
+    """为模型注册保存/删除信号，自动递增版本号
+
+    注意：QuerySet.update()/bulk_update 不会触发信号，调用方需自行调用 bump_version_on_commit。
+    """
+    for model in models:
+        post_save.connect(_bump_for_instance, sender=model, dispatch_uid=f'cache_version_save_{model_label(model)}')
+        post_delete.connect(_bump_for_instance, sender=model, dispatch_uid=f'cache_version_delete_{model_label(model)}')
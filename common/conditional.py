@@ -0,0 +1,102 @@
+"""
+HTTP 条件请求（ETag / 304）支持
+"""
+import hashlib
+
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache_versions import get_versions, versioned_key
+from .db_routing import pin_if_recently_written
+
+
+class NotModified(Exception):
+    """内部使用：ETag 命中时中断视图处理"""
+
+
+def _strip_weak(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+class ConditionalGetMixin:
+    """条件 GET 视图混入（适用于 APIView 和 ViewSet）
+
+    ETag 由视图依赖模型的缓存版本号、请求路径和参数、协商的响应格式计算，
+    不需要查询业务数据，也不需要序列化响应体。客户端携带 If-None-Match 且未变化时直接返回 304。
+
+    子类通过 conditional_models 声明依赖的模型标签（如 'inventory.item'），
+    对随时间变化的数据可覆盖 get_conditional_extra() 追加日期等因素。
+    """
+    conditional_models = ()
+    conditional_actions = None  # None 表示所有 GET 请求
+
+    def get_conditional_models(self):
+        return self.conditional_models
+
+    def get_conditional_extra(self):
+        """额外参与 ETag 计算的值"""
+        return ''
+
+    def is_conditional_request(self, request):
+        if request.method not in ('GET', 'HEAD') or not self.get_conditional_models():
+            return False
+        actions = self.conditional_actions
+        return actions is None or getattr(self, 'action', None) in actions
+
+    @property
+    def conditional_versions(self):
+        """本次请求依赖模型的版本号（每个请求只读取一次缓存）"""
+        if not hasattr(self, '_conditional_versions'):
+            models = self.get_conditional_models()
+            self._conditional_versions = get_versions(*models)
+            # 数据刚变化时副本可能还未同步，本次请求读主库，避免旧数据对应新版本号
+            pin_if_recently_written(*models)
+        return self._conditional_versions
+
+    def versioned_cache_key(self, base_key):
+        """在缓存键中加入版本摘要，依赖数据变化后旧缓存自动失效"""
+        return versioned_key(base_key, self.conditional_versions)
+
+    def get_conditional_etag(self, request):
+        versions = self.conditional_versions
+        parts = [
+            type(self).__name__,
+            getattr(self, 'action', None) or '',
+            request.get_full_path(),
+            getattr(request, 'accepted_media_type', '') or '',
+            str(self.get_conditional_extra()),
+            repr(sorted(versions.items())),
+        ]
+        digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+        return f'W/"{digest}"'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._conditional_etag = None
+        if not self.is_conditional_request(request):
+            return
+
+        etag = self.get_conditional_etag(request)
+        self._conditional_etag = etag
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            candidates = {_strip_weak(tag) for tag in parse_etags(if_none_match)}
+            if '*' in candidates or _strip_weak(etag) in candidates:
+                raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, '_conditional_etag', None)
+        if etag and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            # 允许客户端缓存，但每次使用前必须向服务器验证
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
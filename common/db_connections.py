@@ -0,0 +1,76 @@
+"""
+数据库连接复用统计
+
+设置 CONN_MAX_AGE 后，每个工作线程在请求之间保持数据库连接，复用前按 CONN_HEALTH_CHECKS 检查可用性。
+这里按进程统计新建连接数和请求数，得到连接复用率；PostgreSQL 下另外查询服务端的连接占用，
+由 SystemInfoView 输出，用于确认每个请求不再新建连接、连接总数没有逼近 max_connections。
+"""
+import os
+import threading
+from collections import Counter
+
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_lock = threading.Lock()
+_opened = Counter()
+_requests = 0
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    with _lock:
+        _opened[connection.alias] += 1
+
+
+def _on_request_started(sender, **kwargs):
+    global _requests
+    with _lock:
+        _requests += 1
+
+
+def install():
+    """注册统计信号（在 AppConfig.ready 中调用）"""
+    connection_created.connect(_on_connection_created, dispatch_uid='db_connections_created')
+    request_started.connect(_on_request_started, dispatch_uid='db_connections_requests')
+
+
+def connection_stats():
+    """本进程各数据库别名的连接配置和复用情况"""
+    with _lock:
+        opened, requests = dict(_opened), _requests
+    databases = {}
+    for alias in connections:
+        conn = connections[alias]
+        settings_dict = conn.settings_dict
+        count = opened.get(alias, 0)
+        databases[alias] = {
+            'vendor': conn.vendor,
+            'conn_max_age': settings_dict['CONN_MAX_AGE'],
+            'health_checks': settings_dict['CONN_HEALTH_CHECKS'],
+            'connected': conn.connection is not None,
+            'connections_opened': count,
+            # 请求数远大于新建连接数说明连接在请求之间被复用
+            'reuse_rate': round(max(0.0, 1 - count / requests), 4) if requests else None,
+        }
+        if conn.vendor == 'postgresql':
+            # 服务端游标只有 PostgreSQL 支持（经 PgBouncer 事务池时需要关闭）
+            databases[alias]['server_side_cursors'] = not settings_dict.get('DISABLE_SERVER_SIDE_CURSORS', False)
+    return {'pid': os.getpid(), 'requests': requests, 'databases': databases}
+
+
+def server_connections(alias='default'):
+    """PostgreSQL 服务端当前库的连接数（按状态）和 max_connections；其他数据库返回 None"""
+    conn = connections[alias]
+    if conn.vendor != 'postgresql':
+        return None
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT current_setting('max_connections')::int, COALESCE(state, 'unknown'), COUNT(*) "
+            "FROM pg_stat_activity WHERE datname = current_database() GROUP BY 1, 2"
+        )
+        rows = cursor.fetchall()
+    if not rows:
+        return {'max_connections': None, 'total': 0, 'by_state': {}}
+    by_state = {state: count for _max, state, count in rows}
+    return {'max_connections': rows[0][0], 'total': sum(by_state.values()), 'by_state': by_state}
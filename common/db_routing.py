@@ -0,0 +1,157 @@
+"""
+读写分离：只读副本路由
+
+settings.REPLICA_DATABASES 配置了只读副本时：
+
+- 写入始终使用主库 default；事务（transaction.atomic）中的读取也使用主库
+- ReplicaRoutingMiddleware 把安全请求（GET/HEAD/OPTIONS）的读取分配到随机选择的副本
+- 请求中发生写入后，本请求剩余的读取改用主库，并通过 Cookie 把该客户端
+  在 REPLICA_PIN_SECONDS 秒内的读取固定到主库（读到自己刚写入的数据）
+- 模型数据刚变化（版本号在固定时间窗内递增过）时，依赖它的条件请求/版本化缓存改读主库，
+  避免把副本上的旧数据写入新版本的缓存或 ETag
+- 请求之外（管理命令、定时任务）默认读主库，批量报表可以用 read_from_replica() 显式读取副本
+
+未配置副本时路由器不做任何选择，所有查询照旧使用 default。
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'db_primary_until'
+RECENT_WRITE_PREFIX = 'replica_recent_write:'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# 数据库缓存后端的伪模型（DatabaseCache 通过路由器选择数据库），缓存读写固定在主库
+CACHE_APP_LABEL = 'django_cache'
+
+
+class RoutingState:
+    """当前请求（上下文）的路由状态"""
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'REPLICA_DATABASES', ()))
+
+
+def pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+
+@contextmanager
+def read_from_replica():
+    """代码块中的读取使用副本（写入和事务仍使用主库）"""
+    token = _state.set(RoutingState(use_replica=True))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """代码块中的读取固定使用主库"""
+    token = _state.set(RoutingState(use_replica=False))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def pin_primary():
+    """当前请求剩余的读取改用主库"""
+    state = _state.get()
+    if state is not None:
+        state.use_replica = False
+
+
+def mark_recent_writes(*labels):
+    """记录模型数据刚发生变化（由 cache_versions.bump_version 调用）"""
+    if labels and replica_aliases():
+        cache.set_many({f'{RECENT_WRITE_PREFIX}{label.lower()}': 1 for label in labels}, pin_seconds())
+
+
+def pin_if_recently_written(*labels):
+    """依赖的模型在固定时间窗内变化过时，当前请求改读主库，返回是否固定"""
+    state = _state.get()
+    if not labels or state is None or not state.use_replica:
+        return False
+    if cache.get_many([f'{RECENT_WRITE_PREFIX}{label.lower()}' for label in labels]):
+        state.use_replica = False
+        return True
+    return False
+
+
+class ReplicaRouter:
+    """主库写、副本读的数据库路由器"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == CACHE_APP_LABEL:
+            return DEFAULT_DB_ALIAS
+        state = _state.get()
+        replicas = replica_aliases()
+        if state is None or not state.use_replica or not replicas:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # 事务中的读取（含 select_for_update）必须与写入在同一连接上
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label != CACHE_APP_LABEL:
+            state = _state.get()
+            if state is not None:
+                state.wrote = True
+                state.use_replica = False
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 副本与主库是同一份数据
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """按请求方法和 Cookie 决定读取副本还是主库，写入后固定到主库"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_aliases():
+            return self.get_response(request)
+
+        state = RoutingState(use_replica=request.method in SAFE_METHODS and not self.is_pinned(request))
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if state.wrote or (request.method not in SAFE_METHODS and response.status_code < 400):
+            seconds = pin_seconds()
+            response.set_cookie(
+                PIN_COOKIE, str(int(time.time()) + seconds),
+                max_age=seconds, httponly=True, samesite='Lax',
+            )
+        return response
+
+    @staticmethod
+    def is_pinned(request):
+        try:
+            return int(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
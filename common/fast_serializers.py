@@ -0,0 +1,247 @@
+"""
+列表接口的快速读取路径
+
+高数据量的列表接口序列化开销主要在：为每行构造模型实例（含 select_related 的关联实例），
+再逐字段走 DRF 的 get_attribute / to_representation，图片地址、选项显示名等还要逐行调用方法。
+
+快速路径按（裁剪后的）序列化器字段生成 values() 投影，并为每组字段编译一个“行字典 -> 输出字典”的函数：
+
+- 普通列、外键 ID、沿外键取值（source='category.name'）直接从行字典取值
+- 字符串、整数、布尔等取值即输出的字段不再调用 to_representation；日期时间、小数等仍调用原字段的
+  to_representation，输出格式与序列化器完全一致
+- get_xxx_display 编译为选项字典查找；SerializerMethodField、属性等在 Meta.fast_fields 中声明取值方式
+  （MediaURL / FullName / Computed），图片的站点地址每个请求只计算一次
+- 与序列化器的空值规则一致：沿可空外键取值且外键为空时不输出该字段，字段本身为空时输出 None
+
+编译结果按（序列化器类, 字段）缓存；无法编译的序列化器（嵌套序列化器、未声明的方法字段等）返回 None，
+调用方回退到序列化器。
+"""
+import threading
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.files.storage import FileSystemStorage
+from django.utils.encoding import filepath_to_uri
+from rest_framework import serializers
+
+from .mixins import DISPLAY_METHOD_RE
+
+# DRF 字段类型 -> 取值即输出时对应的模型字段类型
+PASSTHROUGH = (
+    (serializers.ReadOnlyField, None),
+    (serializers.BooleanField, ('BooleanField',)),
+    (serializers.IntegerField, ('IntegerField', 'SmallIntegerField', 'BigIntegerField', 'PositiveIntegerField',
+                                'PositiveSmallIntegerField', 'PositiveBigIntegerField', 'AutoField',
+                                'BigAutoField', 'SmallAutoField')),
+    (serializers.CharField, ('CharField', 'TextField', 'SlugField', 'EmailField', 'URLField')),
+)
+
+
+class Unsupported(Exception):
+    """字段无法编译为快速路径"""
+
+
+def _resolve_path(model, attrs):
+    """沿外键解析字段路径，返回 (查询路径, 末端模型字段, 途经的可空外键路径)"""
+    opts = model._meta
+    path = []
+    nullable = []
+    for index, attr in enumerate(attrs):
+        try:
+            field = opts.get_field(attr)
+        except FieldDoesNotExist:
+            raise Unsupported(attr)
+        if not getattr(field, 'concrete', False):
+            raise Unsupported(attr)
+        path.append(field.name)
+        if index == len(attrs) - 1:
+            return '__'.join(path), field, nullable
+        if not (field.many_to_one or field.one_to_one):
+            raise Unsupported(attr)
+        if field.null:
+            nullable.append('__'.join(path))
+        opts = field.related_model._meta
+    raise Unsupported('')
+
+
+class FastField:
+    """Meta.fast_fields 中声明的字段取值方式"""
+    sources = ()
+
+    def resolve(self, model):
+        """返回 (查询路径, 途经的可空外键路径)"""
+        lookups, guards = [], []
+        for source in self.sources:
+            lookup, _field, nullable = _resolve_path(model, source.split('.'))
+            lookups.append(lookup)
+            guards.extend(guard for guard in nullable if guard not in guards)
+        return lookups, guards
+
+    def bind(self, model, request):
+        """返回本次请求使用的取值函数，参数依次为各查询路径的值"""
+        raise NotImplementedError
+
+
+class MediaURL(FastField):
+    """文件字段的完整地址（与 request.build_absolute_uri(field.url) 一致，空文件为 None）"""
+
+    def __init__(self, source):
+        self.sources = [source]
+
+    def bind(self, model, request):
+        lookup, field, _nullable = _resolve_path(model, self.sources[0].split('.'))
+        storage = field.storage
+        if request is None:
+            return lambda name: storage.url(name) if name else None
+        if isinstance(storage, FileSystemStorage):
+            # 本地存储的地址为 MEDIA_URL + 路径，站点部分每个请求只计算一次
+            base = request.build_absolute_uri(storage.base_url)
+            return lambda name: base + filepath_to_uri(name).lstrip('/') if name else None
+        return lambda name: request.build_absolute_uri(storage.url(name)) if name else None
+
+
+class FullName(FastField):
+    """用户的 get_full_name()"""
+
+    def __init__(self, source):
+        self.sources = [f'{source}.first_name', f'{source}.last_name']
+
+    def bind(self, model, request):
+        return lambda first_name, last_name: f'{first_name} {last_name}'.strip()
+
+
+class Computed(FastField):
+    """由若干列计算的值（如 total_value = stock * price），func 与模型属性的计算一致"""
+
+    def __init__(self, sources, func):
+        self.sources = list(sources)
+        self.func = func
+
+    def bind(self, model, request):
+        return self.func
+
+
+def _is_passthrough(field, model_field):
+    for field_class, model_types in PASSTHROUGH:
+        if type(field) is field_class:
+            return model_types is None or model_field.get_internal_type() in model_types
+    return type(field) is serializers.ChoiceField and model_field.get_internal_type() == 'CharField'
+
+
+class _Plan:
+    """一组字段的编译结果：values() 查询路径和生成的转换函数代码"""
+
+    def __init__(self, model, serializer):
+        declared = getattr(getattr(serializer, 'Meta', None), 'fast_fields', {})
+        self.model = model
+        self.lookups = [model._meta.pk.name]
+        self.bindings = []  # (命名空间中的名称, 字段名, 类型)
+        lines = ['def convert(row):', '    out = {}']
+        for position, (name, field) in enumerate(serializer.fields.items()):
+            lines.extend('    ' + line for line in self._compile_field(position, name, field, declared))
+        lines.append('    return out')
+        self.code = compile('\n'.join(lines), f'<fast serializer {type(serializer).__name__}>', 'exec')
+
+    def _column(self, lookup):
+        if lookup not in self.lookups:
+            self.lookups.append(lookup)
+        return f'row[{lookup!r}]'
+
+    @staticmethod
+    def _guarded(guards, statements):
+        # 沿可空外键取值且外键为空时，序列化器跳过该字段
+        if not guards:
+            return statements
+        return [f"if {' and '.join(f'{guard} is not None' for guard in guards)}:"] + ['    ' + s for s in statements]
+
+    def _compile_field(self, position, name, field, declared):
+        if name in declared:
+            fast_field = declared[name]
+            lookups, guards = fast_field.resolve(self.model)
+            func = f'_f{position}'
+            self.bindings.append((func, name, 'declared'))
+            arguments = ', '.join(self._column(lookup) for lookup in lookups)
+            guards = [self._column(guard) for guard in guards]
+            return self._guarded(guards, [f'out[{name!r}] = {func}({arguments})'])
+
+        # 嵌套序列化器、方法字段、文件字段（需要 FieldFile）必须在 fast_fields 中声明
+        unsupported = (serializers.BaseSerializer, serializers.SerializerMethodField, serializers.FileField)
+        if isinstance(field, unsupported) or field.source == '*':
+            raise Unsupported(name)
+        attrs = list(field.source_attrs)
+        display = DISPLAY_METHOD_RE.match(attrs[-1])
+        if display:
+            attrs[-1] = display.group('field')
+        lookup, model_field, nullable = _resolve_path(self.model, attrs)
+        guards = [self._column(guard) for guard in nullable]
+        value = self._column(lookup)
+
+        if display:
+            choices = f'_c{position}'
+            self.bindings.append((choices, name, 'choices'))
+            expression = f'str({choices}.get(value, value))'
+        elif model_field.is_relation:
+            if not isinstance(field, serializers.PrimaryKeyRelatedField) or field.pk_field is not None:
+                raise Unsupported(name)
+            expression = 'value'  # values() 直接返回外键 ID
+        elif _is_passthrough(field, model_field):
+            expression = 'value'
+        else:
+            func = f'_f{position}'
+            self.bindings.append((func, name, 'field'))
+            expression = f'{func}(value)'
+        statements = [f'value = {value}', f'out[{name!r}] = None if value is None else {expression}']
+        return self._guarded(guards, statements)
+
+    def bind(self, serializer, request):
+        namespace = {}
+        declared = getattr(getattr(serializer, 'Meta', None), 'fast_fields', {})
+        for symbol, name, kind in self.bindings:
+            if kind == 'declared':
+                namespace[symbol] = declared[name].bind(self.model, request)
+            elif kind == 'choices':
+                source = serializer.fields[name].source_attrs
+                attrs = source[:-1] + [DISPLAY_METHOD_RE.match(source[-1]).group('field')]
+                namespace[symbol] = dict(_resolve_path(self.model, attrs)[1].flatchoices)
+            else:
+                namespace[symbol] = serializer.fields[name].to_representation
+        exec(self.code, namespace)
+        return namespace['convert']
+
+
+_plans = {}
+_lock = threading.Lock()
+
+
+def get_plan(model, serializer):
+    """编译（或取出已缓存的）快速路径；不支持时返回 None"""
+    key = (model, type(serializer), tuple(serializer.fields))
+    if key not in _plans:
+        try:
+            plan = _Plan(model, serializer)
+        except Unsupported:
+            plan = None
+        with _lock:
+            _plans.setdefault(key, plan)
+    return _plans[key]
+
+
+class FastListSerializer:
+    """按序列化器字段从 values() 行生成输出，结果与 serializer(many=True).data 一致"""
+
+    def __init__(self, plan, serializer, request):
+        self.lookups = plan.lookups
+        self.convert = plan.bind(serializer, request)
+
+    @classmethod
+    def for_serializer(cls, model, serializer):
+        plan = get_plan(model, serializer)
+        if plan is None:
+            return None
+        return cls(plan, serializer, serializer.context.get('request'))
+
+    def project(self, queryset):
+        return queryset.values(*self.lookups)
+
+    def serialize(self, rows):
+        convert = self.convert
+        return [convert(row) for row in rows]
@@ -0,0 +1,96 @@
+"""
+通用中间件
+"""
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 未安装时只使用gzip
+    brotli = None
+
+ACCEPT_ENCODING_RE = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*')
+
+# 响应体包含这些键（登录、刷新令牌的返回值）时不使用 brotli，见 CompressionMiddleware
+SECRET_MARKERS = (b'"token"', b'"refresh_token"', b'"access"', b'"refresh"')
+
+
+def parse_accept_encoding(header):
+    """解析 Accept-Encoding，返回 {编码: q值}"""
+    encodings = {}
+    for part in header.split(','):
+        match = ACCEPT_ENCODING_RE.fullmatch(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+        encodings[match.group(1).lower()] = quality
+    return encodings
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """响应压缩中间件
+
+    超过 COMPRESSION_MIN_SIZE 字节的响应按 Accept-Encoding 使用 brotli 或 gzip 压缩，
+    小响应直接返回，避免压缩开销大于收益。流式响应（静态文件等）由 WhiteNoise/Nginx 处理。
+
+    gzip 在文件头中加入随机长度的填充，使压缩后长度不能精确反映内容（缓解 BREACH）；
+    brotli 格式没有等价的填充位置，包含令牌或设置 Cookie 的响应改用 gzip。
+    """
+    max_random_bytes = 100
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = self._choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''), allow_brotli=not self._contains_secrets(response)
+        )
+        if encoding is None:
+            return response
+
+        if encoding == 'br':
+            compressed = brotli.compress(
+                response.content,
+                quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4),
+            )
+        else:
+            compressed = compress_string(response.content, max_random_bytes=self.max_random_bytes)
+
+        # 压缩后没有变小则保持原样
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        response.headers['Content-Encoding'] = encoding
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
+
+    @staticmethod
+    def _contains_secrets(response):
+        content = response.content
+        return bool(response.cookies) or any(marker in content for marker in SECRET_MARKERS)
+
+    @staticmethod
+    def _choose_encoding(header, allow_brotli=True):
+        """选择编码：优先 brotli，其次 gzip"""
+        encodings = parse_accept_encoding(header)
+        if allow_brotli and brotli is not None and encodings.get('br', 0) > 0:
+            return 'br'
+        if encodings.get('gzip', encodings.get('*', 0)) > 0:
+            return 'gzip'
+        return None
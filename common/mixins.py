@@ -0,0 +1,139 @@
+"""
+通用视图混入
+"""
+import re
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+DISPLAY_METHOD_RE = re.compile(r'^get_(?P<field>\w+)_display$')
+
+
+def _resolve_source(model, source_attrs, only, related):
+    """把序列化器字段的 source 解析为模型字段路径
+
+    解析成功时把需要加载的列写入 only，需要 JOIN 的关联写入 related 并返回True；
+    遇到属性、方法等无法推断的来源时返回False。
+    """
+    opts = model._meta
+    path = []
+    for index, attr in enumerate(source_attrs):
+        match = DISPLAY_METHOD_RE.match(attr)
+        if match and index == len(source_attrs) - 1:
+            attr = match.group('field')
+        try:
+            field = opts.get_field(attr)
+        except FieldDoesNotExist:
+            return False
+        if not getattr(field, 'concrete', False):
+            return False
+
+        path.append(field.name)
+        lookup = '__'.join(path)
+        only.add(lookup)
+        if not field.is_relation:
+            return True
+        if not (field.many_to_one or field.one_to_one):
+            return False
+        if index == len(source_attrs) - 1:
+            # 只用到外键本身（如 PrimaryKeyRelatedField），无需 JOIN
+            return True
+        related.add(lookup)
+        opts = field.related_model._meta
+    return True
+
+
+def build_projection(model, serializer):
+    """根据序列化器实际输出的字段计算 only() 列和 select_related() 关联
+
+    返回 (only, related)；存在无法推断来源的字段时返回 None，调用方应保持原查询不变。
+    """
+    meta = getattr(serializer, 'Meta', None)
+    declared = getattr(meta, 'sparse_sources', {})
+    only = {model._meta.pk.name}
+    related = set()
+
+    for name, field in serializer.fields.items():
+        if name in declared:
+            sources = [source.split('.') for source in declared[name]]
+        elif isinstance(field, serializers.BaseSerializer) or field.source == '*':
+            return None
+        else:
+            sources = [field.source_attrs]
+        for source_attrs in sources:
+            if not _resolve_source(model, source_attrs, only, related):
+                return None
+    return only, related
+
+
+def project_queryset(queryset, serializer):
+    """按序列化器字段裁剪查询：只加载需要的列，去掉用不到的 JOIN"""
+    projection = build_projection(queryset.model, serializer)
+    if projection is None:
+        return queryset
+    only, related = projection
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*sorted(related))
+    return queryset.only(*sorted(only))
+
+
+class SparseFieldsetMixin:
+    """稀疏字段集视图混入
+
+    配合 common.serializers.SparseFieldsMixin 使用：列表接口支持 ``?fields=`` /
+    ``?omit=`` 参数，同时按最终输出的字段裁剪 SQL（only() 投影并移除多余的
+    select_related），返回体大小和数据库读取宽度都随客户端请求的字段变化。
+    """
+    sparse_field_actions = ('list',)
+
+    def get_sparse_serializer(self, serializer_class=None):
+        """获取按请求参数裁剪后的序列化器（不含数据，仅用于分析字段）"""
+        serializer_class = serializer_class or self.get_serializer_class()
+        cache = self.__dict__.setdefault('_sparse_serializers', {})
+        if serializer_class not in cache:
+            cache[serializer_class] = serializer_class(context=self.get_serializer_context())
+        return cache[serializer_class]
+
+    def wants_field(self, name, serializer_class=None):
+        """当前请求是否需要输出某个字段"""
+        return name in self.get_sparse_serializer(serializer_class).fields
+
+    def project_queryset(self, queryset, serializer_class=None):
+        """按当前请求需要的字段裁剪查询"""
+        return project_queryset(queryset, self.get_sparse_serializer(serializer_class))
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action in self.sparse_field_actions:
+            queryset = self.project_queryset(queryset)
+        return queryset
+
+
+class FastListMixin:
+    """列表接口快速读取路径（见 common.fast_serializers）
+
+    list 动作用 values() 投影和编译好的行转换函数代替序列化器，输出与序列化器完全一致；
+    序列化器无法编译时自动回退到序列化器。与 SparseFieldsetMixin 一起使用，字段集随 ?fields= / ?omit= 变化。
+    """
+    fast_list_actions = ('list',)
+
+    def get_fast_serializer(self, model):
+        if self.action not in self.fast_list_actions:
+            return None
+        from .fast_serializers import FastListSerializer
+        return FastListSerializer.for_serializer(model, self.get_sparse_serializer())
+
+    def list(self, request, *args, **kwargs):
+        from .responses import APIResponse
+
+        queryset = self.filter_queryset(self.get_queryset())
+        fast = self.get_fast_serializer(queryset.model)
+        if fast is not None:
+            queryset = fast.project(queryset)
+        page = self.paginate_queryset(queryset)
+        rows = queryset if page is None else page
+        data = fast.serialize(rows) if fast is not None else self.get_serializer(rows, many=True).data
+        if page is not None:
+            return self.get_paginated_response(data)
+        return APIResponse.success(data=data)
@@ -0,0 +1,185 @@
+"""
+API 文档（OpenAPI）
+
+接口结构只在部署时变化，不需要每个请求重新内省全部视图和序列化器：
+
+- generate_openapi 命令在部署时把文档生成到 OPENAPI_SCHEMA['DIRECTORY'] 下的 openapi.json / openapi.yaml
+- /swagger.json/、/swagger.yaml/ 直接返回文件内容（进程内只读取一次），ETag 为内容摘要；
+  Swagger UI 和 ReDoc 使用带 ?v=<摘要> 的地址加载文档，浏览器和 CDN 可以长期缓存，重新部署后地址随内容变化
+- Swagger UI / ReDoc 页面与请求无关（未启用 Session 认证），每个进程只渲染一次
+
+drf_yasg 只在生成文档或首次访问文档时导入，API 工作进程启动不再加载它（及其依赖的 pkg_resources）。
+文档文件不存在时（开发环境）首次访问在进程内生成一次并缓存，修改接口后重启开发服务器即可。
+"""
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+
+from .query_budget import query_budget
+
+logger = logging.getLogger(__name__)
+
+# URL 中的格式后缀 -> (文件名, Content-Type)
+FORMATS = {
+    '.json': ('openapi.json', 'application/json'),
+    '.yaml': ('openapi.yaml', 'application/yaml; charset=utf-8'),
+}
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_lock = threading.Lock()
+_documents = {}  # 格式后缀 -> (内容, ETag)
+_pages = {}      # 'swagger' / 'redoc' -> (页面, ETag)
+
+
+def get_config():
+    return {'DIRECTORY': str(Path(settings.BASE_DIR) / 'openapi'), 'MAX_AGE': 3600,
+            **getattr(settings, 'OPENAPI_SCHEMA', {})}
+
+
+def build_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="库存管理系统 API",
+        default_version='v1',
+        description="库存管理系统后端API文档",
+        terms_of_service="https://www.example.com/terms/",
+        contact=openapi.Contact(email="admin@example.com"),
+        license=openapi.License(name="MIT License"),
+    )
+
+
+def generate_schema():
+    """内省全部接口生成文档对象
+
+    使用模拟的匿名 GET 请求（部分视图的 get_queryset 读取查询参数）；url 置空，文档不写入 host，路径相对当前站点。
+    """
+    from drf_yasg.app_settings import swagger_settings
+    from rest_framework.test import APIRequestFactory
+    from rest_framework.views import APIView
+
+    request = APIView().initialize_request(APIRequestFactory().get('/swagger.json'))
+    generator = swagger_settings.DEFAULT_GENERATOR_CLASS(build_info(), url='')
+    return generator.get_schema(request=request, public=True)
+
+
+def encode_schema(schema, fmt):
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+
+    codec = OpenAPICodecJson if fmt == '.json' else OpenAPICodecYaml
+    return codec(validators=[]).encode(schema)
+
+
+def write_schema_files(directory=None):
+    """生成文档并写入目录，返回 [(路径, 字节数)]"""
+    directory = Path(directory or get_config()['DIRECTORY'])
+    directory.mkdir(parents=True, exist_ok=True)
+    schema = generate_schema()
+    written = []
+    for fmt, (filename, _content_type) in FORMATS.items():
+        content = encode_schema(schema, fmt)
+        path = directory / filename
+        # 先写临时文件再替换，正在运行的进程不会读到写了一半的文件
+        temporary = path.with_suffix(path.suffix + '.tmp')
+        temporary.write_bytes(content)
+        temporary.replace(path)
+        written.append((path, len(content)))
+    with _lock:
+        _documents.clear()
+        _pages.clear()
+    return written
+
+
+def _etag(content):
+    return '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+
+
+def get_document(fmt):
+    """(内容, ETag)；优先读取部署时生成的文件"""
+    if fmt not in _documents:
+        with _lock:
+            if fmt not in _documents:
+                path = Path(get_config()['DIRECTORY']) / FORMATS[fmt][0]
+                try:
+                    content = path.read_bytes()
+                except FileNotFoundError:
+                    logger.warning('%s 不存在，在进程内生成 API 文档（部署时请运行 generate_openapi）', path)
+                    content = encode_schema(generate_schema(), fmt)
+                _documents[fmt] = (content, _etag(content))
+    return _documents[fmt]
+
+
+def spec_url():
+    """UI 加载文档用的版本化地址"""
+    etag = get_document('.json')[1]
+    return '%s?v=%s' % (reverse('schema-json', kwargs={'format': '.json'}), etag.strip('"'))
+
+
+def _render_page(request, kind):
+    from drf_yasg import openapi, renderers
+
+    url = spec_url()
+
+    class SwaggerUIRenderer(renderers.SwaggerUIRenderer):
+        def get_swagger_ui_settings(self):
+            return {**super().get_swagger_ui_settings(), 'url': url}
+
+    class ReDocRenderer(renderers.ReDocRenderer):
+        def get_redoc_settings(self):
+            return {**super().get_redoc_settings(), 'url': url}
+
+    renderer = SwaggerUIRenderer() if kind == 'swagger' else ReDocRenderer()
+    # 页面只用到标题和版本号，不需要完整文档
+    swagger = openapi.Swagger(info=build_info(), _prefix='/', paths=openapi.Paths({}))
+    return renderer.render(swagger, renderer.media_type, {'request': request}).encode('utf-8')
+
+
+def get_page(request, kind):
+    if kind not in _pages:
+        content = _render_page(request, kind)
+        with _lock:
+            _pages.setdefault(kind, (content, _etag(content)))
+    return _pages[kind]
+
+
+def _respond(request, content, etag, content_type, max_age, immutable=False):
+    response = HttpResponse(content, content_type=content_type)
+    response['ETag'] = etag
+    if immutable:
+        patch_cache_control(response, public=True, max_age=max_age, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=max_age)
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+@query_budget(0)
+@require_safe
+def schema_view(request, format):
+    if format not in FORMATS:
+        raise Http404
+    content, etag = get_document(format)
+    # 带当前摘要的版本化地址内容不会再变化，可以永久缓存；其他地址缓存 MAX_AGE 秒后用 ETag 重新验证
+    if request.GET.get('v') == etag.strip('"'):
+        return _respond(request, content, etag, FORMATS[format][1], IMMUTABLE_MAX_AGE, immutable=True)
+    return _respond(request, content, etag, FORMATS[format][1], get_config()['MAX_AGE'])
+
+
+@query_budget(0)
+@require_safe
+def swagger_ui_view(request):
+    content, etag = get_page(request, 'swagger')
+    return _respond(request, content, etag, 'text/html; charset=utf-8', get_config()['MAX_AGE'])
+
+
+@query_budget(0)
+@require_safe
+def redoc_view(request):
+    content, etag = get_page(request, 'redoc')
+    return _respond(request, content, etag, 'text/html; charset=utf-8', get_config()['MAX_AGE'])
@@ -0,0 +1,185 @@
+"""
+接口查询预算
+
+每个接口声明单次请求允许的最多 SQL 查询数，QueryBudgetMiddleware 通过
+connection.execute_wrapper 统计请求处理期间的查询：
+
+- 测试中（STRICT=True，见 common.test_runner）超出预算直接抛出 QueryBudgetExceeded，测试失败
+- 生产环境只记录结构化警告（logger: common.query_budget），附带重复次数最多的 SQL，便于定位 N+1
+
+预算的声明方式：
+
+    class ItemViewSet(viewsets.ModelViewSet):
+        query_budgets = {'list': 6, 'retrieve': 5}    # ViewSet 按 action，APIView 按小写 HTTP 方法
+
+        @query_budget(4)                               # 自定义 action 也可以直接用装饰器
+        @action(detail=False)
+        def statistics(self, request): ...
+
+    class OverviewView(APIView):
+        query_budget = 8                                # 所有方法共用
+
+    @query_budget(3)                                    # 函数视图：装饰在 @api_view 外层
+    @api_view(['GET'])
+    def profile(request): ...
+
+预算包含认证查询（JWT 读取用户 1 次），不包含事务控制语句和数据库缓存后端的查询。
+"""
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_RE = re.compile(r'^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK|BEGIN|COMMIT)\b', re.IGNORECASE)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """请求的查询数超出声明的预算（仅严格模式下抛出）"""
+
+
+def query_budget(limit):
+    """为视图函数、ViewSet action 或 APIView 方法声明查询预算"""
+    def decorator(func):
+        func.query_budget = limit
+        return func
+    return decorator
+
+
+def get_config():
+    return {'ENABLED': True, 'STRICT': False, **getattr(settings, 'QUERY_BUDGET', {})}
+
+
+def resolve_budget(callback, method):
+    """根据 URL 解析得到的视图和 HTTP 方法查找预算，未声明时返回 None"""
+    cls = getattr(callback, 'cls', None)
+    if cls is None:
+        return getattr(callback, 'query_budget', None)
+
+    actions = getattr(callback, 'actions', None)
+    key = actions.get(method.lower()) if actions else method.lower()
+    if key is None:
+        return None
+    handler = getattr(cls, key, None)
+    for budget in (
+        getattr(handler, 'query_budget', None),
+        getattr(cls, 'query_budgets', {}).get(key),
+        getattr(cls, 'query_budget', None) if isinstance(getattr(cls, 'query_budget', None), int) else None,
+        # @api_view 函数视图：预算声明在 as_view() 返回的函数上
+        getattr(callback, 'query_budget', None),
+    ):
+        if budget is not None:
+            return budget
+    return None
+
+
+def iter_endpoints(prefix='api/'):
+    """遍历 URL 配置中的接口，生成 (路径, 视图, HTTP 方法)"""
+    def walk(patterns, path=''):
+        for pattern in patterns:
+            if hasattr(pattern, 'url_patterns'):
+                yield from walk(pattern.url_patterns, path + str(pattern.pattern))
+            else:
+                yield path + str(pattern.pattern), pattern.callback
+
+    for path, callback in walk(get_resolver().url_patterns):
+        if not path.startswith(prefix):
+            continue
+        cls = getattr(callback, 'cls', None)
+        if cls is not None and cls.__name__ == 'APIRootView':
+            continue
+        actions = getattr(callback, 'actions', None)
+        if actions:
+            methods = list(actions)
+        elif cls is not None:
+            methods = [m for m in cls.http_method_names if m not in ('options', 'head') and hasattr(cls, m)]
+        else:
+            methods = ['get']
+        for method in methods:
+            yield path, callback, method
+
+
+def endpoints_without_budget(prefix='api/'):
+    """没有声明预算的接口，返回 ['METHOD 路径', ...]"""
+    return [
+        f'{method.upper()} {path}'
+        for path, callback, method in iter_endpoints(prefix)
+        if resolve_budget(callback, method) is None
+    ]
+
+
+class QueryCounter:
+    """execute_wrapper 回调：统计查询数和重复的 SQL"""
+
+    def __init__(self, ignored_tables=()):
+        self.count = 0
+        self.statements = Counter()
+        self.ignored_tables = ignored_tables
+
+    def __call__(self, execute, sql, params, many, context):
+        if not TRANSACTION_RE.match(sql) and not any(table in sql for table in self.ignored_tables):
+            self.count += 1
+            self.statements[sql] += 1
+        return execute(sql, params, many, context)
+
+
+def _cache_tables():
+    # 数据库缓存后端的读写不计入预算
+    return tuple(
+        cache['LOCATION'] for cache in getattr(settings, 'CACHES', {}).values()
+        if cache.get('BACKEND', '').endswith('DatabaseCache') and cache.get('LOCATION')
+    )
+
+
+class QueryBudgetMiddleware:
+    """统计每个请求的查询数并与视图声明的预算比较"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.ignored_tables = _cache_tables()
+
+    def __call__(self, request):
+        config = get_config()
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        counter = QueryCounter(self.ignored_tables)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        budget = resolve_budget(match.func, request.method) if match else None
+        if budget is not None and counter.count > budget:
+            self.report(request, match, budget, counter, config['STRICT'])
+        return response
+
+    def report(self, request, match, budget, counter, strict):
+        callback = match.func
+        view = getattr(callback, 'cls', callback).__name__
+        actions = getattr(callback, 'actions', None) or {}
+        action = actions.get(request.method.lower(), request.method.lower())
+        repeated, times = counter.statements.most_common(1)[0]
+        details = {
+            'view': view,
+            'action': action,
+            'method': request.method,
+            'path': request.path,
+            'queries': counter.count,
+            'budget': budget,
+            'most_repeated_sql': repeated[:500],
+            'most_repeated_times': times,
+        }
+        message = (
+            f'{request.method} {request.path} ({view}.{action}) 执行了 {counter.count} 次查询，'
+            f'超出预算 {budget}；重复最多的查询执行了 {times} 次：{repeated[:200]}'
+        )
+        if strict:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message, extra={'query_budget': details})
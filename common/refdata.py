@@ -0,0 +1,114 @@
+"""
+引用数据进程内缓存
+
+仓库、供应商、类别等小表变化很少，却在每次页面加载（下拉框）和每次出入库校验中被反复查询。
+每个进程在内存中保存这些表的全部行（一次查询批量加载），按缓存版本计数器（common.cache_versions）判断是否过期：
+
+- 读取时一次缓存读取取得版本号，与加载时的版本号一致直接返回内存中的行，不查询业务表
+- 其他进程修改数据后版本号在事务提交后递增，本进程下次读取时重新加载
+- 本进程内的保存/删除立即把表标记为过期（不等事务提交），同一请求随后的读取能看到新数据
+- 总是从主库加载：副本可能落后于刚递增的版本号，读到的旧行会以新版本号保存下来
+- 在事务内重新加载的行可能包含尚未提交（之后可能回滚）的修改，只供本次读取使用，不保存为进程副本
+
+rows() / get() 返回的行字典由所有请求共享，调用方不得修改；需要模型实例时使用 instance()。
+QuerySet.update() 不触发信号，调用方需自行调用 bump_version_on_commit。
+"""
+import threading
+
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.models.signals import post_delete, post_save
+
+from .cache_versions import get_versions, model_label
+
+
+class RefTable:
+    """一张引用数据表的内存副本"""
+
+    def __init__(self, label):
+        self.label = label
+        self._lock = threading.Lock()
+        self._state = None  # (版本号, 行列表, {主键: 行})
+        self._stale = True
+
+    @property
+    def model(self):
+        return apps.get_model(self.label)
+
+    def _load(self, version):
+        model = self.model
+        fields = [field.attname for field in model._meta.concrete_fields]
+        # 按模型默认排序；不经过读写分离路由，避免把副本上的旧数据保存为新版本
+        rows = list(model._default_manager.using(DEFAULT_DB_ALIAS).values(*fields))
+        return version, rows, {row[model._meta.pk.attname]: row for row in rows}
+
+    def _current(self):
+        version = get_versions(self.label)[self.label]
+        state = self._state
+        if state is None or state[0] != version or self._stale:
+            if _in_transaction():
+                return self._load(version)
+            with self._lock:
+                self._stale = False
+                state = self._state = self._load(version)
+        return state
+
+    def invalidate(self):
+        self._stale = True
+
+    def rows(self, **filters):
+        """全部行（模型默认排序），可按列值过滤：rows(is_active=True)"""
+        rows = self._current()[1]
+        if filters:
+            rows = [row for row in rows if all(row[key] == value for key, value in filters.items())]
+        return rows
+
+    def get(self, pk, **filters):
+        """按主键取一行，不存在或不满足过滤条件时返回 None"""
+        try:
+            row = self._current()[2].get(int(pk))
+        except (TypeError, ValueError):
+            return None
+        if row is None or any(row[key] != value for key, value in filters.items()):
+            return None
+        return row
+
+    def instance(self, pk, **filters):
+        """按主键构造模型实例（不查询数据库），不存在时返回 None"""
+        row = self.get(pk, **filters)
+        return None if row is None else self.to_instance(row)
+
+    def to_instance(self, row):
+        return self.model.from_db('default', list(row), list(row.values()))
+
+
+_tables = {}
+
+
+def _in_transaction():
+    # 与 Django 的 durable 检查相同，测试用例包裹的事务不算在内
+    return any(not block._from_testcase for block in connection.atomic_blocks)
+
+
+def table(label):
+    """取得引用数据表，如 table('warehouses.warehouse').get(3)"""
+    return _tables[label]
+
+
+def _mark_stale(sender, **kwargs):
+    _tables[model_label(sender)].invalidate()
+
+
+def track_reference_data(*models):
+    """把模型登记为引用数据表并注册保存/删除信号（模型还需登记 track_model_versions）"""
+    for model in models:
+        label = model_label(model)
+        _tables.setdefault(label, RefTable(label))
+        post_save.connect(_mark_stale, sender=model, dispatch_uid=f'refdata_save_{label}')
+        post_delete.connect(_mark_stale, sender=model, dispatch_uid=f'refdata_delete_{label}')
+
+
+def warm():
+    """加载全部引用数据表（工作进程预热）"""
+    for ref_table in _tables.values():
+        ref_table._current()
@@ -0,0 +1,100 @@
+"""
+高性能响应渲染器
+"""
+import datetime
+import decimal
+from collections.abc import Mapping
+
+from django.db.models.query import QuerySet
+from django.utils import timezone
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework import ISO_8601
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 未安装时回退到标准库实现
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+def _format_temporal(value, output_format):
+    """按 REST_FRAMEWORK 中配置的格式输出日期时间"""
+    if output_format is None or output_format.lower() == ISO_8601:
+        representation = value.isoformat()
+        if representation.endswith('+00:00'):
+            representation = representation[:-6] + 'Z'
+        return representation
+    return value.strftime(output_format)
+
+
+def encode_default(obj):
+    """处理 orjson / msgpack 不能直接序列化的类型，规则与 DRF 的 JSONEncoder 保持一致"""
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, datetime.datetime):
+        if timezone.is_aware(obj):
+            obj = timezone.localtime(obj)
+        return _format_temporal(obj, api_settings.DATETIME_FORMAT)
+    if isinstance(obj, datetime.date):
+        return _format_temporal(obj, api_settings.DATE_FORMAT)
+    if isinstance(obj, datetime.time):
+        return _format_temporal(obj, api_settings.TIME_FORMAT)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, decimal.Decimal):
+        # 序列化器字段默认已转为字符串，这里只处理聚合结果等原始Decimal
+        return float(obj)
+    if isinstance(obj, QuerySet):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if hasattr(obj, '__iter__') and not isinstance(obj, str):
+        return list(obj)
+    return force_str(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """基于 orjson 的 JSON 渲染器
+
+    Decimal、日期时间按 REST_FRAMEWORK 的 DATETIME_FORMAT/DATE_FORMAT 输出；
+    未安装 orjson 时回退到 DRF 默认实现。
+    """
+    base_options = 0 if orjson is None else (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        options = self.base_options
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=encode_default, option=options)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """MessagePack 渲染器，手持终端通过 Accept: application/x-msgpack 选择"""
+    media_type = 'application/x-msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
@@ -0,0 +1,58 @@
+"""
+通用序列化器组件
+"""
+
+
+def parse_field_list(value):
+    """解析逗号分隔的字段列表，空值返回None"""
+    if not value:
+        return None
+    names = [name.strip() for name in value.split(',')]
+    return [name for name in names if name] or None
+
+
+class SparseFieldsMixin:
+    """稀疏字段集序列化器混入
+
+    支持通过 ``?fields=id,name`` 只返回指定字段，或通过 ``?omit=description``
+    排除指定字段。也可以在构造时直接传入 ``fields`` / ``omit`` 参数。
+
+    对于 SerializerMethodField、属性等无法从 source 推断数据库列的字段，
+    可以在 Meta.sparse_sources 中声明其依赖的模型字段路径，供视图裁剪SQL使用：
+
+        class Meta:
+            sparse_sources = {'total_value': ['stock', 'price']}
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        omit = kwargs.pop('omit', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is None and omit is None:
+            fields, omit = self._get_requested_fieldsets()
+        self.apply_sparse_fields(fields, omit)
+
+    def _get_requested_fieldsets(self):
+        """从请求参数读取字段集（仅对只读请求生效）"""
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return None, None
+        params = getattr(request, 'query_params', request.GET)
+        return parse_field_list(params.get('fields')), parse_field_list(params.get('omit'))
+
+    def apply_sparse_fields(self, fields=None, omit=None):
+        """裁剪序列化器字段，未知字段名会被忽略"""
+        if fields is None and omit is None:
+            return
+        allowed = set(self.fields)
+        if fields is not None:
+            allowed &= set(fields)
+        if omit is not None:
+            allowed -= set(omit)
+        # 至少保留主键，保证前端可以定位记录
+        if not allowed and 'id' in self.fields:
+            allowed = {'id'}
+        for name in list(self.fields):
+            if name not in allowed:
+                self.fields.pop(name)
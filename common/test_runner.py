@@ -0,0 +1,21 @@
+"""
+测试运行器：测试期间启用严格的查询预算
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class QueryBudgetTestRunner(DiscoverRunner):
+    """超出查询预算的请求直接抛出 QueryBudgetExceeded，使测试失败"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._query_budget = getattr(settings, 'QUERY_BUDGET', None)
+        settings.QUERY_BUDGET = {**(self._query_budget or {}), 'ENABLED': True, 'STRICT': True}
+
+    def teardown_test_environment(self, **kwargs):
+        if self._query_budget is None:
+            del settings.QUERY_BUDGET
+        else:
+            settings.QUERY_BUDGET = self._query_budget
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,85 @@
+"""
+测试辅助
+
+ApiBudgetTestCase 准备一份多行的基础数据（类别树、仓库、供应商、物品和出入库记录），
+各应用的测试在此基础上调用接口。测试运行器（common.test_runner）开启了严格的查询预算，
+接口一旦出现 N+1 查询、超出声明的预算，请求会抛出 QueryBudgetExceeded，测试直接失败。
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from common.query_budget import endpoints_without_budget
+
+
+class ApiBudgetTestCase(TestCase):
+    """带基础数据和已登录客户端的接口测试基类"""
+
+    ITEM_COUNT = 8
+
+    @classmethod
+    def setUpTestData(cls):
+        from apps.inventory.models import Category, Item
+        from apps.suppliers.models import Supplier
+        from apps.warehouses.models import Warehouse
+
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin123')
+        cls.root = Category.objects.create(name='办公用品', code='OFFICE')
+        cls.categories = [
+            Category.objects.create(name=f'子类{index}', code=f'OFFICE-{index}', parent=cls.root)
+            for index in range(3)
+        ]
+        cls.warehouses = [
+            Warehouse.objects.create(name=f'仓库{index}', code=f'WH-{index}', capacity=100000)
+            for index in range(3)
+        ]
+        cls.suppliers = [
+            Supplier.objects.create(name=f'供应商{index}', code=f'SUP-{index}')
+            for index in range(3)
+        ]
+        cls.items = [
+            Item.objects.create(
+                name=f'物品{index}',
+                code=f'ITEM-{index:03d}',
+                category=cls.categories[index % 3],
+                warehouse=cls.warehouses[index % 3],
+                supplier=cls.suppliers[index % 3],
+                price=10 + index,
+                stock=50,
+                min_stock=60 if index % 2 else 5,
+                created_by=cls.user,
+            )
+            for index in range(cls.ITEM_COUNT)
+        ]
+
+        client = cls.make_client()
+        for index, item in enumerate(cls.items):
+            client.post('/api/operations/inbound/', {
+                'item': item.pk, 'quantity': 10, 'warehouse': item.warehouse_id, 'supplier': item.supplier_id,
+            }, format='json')
+            client.post('/api/operations/outbound/', {
+                'item': item.pk, 'quantity': 3, 'recipient': f'员工{index}',
+            }, format='json')
+            client.post('/api/operations/transfer/', {
+                'item': item.pk, 'quantity': 2,
+                'from_warehouse': item.warehouse_id, 'to_warehouse': cls.warehouses[(index + 1) % 3].pk,
+            }, format='json')
+
+    @classmethod
+    def make_client(cls):
+        client = APIClient()
+        client.force_authenticate(cls.user)
+        return client
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = self.make_client()
+
+    def assertEndpointsBudgeted(self, prefix):
+        """prefix 下的所有接口都声明了查询预算"""
+        self.assertEqual(endpoints_without_budget(prefix), [])
+
+    def assertOk(self, response, status_code=200):
+        self.assertEqual(response.status_code, status_code, response.content[:500])
+        return response
@@ -0,0 +1,403 @@
+"""
+公共组件测试
+"""
+import gzip
+import tempfile
+from unittest import mock
+
+import brotli
+import msgpack
+import orjson
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.dashboard.views import SystemInfoView
+from apps.inventory.models import Item
+from apps.inventory.serializers import ItemListSerializer
+from apps.inventory.views import ItemViewSet
+from apps.operations.models import InventoryOperation
+from apps.operations.views import InventoryOperationViewSet
+from apps.warehouses.models import Warehouse
+from common import openapi, refdata
+from common.cache_versions import bump_version, get_versions
+from common.db_routing import PIN_COOKIE, ReplicaRoutingMiddleware, read_from_replica
+from common.middleware import CompressionMiddleware
+from common.mixins import build_projection, project_queryset
+from common.query_budget import QueryBudgetExceeded, resolve_budget
+from common.testing import ApiBudgetTestCase
+
+
+class QueryBudgetTests(TestCase):
+    """查询预算：严格模式抛出异常，非严格模式记录警告"""
+
+    def setUp(self):
+        user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin123')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_resolve_budget(self):
+        list_view = ItemViewSet.as_view({'get': 'list', 'post': 'create'})
+        self.assertEqual(resolve_budget(list_view, 'GET'), ItemViewSet.query_budgets['list'])
+        self.assertEqual(resolve_budget(list_view, 'POST'), ItemViewSet.query_budgets['create'])
+        self.assertIsNone(resolve_budget(list_view, 'DELETE'))
+        self.assertEqual(resolve_budget(SystemInfoView.as_view(), 'GET'), SystemInfoView.query_budget)
+
+    def test_strict_mode_raises(self):
+        with mock.patch.object(SystemInfoView, 'query_budget', 0):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/api/dashboard/system-info/')
+
+    @override_settings(QUERY_BUDGET={'ENABLED': True, 'STRICT': False})
+    def test_warning_mode_logs(self):
+        with mock.patch.object(SystemInfoView, 'query_budget', 0):
+            with self.assertLogs('common.query_budget', 'WARNING') as logs:
+                response = self.client.get('/api/dashboard/system-info/')
+        self.assertEqual(response.status_code, 200)
+        details = logs.records[0].query_budget
+        self.assertEqual((details['view'], details['budget']), ('SystemInfoView', 0))
+        self.assertGreater(details['queries'], 0)
+
+
+@override_settings(REPLICA_DATABASES=['replica1'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    """读写分离：安全请求读副本，写入后固定到主库"""
+
+    def request(self, method='get', cookies=None, write=False):
+        seen = {}
+
+        def view(request):
+            seen['before'] = router.db_for_read(Item)
+            if write:
+                seen['write'] = router.db_for_write(Item)
+                seen['after'] = router.db_for_read(Item)
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)('/api/inventory/items/')
+        request.COOKIES.update(cookies or {})
+        return ReplicaRoutingMiddleware(view)(request), seen
+
+    def test_outside_request_reads_primary(self):
+        self.assertEqual(router.db_for_read(Item), 'default')
+        with read_from_replica():
+            self.assertEqual(router.db_for_read(Item), 'replica1')
+
+    def test_safe_request_reads_replica(self):
+        response, seen = self.request()
+        self.assertEqual(seen['before'], 'replica1')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_pins_primary(self):
+        response, seen = self.request(write=True)
+        self.assertEqual((seen['write'], seen['after']), ('default', 'default'))
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+
+        _response, seen = self.request(cookies={PIN_COOKIE: cookie.value})
+        self.assertEqual(seen['before'], 'default')
+
+    def test_unsafe_request_reads_primary(self):
+        response, seen = self.request(method='post')
+        self.assertEqual(seen['before'], 'default')
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_cache_table_stays_on_primary(self):
+        from django.core.cache.backends.db import DatabaseCache
+        cache_model = DatabaseCache('django_cache', {}).cache_model_class
+        with read_from_replica():
+            self.assertEqual(router.db_for_read(cache_model), 'default')
+
+
+# 测试中没有运行 collectstatic，页面中的静态资源地址不走清单
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class OpenAPIDocsTests(SimpleTestCase):
+    """API 文档：返回部署时生成的文件，版本化地址长期缓存，不查询数据库"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(OPENAPI_SCHEMA={'DIRECTORY': directory.name, 'MAX_AGE': 60})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('generate_openapi', stdout=mock.MagicMock())
+        self.addCleanup(openapi._documents.clear)
+        self.addCleanup(openapi._pages.clear)
+
+    def test_serves_generated_file(self):
+        with mock.patch.object(openapi, 'generate_schema') as generate:
+            response = self.client.get('/swagger.json/')
+        generate.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['info']['title'], '库存管理系统 API')
+        self.assertNotIn('host', response.json())
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+
+        response = self.client.get('/swagger.json/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get('/swagger.yaml/')['Content-Type'], 'application/yaml; charset=utf-8')
+        self.assertEqual(self.client.get('/swagger.xml/').status_code, 404)
+
+    def test_ui_uses_versioned_spec_url(self):
+        url = openapi.spec_url()
+        for path in ('/swagger/', '/redoc/'):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(url, response.content.decode())
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=%d' % openapi.IMMUTABLE_MAX_AGE, response['Cache-Control'])
+
+
+class SparseFieldsetTests(ApiBudgetTestCase):
+    """?fields= / ?omit= 裁剪输出字段，并按输出字段裁剪 SQL"""
+
+    def field_names(self, **kwargs):
+        return set(ItemListSerializer(**kwargs).fields)
+
+    def test_fields_and_omit(self):
+        self.assertEqual(self.field_names(fields=['id', 'name']), {'id', 'name'})
+        # 未知字段名被忽略
+        self.assertEqual(self.field_names(fields=['id', 'name', 'bogus']), {'id', 'name'})
+        self.assertEqual(self.field_names(fields=['bogus']), {'id'})
+        all_fields = self.field_names()
+        self.assertEqual(self.field_names(omit=['price', 'bogus']), all_fields - {'price'})
+        self.assertEqual(self.field_names(fields=['id', 'price'], omit=['price']), {'id'})
+
+    def test_projection(self):
+        only, related = build_projection(Item, ItemListSerializer(fields=['id', 'name']))
+        self.assertEqual((only, related), ({'id', 'name'}, set()))
+        # 跨关联的 source 需要 JOIN，sparse_sources 声明的依赖列一并加载
+        only, related = build_projection(Item, ItemListSerializer(fields=['category_name', 'total_value']))
+        self.assertEqual(only, {'id', 'category', 'category__name', 'stock', 'price'})
+        self.assertEqual(related, {'category'})
+
+        queryset = project_queryset(
+            Item.objects.select_related('category', 'supplier'), ItemListSerializer(fields=['id', 'name'])
+        )
+        sql = str(queryset.query)
+        self.assertIn('"items"."name"', sql)
+        self.assertNotIn('"items"."description"', sql)
+        self.assertNotIn('JOIN', sql)
+
+    def test_list_sql_drops_omitted_columns(self):
+        # 关闭快速路径，验证序列化器路径上的 only() 投影
+        with mock.patch.object(ItemViewSet, 'fast_list_actions', ()):
+            with CaptureQueriesContext(connection) as captured:
+                response = self.assertOk(self.client.get('/api/inventory/items/?fields=id,name,bogus'))
+        self.assertEqual(set(response.json()['data']['results'][0]), {'id', 'name'})
+        selects = [query['sql'] for query in captured if query['sql'].startswith('SELECT "items"."id"')]
+        self.assertTrue(selects)
+        for sql in selects:
+            self.assertNotIn('"items"."price"', sql)
+            self.assertNotIn('"categories"', sql)
+
+
+class FastListSerializerTests(ApiBudgetTestCase):
+    """列表快速路径的输出与序列化器逐字节一致"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # 覆盖图片（含需要转义的文件名）、空外键、空操作人、姓名等情况
+        Item.objects.filter(pk=cls.items[0].pk).update(image='items/测试 图片#1.png')
+        Item.objects.filter(pk=cls.items[1].pk).update(supplier=None)
+        Item.objects.filter(pk=cls.items[2].pk).update(price='12.50')
+        get_user_model().objects.filter(pk=cls.user.pk).update(first_name='三', last_name='张')
+        InventoryOperation.objects.filter(item=cls.items[3]).update(operator=None)
+
+    PATHS = {
+        ItemViewSet: [
+            '/api/inventory/items/',
+            '/api/inventory/items/?page_size=3&page=2',
+            '/api/inventory/items/?fields=id,name,image,total_value,category_name',
+            '/api/inventory/items/?omit=image,warehouse_name&ordering=price',
+            '/api/inventory/items/?search=物品1',
+        ],
+        InventoryOperationViewSet: [
+            '/api/operations/',
+            '/api/operations/?operation_type=in&ordering=created_at',
+            '/api/operations/?fields=id,item_image,operator_name,operation_type_display,created_at',
+            '/api/operations/?omit=item_image,notes',
+        ],
+    }
+
+    def get(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        return response.content
+
+    def test_matches_serializer_output(self):
+        for viewset, paths in self.PATHS.items():
+            for path in paths:
+                fast = self.get(path)
+                self.assertIn(b'"id"', fast)
+                with mock.patch.object(viewset, 'fast_list_actions', ()):
+                    expected = self.get(path)
+                self.assertEqual(fast, expected, path)
+
+    def test_falls_back_for_unsupported_serializer(self):
+        from rest_framework import serializers
+
+        from common.fast_serializers import FastListSerializer
+
+        class NestedSerializer(serializers.ModelSerializer):
+            class Meta:
+                model = Item
+                fields = ['id', 'name', 'image']
+
+        self.assertIsNone(FastListSerializer.for_serializer(Item, NestedSerializer()))
+
+
+class RefDataTests(ApiBudgetTestCase):
+    """引用数据：下拉框和出入库校验读取进程内副本，数据变化后重新加载"""
+
+    def table_queries(self, func, *tables):
+        with CaptureQueriesContext(connection) as captured:
+            result = func()
+        queries = [query['sql'] for query in captured.captured_queries]
+        return result, [sql for sql in queries if any(f'FROM "{table}"' in sql for table in tables)]
+
+    def test_dropdowns_served_from_memory(self):
+        refdata.warm()
+        response, queries = self.table_queries(
+            lambda: self.client.get('/api/warehouses/active/?fields=id,name'), 'warehouses'
+        )
+        self.assertEqual(queries, [])
+        self.assertEqual(
+            self.assertOk(response).json()['data'],
+            [{'id': warehouse.pk, 'name': warehouse.name} for warehouse in reversed(self.warehouses)],
+        )
+        response, queries = self.table_queries(lambda: self.client.get('/api/suppliers/active/'), 'suppliers')
+        self.assertEqual(queries, [])
+        counts = {row['id']: row['item_count'] for row in self.assertOk(response).json()['data']}
+        self.assertEqual(counts, {supplier.pk: supplier.items.count() for supplier in self.suppliers})
+        response, queries = self.table_queries(lambda: self.client.get('/api/inventory/categories/'), 'categories')
+        self.assertEqual(queries, [])
+        data = self.assertOk(response).json()['data']
+        self.assertEqual([row['code'] for row in data], sorted(row['code'] for row in data))
+
+    def test_inbound_validation_without_queries(self):
+        from apps.operations.serializers import InboundSerializer
+
+        refdata.warm()
+        serializer = InboundSerializer(data={
+            'item': self.items[0].pk, 'quantity': 1,
+            'warehouse': self.warehouses[1].pk, 'supplier': self.suppliers[0].pk,
+        })
+        valid, queries = self.table_queries(serializer.is_valid, 'warehouses', 'suppliers')
+        self.assertTrue(valid, serializer.errors)
+        self.assertEqual(queries, [])
+        self.assertEqual(serializer.validated_data['warehouse_obj'].name, self.warehouses[1].name)
+
+    def test_reloads_after_changes(self):
+        warehouse = self.warehouses[0]
+        refdata.warm()
+        # 本进程保存：信号立即标记过期
+        warehouse.is_active = False
+        warehouse.save()
+        response = self.assertOk(self.client.get('/api/warehouses/active/?fields=id'))
+        self.assertNotIn({'id': warehouse.pk}, response.json()['data'])
+        response = self.client.post('/api/operations/inbound/', {
+            'item': self.items[0].pk, 'quantity': 1, 'warehouse': warehouse.pk, 'supplier': self.suppliers[0].pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        # 其他进程修改（不触发本进程信号）：版本号递增后重新加载
+        Warehouse.objects.filter(pk=self.warehouses[1].pk).update(name='改名仓库')
+        bump_version('warehouses.warehouse')
+        self.assertEqual(refdata.table('warehouses.warehouse').get(self.warehouses[1].pk)['name'], '改名仓库')
+
+    @override_settings(REPLICA_DATABASES=['replica1'])
+    def test_loads_from_primary(self):
+        ref_table = refdata.table('warehouses.warehouse')
+        ref_table.invalidate()
+        # 安全请求的读取路由到副本（测试用例的事务外），引用数据仍从主库加载（测试中读 replica1 会报错）
+        outside_transaction = {'default': mock.Mock(in_atomic_block=False)}
+        with read_from_replica(), mock.patch('common.db_routing.connections', outside_transaction):
+            self.assertEqual(router.db_for_read(Warehouse), 'replica1')
+            rows, queries = self.table_queries(ref_table.rows, 'warehouses')
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(rows), len(self.warehouses))
+
+    def test_rolled_back_rows_not_cached(self):
+        ref_table = refdata.table('warehouses.warehouse')
+        refdata.warm()
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                created = Warehouse.objects.create(name='临时仓库', code='WH-TMP', capacity=10)
+                # 事务内读取能看到未提交的新行
+                self.assertEqual(ref_table.get(created.pk)['name'], '临时仓库')
+                raise RuntimeError('回滚')
+        self.assertIsNone(ref_table.get(created.pk))
+        self.assertEqual(len(ref_table.rows()), len(self.warehouses))
+
+
+class ResponseFormatTests(ApiBudgetTestCase):
+    """渲染器内容协商与响应压缩"""
+
+    def test_orjson_and_msgpack(self):
+        response = self.assertOk(self.client.get('/api/inventory/items/'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = orjson.loads(response.content)
+        self.assertEqual(data['data']['count'], self.ITEM_COUNT)
+
+        response = self.assertOk(self.client.get('/api/inventory/items/', HTTP_ACCEPT='application/x-msgpack'))
+        self.assertEqual(response['Content-Type'], 'application/x-msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), data)
+
+    def test_negotiated_compression(self):
+        plain = self.assertOk(self.client.get('/api/inventory/items/')).content
+        self.assertGreater(len(plain), 1024)
+        for encoding, decompress in (('br', brotli.decompress), ('gzip', gzip.decompress)):
+            with self.subTest(encoding=encoding):
+                response = self.assertOk(self.client.get('/api/inventory/items/', HTTP_ACCEPT_ENCODING=encoding))
+                self.assertEqual(response['Content-Encoding'], encoding)
+                self.assertIn('Accept-Encoding', response['Vary'])
+                self.assertEqual(decompress(response.content), plain)
+
+    def test_small_bodies_stay_uncompressed(self):
+        response = self.assertOk(self.client.get('/api/operations/statistics/', HTTP_ACCEPT_ENCODING='br, gzip'))
+        self.assertLess(len(response.content), 1024)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_tokens_use_padded_gzip(self):
+        middleware = CompressionMiddleware(lambda request: None)
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='br, gzip')
+        body = b'{"token": "secret", "padding": "%s"}' % (b'x' * 2000)
+        response = middleware.process_response(request, HttpResponse(body))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), body)
+        response = middleware.process_response(request, HttpResponse(body.replace(b'token', b'other')))
+        self.assertEqual(response['Content-Encoding'], 'br')
+
+
+class CacheVersionTests(TestCase):
+    """缓存版本计数器：批量读取和初始化"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_missing_versions_initialized_in_batch(self):
+        labels = [f'tests.model{index}' for index in range(5)]
+        with mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many, \
+                mock.patch.object(cache, 'set_many', wraps=cache.set_many) as set_many, \
+                mock.patch.object(cache, 'add', wraps=cache.add) as add:
+            first = get_versions(*labels)
+        self.assertEqual((get_many.call_count, set_many.call_count, add.call_count), (2, 1, 0))
+        self.assertEqual(len(set(first.values())), 1)
+        with mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many:
+            self.assertEqual(get_versions(*labels), first)
+        self.assertEqual(get_many.call_count, 1)
+
+        bump_version('tests.model0')
+        second = get_versions(*labels)
+        self.assertNotEqual(second['tests.model0'], first['tests.model0'])
+        self.assertEqual({k: v for k, v in second.items() if k != 'tests.model0'},
+                         {k: v for k, v in first.items() if k != 'tests.model0'})
@@ -0,0 +1,35 @@
+"""
+写事务
+
+immediate_atomic 与 transaction.atomic 用法相同。在 SQLite 生产后端（common.backends.sqlite3）上，
+最外层的 immediate_atomic 以 BEGIN IMMEDIATE 开始事务：先取得写锁（按连接 timeout 排队等待），
+避免默认的延迟事务在读取之后升级写锁时与其他写入冲突、直接失败。
+嵌套使用时只是保存点；其他数据库上等同于 transaction.atomic。
+
+库存变动（入库、出库、调拨、调整）这类先读后写的事务都应使用 immediate_atomic。
+"""
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+class ImmediateAtomic(transaction.Atomic):
+
+    def __enter__(self):
+        connection = transaction.get_connection(self.using)
+        immediate = (
+            getattr(connection, 'supports_immediate_transactions', False)
+            and not connection.in_atomic_block
+        )
+        if immediate:
+            connection.begin_immediate = True
+        try:
+            super().__enter__()
+        finally:
+            if immediate:
+                connection.begin_immediate = False
+
+
+def immediate_atomic(using=None, savepoint=True):
+    # 与 transaction.atomic 一样支持 @immediate_atomic 和 @immediate_atomic(using=...) 两种写法
+    if callable(using):
+        return ImmediateAtomic(DEFAULT_DB_ALIAS, savepoint, False)(using)
+    return ImmediateAtomic(using, savepoint, False)
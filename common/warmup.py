@@ -0,0 +1,49 @@
+"""
+进程预热
+
+warm_shared：导入 URL 配置（随之导入全部视图、序列化器、过滤器）并建立路由索引，加载翻译目录。
+    Gunicorn 预加载模式下在主进程 fork 之前执行，这部分内存由所有工作进程写时复制共享。
+warm_worker：每个工作进程启动后执行，建立本进程的缓存连接、预读引用数据的缓存版本号
+    并加载进程内的引用数据表（common.refdata），首个请求不再承担这些冷启动开销。
+
+两者都不能在主进程中保留数据库连接：fork 之后父子进程共用同一个套接字会互相破坏。
+"""
+import logging
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# 各接口条件请求依赖的引用数据模型
+REFERENCE_MODELS = (
+    'inventory.category', 'inventory.item', 'suppliers.supplier', 'warehouses.warehouse',
+)
+
+
+def warm_shared():
+    from django.urls import get_resolver
+    from django.utils import translation
+    from rest_framework.settings import api_settings
+
+    resolver = get_resolver()
+    resolver.reverse_dict  # 触发 URL 配置导入和路由索引构建
+    for name in ('DEFAULT_RENDERER_CLASSES', 'DEFAULT_PARSER_CLASSES', 'DEFAULT_AUTHENTICATION_CLASSES'):
+        getattr(api_settings, name)
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('')
+    connections.close_all()
+
+
+def warm_worker():
+    from common import refdata
+    from common.cache_versions import get_versions
+
+    try:
+        get_versions(*REFERENCE_MODELS)
+        refdata.warm()
+    except Exception:
+        # 预热失败不影响工作进程启动，首个请求会重新建立连接
+        logger.warning('工作进程预热失败', exc_info=True)
+    finally:
+        connections.close_all()
@@ -4,7 +4,8 @@ Django settings for inventory_system project.
 
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from importlib.util import find_spec
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -31,7 +32,6 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'django_filters',
     'corsheaders',
-    'drf_yasg',
     
     # Local apps
     'apps.authentication',
@@ -41,11 +41,16 @@ INSTALLED_APPS = [
     'apps.suppliers',
     'apps.warehouses',
     'apps.reports',
+    'apps.alerts',
+    'apps.benchmarks',  # seed_perf_data / benchmark_api 命令
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'common.query_budget.QueryBudgetMiddleware',  # 接口查询预算（测试中超出即失败）
+    'common.db_routing.ReplicaRoutingMiddleware',  # 读写分离（配置了只读副本时生效）
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'common.middleware.CompressionMiddleware',  # 响应压缩（brotli/gzip）
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,10 +62,20 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'config.urls'
 
+# drf_yasg 不注册为应用（注册会在启动时导入它），只引用它的 Swagger UI/ReDoc 模板和静态资源，见 common.openapi
+DRF_YASG_DIR = Path(find_spec('drf_yasg').origin).parent
+
+# 接口查询预算：生产环境超出时记录警告，测试运行器中超出直接失败
+QUERY_BUDGET = {
+    'ENABLED': config('QUERY_BUDGET_ENABLED', default=True, cast=bool),
+    'STRICT': config('QUERY_BUDGET_STRICT', default=False, cast=bool),
+}
+TEST_RUNNER = 'common.test_runner.QueryBudgetTestRunner'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [BASE_DIR / 'templates'],
+        'DIRS': [BASE_DIR / 'templates', DRF_YASG_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -79,12 +94,26 @@ WSGI_APPLICATION = 'config.wsgi.application'
 DB_ENGINE = config('DB_ENGINE', default='django.db.backends.sqlite3')
 
 if DB_ENGINE == 'django.db.backends.sqlite3':
+    # SQLite 生产配置：WAL 日志（读写互不阻塞）、synchronous=NORMAL、内存映射和页缓存，
+    # 库存变动事务以 BEGIN IMMEDIATE 排队取得写锁；定期运行 sqlite_maintenance 命令
+    SQLITE_TUNED = config('SQLITE_TUNED', default=True, cast=bool)
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -config('SQLITE_CACHE_MB', default=64, cast=int) * 1024,  # 负数表示 KiB
+        'mmap_size': config('SQLITE_MMAP_MB', default=256, cast=int) * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': 1000,                 # 页数，约 4MB 自动检查点
+        'journal_size_limit': 64 * 1024 * 1024,     # 检查点后截断 WAL 文件
+        'analysis_limit': 1000,                     # PRAGMA optimize 的采样上限，大表也能快速完成
+    }
     DATABASES = {
         'default': {
-            'ENGINE': DB_ENGINE,
+            'ENGINE': 'common.backends.sqlite3' if SQLITE_TUNED else DB_ENGINE,
             'NAME': BASE_DIR / config('DB_NAME', default='db.sqlite3'),
             'OPTIONS': {
                 'timeout': 20,  # 数据库锁超时时间（秒）
+                **({'pragmas': SQLITE_PRAGMAS} if SQLITE_TUNED else {}),
             },
         }
     }
@@ -97,9 +126,41 @@ else:
             'PASSWORD': config('DB_PASSWORD'),
             'HOST': config('DB_HOST', default='localhost'),
             'PORT': config('DB_PORT', default='5432'),
+            'OPTIONS': {
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+                'application_name': config('DB_APPLICATION_NAME', default='inventory'),
+            },
+            # 经 PgBouncer 事务池连接时，同一会话的多个事务可能落在不同服务端连接上，
+            # 不能使用跨事务的服务端游标（QuerySet.iterator() 改为客户端分块读取）
+            'DISABLE_SERVER_SIDE_CURSORS': config('DB_PGBOUNCER', default=False, cast=bool),
         }
     }
 
+# 连接复用：每个工作线程在请求之间保持连接 DB_CONN_MAX_AGE 秒（0 为每个请求新建连接），
+# 复用前检查连接是否可用，数据库重启或连接被回收后自动重连
+DATABASES['default']['CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', default=60, cast=int)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+
+# 只读副本（逗号分隔）：SQLite 为数据库文件名，PostgreSQL 为 主机[:端口]
+# 安全请求读取副本，写入和事务使用主库，写入后 REPLICA_PIN_SECONDS 秒内该客户端读主库
+for _index, _replica in enumerate(config('DB_REPLICAS', default='', cast=Csv()), start=1):
+    if DB_ENGINE == 'django.db.backends.sqlite3':
+        _overrides = {'NAME': BASE_DIR / _replica}
+    else:
+        _host, _, _port = _replica.partition(':')
+        _overrides = {
+            'HOST': _host,
+            'PORT': _port or DATABASES['default']['PORT'],
+            'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+            'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        }
+    # 测试中副本指向测试主库，不单独创建测试数据库
+    DATABASES[f'replica{_index}'] = {**DATABASES['default'], **_overrides, 'TEST': {'MIRROR': 'default'}}
+
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+DATABASE_ROUTERS = ['common.db_routing.ReplicaRouter']
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -125,7 +186,7 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
-STATICFILES_DIRS = [BASE_DIR / 'static']
+STATICFILES_DIRS = [BASE_DIR / 'static', DRF_YASG_DIR / 'static']
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Media files
@@ -154,10 +215,76 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
+    'DEFAULT_RENDERER_CLASSES': [
+        'common.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DATETIME_FORMAT': '%Y-%m-%d %H:%M:%S',
     'DATE_FORMAT': '%Y-%m-%d',
 }
 
+# 手持终端可通过 Accept: application/x-msgpack 获取 MessagePack 格式
+if find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('common.renderers.MessagePackRenderer')
+
+# 响应压缩：小于该字节数的响应不压缩
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=4, cast=int)
+
+# 仪表盘组合接口：未命中缓存的组件并发计算的线程数（SQLite 下始终顺序计算）
+DASHBOARD_BUNDLE = {
+    'MAX_WORKERS': config('DASHBOARD_BUNDLE_WORKERS', default=4, cast=int),
+}
+
+# 时间序列聚合：已结束的时间桶（昨天及以前、上个月及以前……）按月/年合并永久缓存
+TIMESERIES = {
+    'CACHE_CLOSED_BUCKETS': config('TIMESERIES_CACHE_CLOSED_BUCKETS', default=True, cast=bool),
+}
+
+# 仪表盘最近活动：出入库记录提交时追加到缓存中的定长列表，保留最近 SIZE 条
+ACTIVITY_FEED = {
+    'SIZE': config('ACTIVITY_FEED_SIZE', default=50, cast=int),
+}
+
+# 库存预警：状态变化写入发件箱，由 dispatch_stock_alerts 命令批量去重投递
+STOCK_ALERTS = {
+    'CHANNELS': config('STOCK_ALERT_CHANNELS', default='feed', cast=Csv()),  # feed, email, webhook 或渠道类路径
+    'EMAIL_RECIPIENTS': config('STOCK_ALERT_EMAILS', default='', cast=Csv()),
+    'WEBHOOK_URL': config('STOCK_ALERT_WEBHOOK_URL', default=''),
+    'WEBHOOK_TIMEOUT': 5,
+    'BATCH_SIZE': config('STOCK_ALERT_BATCH_SIZE', default=500, cast=int),
+    'INTERVAL': config('STOCK_ALERT_INTERVAL', default=60, cast=int),
+    'CLAIM_TIMEOUT': 600,  # 领取后超过该秒数仍未投递（进程崩溃）的事件可被重新领取
+}
+
+# 消耗预测：refresh_forecasts 命令每晚增量计算（修改平滑参数后需使用 --full 重新计算）
+FORECAST = {
+    'SMOOTHING': config('FORECAST_SMOOTHING', default=0.1, cast=float),
+    'HISTORY_DAYS': 730,
+    'LEAD_TIME_DAYS': config('FORECAST_LEAD_TIME_DAYS', default=7, cast=int),
+    'REVIEW_DAYS': config('FORECAST_REVIEW_DAYS', default=30, cast=int),
+    'SERVICE_FACTOR': 1.65,
+    'CHUNK_SIZE': 5000,
+}
+
+# 操作记录归档：archive_operations 命令按月把保留期之前的记录移出热表
+# STORAGE=table 移入归档表（SQLite 默认）；file 导出为压缩 JSONL（PostgreSQL 分区表建议使用）
+OPERATION_ARCHIVE = {
+    'RETENTION_MONTHS': config('OPERATION_RETENTION_MONTHS', default=24, cast=int),
+    'STORAGE': config('OPERATION_ARCHIVE_STORAGE', default='table'),
+    'DIRECTORY': config('OPERATION_ARCHIVE_DIR', default=str(BASE_DIR / 'archive')),
+    'BATCH_SIZE': 5000,
+    'PARTITIONS_AHEAD': 3,
+}
+
+# 邮件配置 - 开发环境默认使用本地 SMTP 替身（python -m aiosmtpd -n -l localhost:1025）
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=1025, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='inventory@localhost')
+
 # JWT settings - 企业级安全配置
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=8),  # 工作日有效
@@ -213,9 +340,17 @@ else:
         'default': {
             'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
             'LOCATION': 'django_cache',
+            # 缓存版本号、最近活动、时间序列等键不设过期时间，默认的 300 条上限会频繁触发淘汰
+            'OPTIONS': {'MAX_ENTRIES': 20000},
         }
     }
 
+# API 文档：部署时运行 generate_openapi 生成到 DIRECTORY，文档接口直接返回文件（带 ETag，UI 使用的版本化地址长期缓存）
+OPENAPI_SCHEMA = {
+    'DIRECTORY': config('OPENAPI_SCHEMA_DIR', default=str(BASE_DIR / 'openapi')),
+    'MAX_AGE': config('OPENAPI_SCHEMA_MAX_AGE', default=3600, cast=int),
+}
+
 # Swagger settings
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
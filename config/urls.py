@@ -6,23 +6,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-# Swagger API文档配置
-schema_view = get_schema_view(
-    openapi.Info(
-        title="库存管理系统 API",
-        default_version='v1',
-        description="库存管理系统后端API文档",
-        terms_of_service="https://www.example.com/terms/",
-        contact=openapi.Contact(email="admin@example.com"),
-        license=openapi.License(name="MIT License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from common import openapi
 
 urlpatterns = [
     # Django Admin
@@ -43,11 +27,12 @@ urlpatterns = [
     path('api/suppliers/', include('apps.suppliers.urls')),
     path('api/warehouses/', include('apps.warehouses.urls')),
     path('api/reports/', include('apps.reports.urls')),
+    path('api/alerts/', include('apps.alerts.urls')),
     
-    # API文档
-    path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    # API文档（部署时由 generate_openapi 预先生成，见 common.openapi）
+    path('swagger<format>/', openapi.schema_view, name='schema-json'),
+    path('swagger/', openapi.swagger_ui_view, name='schema-swagger-ui'),
+    path('redoc/', openapi.redoc_view, name='schema-redoc'),
 ]
 
 # 开发环境下提供媒体文件访问
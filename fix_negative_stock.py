@@ -8,6 +8,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
 from apps.inventory.models import Item
+from apps.inventory.stock import adjust
 from apps.operations.models import InventoryOperation
 
 def fix_negative_stock():
@@ -44,15 +45,13 @@ def fix_negative_stock():
                 print(f"⚠️  库存不一致！")
                 choice = input(f"是否将库存修正为 {calculated_stock}? (y/n): ")
                 if choice.lower() == 'y':
-                    item.stock = calculated_stock
-                    item.save()
+                    adjust(item, calculated_stock)
                     print(f"✅ 已修正库存为 {calculated_stock}")
         else:
             print("⚠️  没有操作记录！")
             choice = input(f"是否将库存重置为 0? (y/n): ")
             if choice.lower() == 'y':
-                item.stock = 0
-                item.save()
+                adjust(item, 0)
                 print(f"✅ 已重置库存为 0")
     
     print("\n" + "=" * 60)
@@ -0,0 +1,60 @@
+"""
+Gunicorn 生产配置（在项目根目录运行 gunicorn config.wsgi 时自动加载）
+
+    gunicorn config.wsgi:application
+    GUNICORN_WORKERS=4 GUNICORN_THREADS=8 gunicorn config.wsgi:application
+
+- preload_app：主进程加载 Django、URL 配置、视图和序列化器后再 fork，工作进程以写时复制共享这部分内存，
+  启动时间和每个工作进程的独占内存都明显下降
+- gthread：每个工作进程多个线程，适合以数据库/缓存 I/O 为主的接口；进程数默认等于 CPU 核数
+- max_requests + jitter：工作进程处理一定数量请求后错峰重启，限制内存缓慢增长
+- post_worker_init：工作进程 fork 并完成应用初始化后，预热缓存连接和引用数据，首个请求不再承担冷启动开销
+
+启动时间和每个工作进程的内存可用 python manage.py benchmark_startup 测量。
+"""
+import multiprocessing
+import os
+import time
+
+# 注意：本文件的模块级变量名会被当作 gunicorn 配置项（config 本身就是配置项），读取环境变量统一用 decouple.config
+import decouple
+
+_started = time.monotonic()
+
+bind = decouple.config('GUNICORN_BIND', default='0.0.0.0:8000')
+worker_class = decouple.config('GUNICORN_WORKER_CLASS', default='gthread')
+workers = decouple.config('GUNICORN_WORKERS', default=multiprocessing.cpu_count(), cast=int)
+threads = decouple.config('GUNICORN_THREADS', default=4 if worker_class == 'gthread' else 1, cast=int)
+preload_app = decouple.config('GUNICORN_PRELOAD', default=True, cast=bool)
+
+timeout = decouple.config('GUNICORN_TIMEOUT', default=60, cast=int)
+graceful_timeout = 30
+keepalive = 5
+
+max_requests = decouple.config('GUNICORN_MAX_REQUESTS', default=2000, cast=int)
+max_requests_jitter = decouple.config('GUNICORN_MAX_REQUESTS_JITTER', default=200, cast=int)
+
+# 心跳文件放在内存文件系统，避免磁盘 I/O 抖动导致工作进程被误判超时
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = decouple.config('GUNICORN_ACCESS_LOG', default='-') or None  # 设为空关闭访问日志
+errorlog = '-'
+loglevel = decouple.config('GUNICORN_LOG_LEVEL', default='info')
+
+
+def when_ready(server):
+    """主进程就绪：预加载模式下此时应用已导入，预热可共享的部分后再 fork"""
+    if server.cfg.preload_app:
+        from common.warmup import warm_shared
+        warm_shared()
+    server.log.info('主进程就绪，用时 %.2f 秒（preload=%s）', time.monotonic() - _started, server.cfg.preload_app)
+
+
+def post_worker_init(worker):
+    """工作进程 fork 后（应用已初始化）：预热本进程的缓存连接和引用数据"""
+    from common.warmup import warm_shared, warm_worker
+    started = time.monotonic()
+    if not worker.cfg.preload_app:
+        warm_shared()
+    warm_worker()
+    worker.log.info('工作进程 %s 预热完成，用时 %.3f 秒', worker.pid, time.monotonic() - started)
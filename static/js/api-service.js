@@ -235,7 +235,12 @@
       trend: (period = 'month') => request(`/dashboard/trend/?period=${period}&_t=${Date.now()}`),
       distribution: () => request(`/dashboard/distribution/?_t=${Date.now()}`),
       activities: (limit = 10) => request(`/dashboard/activities/?limit=${limit}&_t=${Date.now()}`),
-      lowStock: () => request(`/dashboard/low-stock/?_t=${Date.now()}`)
+      lowStock: () => request(`/dashboard/low-stock/?_t=${Date.now()}`),
+      // 组合接口：widgets 为组件名数组，params 的键写作 '<组件名>.<参数名>'
+      bundle: (widgets = [], params = {}) => {
+        const query = new URLSearchParams({ ...params, widgets: widgets.join(','), _t: Date.now() }).toString();
+        return request(`/dashboard/bundle/?${query}`);
+      }
     },
 
     // 库存物品模块
@@ -234,56 +234,36 @@ const DashboardController = {
             Utils.clearCache('dashboard_overview');
         }
         
-        let overviewData, activities, lowStock;
-        
+        // 全部组件一次请求取回（/api/dashboard/bundle/），服务端一次读取缓存、只计算未命中的组件
+        let bundle;
         try {
-            [overviewData, activities, lowStock] = await Promise.all([
-                API.dashboard.overview().catch(() => ({ success: false })),
-                API.dashboard.activities(10).catch(() => ({ success: false })),
-                API.dashboard.lowStock().catch(() => ({ success: false }))
-            ]);
+            bundle = await API.dashboard.bundle(
+                ['overview', 'activities', 'low_stock', 'trend', 'distribution'],
+                { 'activities.limit': 10, 'trend.period': 'month' }
+            );
         } catch (error) {
-            overviewData = { success: false };
-            activities = { success: false };
-            lowStock = { success: false };
+            bundle = { success: false };
         }
+        const widgets = (bundle?.success && bundle?.data) || {};
         
-        if (overviewData?.success && overviewData?.data) {
-            this.renderOverview(overviewData.data);
+        if (widgets.overview) {
+            this.renderOverview(widgets.overview);
         } else {
             this.renderOverview({ overview: { total_items: 0, low_stock_items: 0, total_value: 0, turnover_rate: 0 }, changes: {} });
         }
         
-        if (activities?.success) {
-            this.renderActivities(activities.data || []);
-        } else {
-            this.renderActivities([]);
-        }
-        
-        if (lowStock?.success) {
-            this.renderLowStock(lowStock.data || []);
-        } else {
-            this.renderLowStock([]);
-        }
+        this.renderActivities(widgets.activities || []);
+        this.renderLowStock(widgets.low_stock || []);
         
         AppState.isLoadingDashboard = false;
-        this.loadChartsAsync();
-    },
-    
-    async loadChartsAsync() {
+        
         try {
-            const [trendData, distData] = await Promise.all([
-                API.dashboard.trend('month').catch(() => ({ success: false })),
-                API.dashboard.distribution().catch(() => ({ success: false }))
-            ]);
-            
-            if (trendData?.success) {
-                this.renderTrendChartWithData(trendData);
+            if (widgets.trend) {
+                this.renderTrendChartWithData({ success: true, data: widgets.trend });
             }
-            if (distData?.success) {
-                this.renderCategoryChartWithData(distData);
+            if (widgets.distribution) {
+                this.renderCategoryChartWithData({ success: true, data: widgets.distribution });
             }
-            
             this.initTrendPeriodButtons();
         } catch (error) {
             // 静默处理错误